@@ -0,0 +1 @@
+"""Benchmarks for RenderBoy. Run them from the repository root, e.g. ``python -m benchmarks.benchLookups``."""
@@ -0,0 +1,70 @@
+"""Benchmark the json and SQLite project stores on load, single field updates and search."""
+
+
+import os
+import tempfile
+import time
+
+import renderboy.data.renderTypes as rbTypes
+from benchmarks.benchLoad import buildProject
+from renderboy.data.projectDatabase import ProjectDatabase
+
+
+def timeIt(function):
+    """Return the time in seconds taken to call the function."""
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def findRendersByAuthor(project, author):
+    """Return (shot name, render name) pairs for every render by the given author, by walking the project."""
+    return [(shot.name, render.name) for shot in project.shots for render in shot.renders if render.author == author]
+
+
+def main():
+    """Print load, update and search times for each store."""
+    print(f"{'shots':>8} {'store':>8} {'load (s)':>10} {'update (s)':>11} {'search (s)':>11}")
+    with tempfile.TemporaryDirectory() as tempDir:
+        jsonPath = os.path.join(tempDir, "projectData.json")
+        databasePath = os.path.join(tempDir, "projectData.db")
+        for shotCount in [1000, 5000]:
+            project = buildProject(shotCount, 5, 5, 20)
+            project.shots[-1].renders[0].author = "someone"
+            project.writeToFile(jsonPath)
+            if os.path.exists(databasePath):
+                os.remove(databasePath)
+            database = ProjectDatabase(databasePath)
+            database.importFromJson(jsonPath)
+            shotName = project.shots[shotCount // 2].name
+            project = None
+
+            def loadJson():
+                nonlocal project
+                project = rbTypes.loadProjectFromFile(jsonPath)
+
+            def updateJson():
+                project.getShot(shotName).getLayer("Layer 1").notes = "updated"
+                project.writeToFile(jsonPath)
+
+            jsonTimes = (
+                timeIt(loadJson),
+                timeIt(updateJson),
+                timeIt(lambda: findRendersByAuthor(project, "someone")),
+            )
+            print(f"{shotCount:>8} {'json':>8} {jsonTimes[0]:>10.4f} {jsonTimes[1]:>11.4f} {jsonTimes[2]:>11.4f}")
+
+            databaseTimes = (
+                timeIt(database.loadProject),
+                timeIt(lambda: database.setLayerField(shotName, "Layer 1", "notes", "updated")),
+                timeIt(lambda: database.findRendersByAuthor("someone")),
+            )
+            print(
+                f"{shotCount:>8} {'sqlite':>8} {databaseTimes[0]:>10.4f} {databaseTimes[1]:>11.4f} "
+                f"{databaseTimes[2]:>11.4f}"
+            )
+            database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark the json and binary project formats: file size, save time and load time.
+
+Pass ``--json`` to print the results as json rather than a table.
+"""
+
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+import renderboy.data.renderTypes as rbTypes
+from benchmarks.benchLoad import buildProject
+from renderboy.data import projectBinary
+
+
+def bestTime(function, repeat=3):
+    """Return the shortest time in seconds taken by calling the function."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def benchmarkFormats(shotCount, layerCount=5, renderCount=5, listSize=20):
+    """Return the size, save time and load times of a project in each format."""
+    project = buildProject(shotCount, layerCount, renderCount, listSize)
+    results = {"shots": shotCount}
+    with tempfile.TemporaryDirectory() as tempDir:
+        jsonPath = os.path.join(tempDir, "projectData.json")
+        binaryPath = os.path.join(tempDir, "projectData" + projectBinary.fileExtension)
+        for name, filePath, save in (
+            ("json", jsonPath, lambda: project.writeToFile(jsonPath)),
+            ("binary", binaryPath, lambda: projectBinary.writeProjectBinary(project, binaryPath)),
+        ):
+            saveTime = bestTime(save)
+            results[name] = {
+                "bytes": os.path.getsize(filePath),
+                "save": saveTime,
+                "load": bestTime(lambda: rbTypes.loadProjectFromFile(filePath)),
+                "lazyLoad": bestTime(lambda: rbTypes.loadProjectFromFile(filePath, lazy=True)),
+            }
+    return results
+
+
+def main():
+    """Print the formats compared for projects of increasing size."""
+    results = [benchmarkFormats(shotCount) for shotCount in [100, 1000, 5000]]
+    if "--json" in sys.argv[1:]:
+        print(json.dumps(results, indent=4))
+        return
+
+    print(f"{'shots':>8} {'format':>8} {'size (MB)':>10} {'save (s)':>10} {'load (s)':>10} {'lazy (s)':>10}")
+    for result in results:
+        for name in ("json", "binary"):
+            timings = result[name]
+            print(
+                f"{result['shots']:>8} {name:>8} {timings['bytes'] / 1e6:>10.2f} {timings['save']:>10.3f} "
+                f"{timings['load']:>10.3f} {timings['lazyLoad']:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
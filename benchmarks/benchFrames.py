@@ -0,0 +1,45 @@
+"""Benchmark checking a whole show for missing frames."""
+
+
+import sys
+import time
+
+import renderboy.data.renderTypes as rbTypes
+from renderboy.data.frameSet import FrameSet
+
+
+def buildProject(shotCount, renderCount, frameCount, gapCount):
+    """Return a project whose first render in each shot has the given number of single frame gaps."""
+    project = rbTypes.Project()
+    for i in range(shotCount):
+        shot = rbTypes.Shot()
+        shot.name = f"shot_{i:05d}"
+        for j in range(renderCount):
+            render = rbTypes.Render()
+            render.name = f"render_{j:03d}"
+            render.frameStart = 1
+            render.frameEnd = frameCount
+            gaps = range(frameCount // (gapCount + 1), frameCount, frameCount // (gapCount + 1)) if j == 0 else []
+            render.frames = FrameSet.fromRange(1, frameCount) - FrameSet.fromFrames(list(gaps)[:gapCount])
+            shot.renders.append(render)
+        project.addShot(shot)
+    return project
+
+
+def main():
+    """Print the time taken to find every missing frame in a show."""
+    shotCount, renderCount, frameCount, gapCount = 5000, 5, 100000, 10
+    project = buildProject(shotCount, renderCount, frameCount, gapCount)
+
+    start = time.perf_counter()
+    missingFrames = project.getMissingFrames()
+    checkTime = time.perf_counter() - start
+
+    frames = project.shots[0].renders[0].frames
+    print(f"{shotCount * renderCount} renders of {frameCount} frames, {gapCount} gaps in {len(missingFrames)} of them")
+    print(f"Missing frame check: {checkTime:.3f}s")
+    print(f"Frames stored as {len(frames.ranges())} runs, {sys.getsizeof(frames._starts) * 2} bytes of run lists")
+
+
+if __name__ == "__main__":
+    main()
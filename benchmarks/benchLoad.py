@@ -0,0 +1,70 @@
+"""Benchmark loading a project file."""
+
+
+import os
+import tempfile
+import time
+import tracemalloc
+
+import renderboy.data.renderTypes as rbTypes
+
+
+def buildProject(shotCount, layerCount, renderCount, listSize):
+    """Return a project with the given number of shots, layers per shot, renders per shot and list entries."""
+    project = rbTypes.Project()
+    project.name = "benchmark"
+    for i in range(shotCount):
+        shot = rbTypes.Shot()
+        shot.name = f"shot_{i:05d}"
+        shot.frameStart = 1001
+        shot.frameEnd = 1100
+        for j in range(layerCount):
+            layer = shot.addLayer()
+            layer.notes = f"Notes for layer {j}"
+            layer.exclude = [f"/world/geo/exclude_{k}" for k in range(listSize)]
+            layer.matte = [f"/world/geo/matte_{k}" for k in range(listSize)]
+            layer.phantom = [f"/world/geo/phantom_{k}" for k in range(listSize)]
+        for j in range(renderCount):
+            render = rbTypes.Render()
+            render.name = f"render_{j:03d}"
+            render.author = "benchmark"
+            render.frameStart = 1001
+            render.frameEnd = 1100
+            render.resolution = "1920x1080"
+            render.layers = [layer.name for layer in shot.layers]
+            shot.renders.append(render)
+        project.addShot(shot)
+    return project
+
+
+def timeLoad(filePath, lazy):
+    """Return the time in seconds and peak traced memory in MB to load the given project file."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    project = rbTypes.loadProjectFromFile(filePath, lazy=lazy)
+    loadTime = time.perf_counter() - start
+    peakMemory = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    del project
+    return loadTime, peakMemory
+
+
+def main():
+    """Print the time and memory taken to load projects of increasing size, fully and lazily."""
+    print(f"{'shots':>8} {'size (MB)':>10} {'load (s)':>10} {'peak (MB)':>10} {'lazy (s)':>10} {'lazy peak (MB)':>15}")
+    with tempfile.TemporaryDirectory() as tempDir:
+        filePath = os.path.join(tempDir, "projectData.json")
+        for shotCount in [100, 1000, 5000]:
+            buildProject(shotCount, 5, 5, 20).writeToFile(filePath)
+            size = os.path.getsize(filePath) / 1e6
+
+            loadTime, peakMemory = timeLoad(filePath, lazy=False)
+            lazyTime, lazyPeakMemory = timeLoad(filePath, lazy=True)
+            print(
+                f"{shotCount:>8} {size:>10.1f} {loadTime:>10.3f} {peakMemory:>10.1f} "
+                f"{lazyTime:>10.3f} {lazyPeakMemory:>15.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
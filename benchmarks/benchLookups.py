@@ -0,0 +1,45 @@
+"""Benchmark shot and layer lookups as the project grows."""
+
+
+import random
+import timeit
+
+import renderboy.data.renderTypes as rbTypes
+
+
+def buildProject(shotCount, layerCount):
+    """Return a project with the given number of shots, the last of which has the given number of layers."""
+    project = rbTypes.Project()
+    for i in range(shotCount):
+        shot = rbTypes.Shot()
+        shot.name = f"shot_{i:05d}"
+        project.addShot(shot)
+
+    for _ in range(layerCount):
+        project.shots[-1].addLayer()
+    return project
+
+
+def timeLookups(project, layerCount, lookups=10000):
+    """Return the average time in microseconds of a getShot and a getLayer call."""
+    rng = random.Random(0)
+    shotNames = [rng.choice(project.shots).name for _ in range(lookups)]
+    layerNames = [f"Layer {rng.randint(1, layerCount)}" for _ in range(lookups)]
+    shot = project.shots[-1]
+
+    shotTime = timeit.timeit(lambda: [project.getShot(name) for name in shotNames], number=1)
+    layerTime = timeit.timeit(lambda: [shot.getLayer(name) for name in layerNames], number=1)
+    return shotTime / lookups * 1e6, layerTime / lookups * 1e6
+
+
+def main():
+    """Print lookup times for a range of project sizes."""
+    print(f"{'shots':>8} {'layers':>8} {'getShot (us)':>14} {'getLayer (us)':>14}")
+    for shotCount, layerCount in [(100, 10), (1000, 100), (8000, 1000), (20000, 5000)]:
+        project = buildProject(shotCount, layerCount)
+        shotTime, layerTime = timeLookups(project, layerCount)
+        print(f"{shotCount:>8} {layerCount:>8} {shotTime:>14.3f} {layerTime:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark the memory used by project objects compared to the previous __dict__ based layout."""
+
+
+import tracemalloc
+
+import renderboy.data.renderTypes as rbTypes
+
+
+class DictLayer:
+    """A layer laid out the way it was before RenderBoyObject used __slots__."""
+
+    def __init__(self):
+        """Initialize the layer."""
+        self.objectType = type(self).__name__
+        self.name = ""
+        self.notes = ""
+        self.exclude = []
+        self.matte = []
+        self.phantom = []
+
+
+class DictRender:
+    """A render laid out the way it was before RenderBoyObject used __slots__."""
+
+    def __init__(self):
+        """Initialize the render."""
+        self.objectType = type(self).__name__
+        self.name = ""
+        self.author = ""
+        self.notes = ""
+        self.frameStart = 0
+        self.frameEnd = 0
+        self.resolution = ""
+        self.layers = []
+
+
+def measure(factory, count):
+    """Return the number of bytes allocated per object when creating the given number of objects."""
+    tracemalloc.start()
+    objects = [factory() for _ in range(count)]
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return allocated / count
+
+
+def main():
+    """Print the memory used per object for each layout."""
+    count = 200000
+    print(f"{'type':>8} {'dict (bytes)':>14} {'slots (bytes)':>14} {'saving':>8}")
+    for name, dictFactory, slotsFactory in [
+        ("Layer", DictLayer, rbTypes.Layer),
+        ("Render", DictRender, rbTypes.Render),
+    ]:
+        dictSize = measure(dictFactory, count)
+        slotsSize = measure(slotsFactory, count)
+        print(f"{name:>8} {dictSize:>14.0f} {slotsSize:>14.0f} {1 - slotsSize / dictSize:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Benchmark saving a single layer rename with a full rewrite compared to a journal record."""
+
+
+import os
+import tempfile
+import time
+
+from benchmarks.benchLoad import buildProject
+from renderboy.data.projectJournal import ProjectJournal
+
+
+def main():
+    """Print the bytes written and time taken to save one rename each way."""
+    print(f"{'shots':>8} {'rewrite (B)':>12} {'rewrite (s)':>12} {'journal (B)':>12} {'journal (s)':>12}")
+    with tempfile.TemporaryDirectory() as tempDir:
+        filePath = os.path.join(tempDir, "projectData.json")
+        for shotCount in [100, 1000, 5000]:
+            journal = ProjectJournal(filePath)
+            journal.saveSnapshot(buildProject(shotCount, 5, 5, 20))
+            project = journal.load()
+
+            shot = project.shots[shotCount // 2]
+            layer = shot.layers[0]
+            oldName = layer.name
+            layer.rename("beauty")
+
+            start = time.perf_counter()
+            project.writeToFile(filePath)
+            rewriteTime = time.perf_counter() - start
+            rewriteSize = os.path.getsize(filePath)
+
+            start = time.perf_counter()
+            journal.recordLayerRenamed(shot, oldName, layer.name)
+            journalTime = time.perf_counter() - start
+            journalSize = os.path.getsize(journal.journalPath)
+            journal.close()
+            os.remove(journal.journalPath)
+
+            print(f"{shotCount:>8} {rewriteSize:>12} {rewriteTime:>12.4f} {journalSize:>12} {journalTime:>12.6f}")
+
+
+if __name__ == "__main__":
+    main()
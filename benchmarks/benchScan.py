@@ -0,0 +1,54 @@
+"""Benchmark scanning a project directory for shots, layers, renders and frames."""
+
+
+import os
+import tempfile
+import time
+
+import renderboy.data.renderTypes as rbTypes
+from renderboy.data import directorySnapshot
+
+
+def buildDirectory(directory, shotCount, renderCount, layerCount, frameCount):
+    """Create a project directory of empty frame files."""
+    for i in range(shotCount):
+        for j in range(renderCount):
+            for k in range(layerCount):
+                layerPath = os.path.join(directory, f"shot_{i:05d}", f"lighting_v{j:03d}", f"layer{k}")
+                os.makedirs(layerPath)
+                for frame in range(1001, 1001 + frameCount):
+                    open(os.path.join(layerPath, f"layer{k}.{frame}.exr"), "w").close()
+        # Stray files next to the shots should be ignored
+        open(os.path.join(directory, f"notes_{i}.txt"), "w").close()
+
+
+def main():
+    """Print the time taken to scan a project directory with different numbers of workers."""
+    shotCount, renderCount, layerCount, frameCount = 500, 2, 2, 50
+    with tempfile.TemporaryDirectory() as tempDir:
+        buildDirectory(tempDir, shotCount, renderCount, layerCount, frameCount)
+        fileCount = shotCount * renderCount * layerCount * frameCount
+        print(f"{shotCount} shots, {fileCount} frame files")
+        print(f"{'workers':>8} {'scan (s)':>10}")
+        for maxWorkers in [1, 4, 16, 32]:
+            start = time.perf_counter()
+            project = rbTypes.Project()
+            project.generateFromDirectory(tempDir, maxWorkers=maxWorkers)
+            scanTime = time.perf_counter() - start
+            assert len(project.shots) == shotCount
+            print(f"{maxWorkers:>8} {scanTime:>10.3f}")
+
+        # Treat the freshly written tree as settled, rather than waiting out the racy window
+        directorySnapshot.racyWindowNs = 0
+        project = rbTypes.Project()
+        snapshot = directorySnapshot.DirectorySnapshot()
+        directorySnapshot.rescanProjectDirectory(project, tempDir, snapshot)
+        start = time.perf_counter()
+        summary = directorySnapshot.rescanProjectDirectory(project, tempDir, snapshot)
+        rescanTime = time.perf_counter() - start
+        assert not summary["added"] and not summary["changed"]
+        print(f"Rescan of an unchanged tree: {rescanTime:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Benchmark how long RenderBoy takes to start: import times and the time until the window first paints.
+
+Each run starts a fresh interpreter, so nothing is already imported or cached in memory. Without a display the window
+is painted with Qt's offscreen platform.
+
+Pass a number of milliseconds to fail when the median time to first paint goes over it, e.g.
+``python -m benchmarks.benchStartup 400``.
+"""
+
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+_repositoryPath = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Measurements reported by each run, in the order they are printed
+_timings = ("qtImport", "windowImport", "construct", "firstPaint", "timeToFirstPaint", "cliImport")
+
+
+def runWindow(userFolderPath):
+    """Open the window and print how long each step took, in milliseconds, as json. Run in a fresh interpreter."""
+    start = time.perf_counter()
+    from PySide2 import QtCore, QtWidgets
+
+    qtImported = time.perf_counter()
+    from renderboy.ui.renderboyWindow import RenderBoyWindow
+
+    windowImported = time.perf_counter()
+    app = QtWidgets.QApplication([])
+    window = RenderBoyWindow(userFolderPath)
+    constructed = time.perf_counter()
+
+    painted = []
+
+    class PaintFilter(QtCore.QObject):
+        def eventFilter(self, watched, event):
+            if event.type() == QtCore.QEvent.Paint and not painted:
+                painted.append((time.perf_counter(), time.monotonic_ns()))
+                QtCore.QTimer.singleShot(0, app.quit)
+            return False
+
+    paintFilter = PaintFilter()
+    window.installEventFilter(paintFilter)
+    window.show()
+    app.exec_()
+    window.close()
+
+    paintTime, paintClock = painted[0]
+    print(json.dumps({
+        "qtImport": (qtImported - start) * 1e3,
+        "windowImport": (windowImported - qtImported) * 1e3,
+        "construct": (constructed - windowImported) * 1e3,
+        "firstPaint": (paintTime - constructed) * 1e3,
+        "paintClock": paintClock,
+    }))
+
+
+def runCli():
+    """Import the command line interface and print how long it took as json. Run in a fresh interpreter."""
+    start = time.perf_counter()
+    import renderboy.cli  # noqa: F401
+
+    imported = time.perf_counter()
+    print(json.dumps({"cliImport": (imported - start) * 1e3, "importsQt": "PySide2" in sys.modules}))
+
+
+def _runChild(mode, *args):
+    """Run this module in a fresh interpreter in the given mode, returning the json it prints."""
+    env = dict(os.environ)
+    if not env.get("DISPLAY") and not env.get("WAYLAND_DISPLAY"):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.benchStartup", mode, *args],
+        cwd=_repositoryPath,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        check=True,
+        universal_newlines=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measureStartup(runs=5):
+    """Return the median of each startup timing over the given number of runs, in milliseconds.
+
+    timeToFirstPaint is from starting the interpreter to the first paint of the window, including the interpreter's
+    own startup.
+    """
+    samples = {name: [] for name in _timings}
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as userFolderPath:
+            launched = time.monotonic_ns()
+            timings = _runChild("--window", userFolderPath)
+        timings["timeToFirstPaint"] = (timings.pop("paintClock") - launched) / 1e6
+
+        cliTimings = _runChild("--cli")
+        if cliTimings["importsQt"]:
+            print("WARNING: Importing renderboy.cli imported Qt.")
+        timings["cliImport"] = cliTimings["cliImport"]
+
+        for name in _timings:
+            samples[name].append(timings[name])
+    return {name: statistics.median(values) for name, values in samples.items()}
+
+
+def main():
+    """Print the median startup timings, exiting with an error if the time to first paint is over the given limit."""
+    if len(sys.argv) > 1 and sys.argv[1] == "--window":
+        runWindow(sys.argv[2])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "--cli":
+        runCli()
+        return
+
+    maxTimeToFirstPaint = float(sys.argv[1]) if len(sys.argv) > 1 else None
+    timings = measureStartup()
+    for name in _timings:
+        print(f"{name:>18} {timings[name]:>10.1f} ms")
+    print(json.dumps(timings))
+
+    if maxTimeToFirstPaint is not None and timings["timeToFirstPaint"] > maxTimeToFirstPaint:
+        print(
+            f"Time to first paint {timings['timeToFirstPaint']:.1f} ms is over the {maxTimeToFirstPaint:.0f} ms limit."
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
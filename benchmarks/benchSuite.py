@@ -0,0 +1,275 @@
+"""Reproducible benchmark suite for the data layer and the window, written as json so runs can be compared over time.
+
+A synthetic project of N shots, each with M layers of L list entries and K renders, is generated the same way every
+run, then loading, saving, scanning, lookups and search are timed, along with populating and filtering the shot list in
+an offscreen window. The window is timed in a fresh interpreter, so the data timings never import Qt.
+
+Examples:
+    python -m benchmarks.benchSuite --shots 10000 --output before.json
+    python -m benchmarks.benchSuite --shots 10000 --output after.json --compare before.json --max-slowdown 0.1
+"""
+
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import renderboy.data.renderTypes as rbTypes
+from benchmarks.benchLoad import buildProject
+from benchmarks.benchScan import buildDirectory
+
+
+_repositoryPath = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Bumped whenever what is measured changes, so runs are only compared with runs that measured the same things
+suiteVersion = 1
+
+# Searches typed into the sidebar: a shot name, a list entry, layer notes and a misspelt shot name
+searchQueries = ("shot_00042", "exclude_7", "Notes for layer 3", "shto_0012")
+
+
+def measure(function, repeat, setup=None, scale=1.0):
+    """Time a function, returning the fastest, median and mean of the runs in milliseconds.
+
+    Arguments:
+        function (callable): What to time.
+        repeat (int): How many times to run it.
+        setup (callable): Called before each run, untimed.
+        scale (float): What to divide each time by, e.g. the number of calls a run makes.
+    """
+    runs = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        runs.append((time.perf_counter() - start) * 1e3 / scale)
+    return {"min": min(runs), "median": statistics.median(runs), "mean": statistics.mean(runs), "runs": runs}
+
+
+def benchmarkData(arguments, tempDir):
+    """Return the timings of the data layer, by name."""
+    repeat = arguments.repeat
+    results = {}
+    project = buildProject(arguments.shots, arguments.layers, arguments.renders, arguments.list_size)
+    filePath = os.path.join(tempDir, "projectData.json")
+
+    results["writeToFile"] = measure(lambda: project.writeToFile(filePath), repeat)
+    results["loadProjectFromFile"] = measure(lambda: rbTypes.loadProjectFromFile(filePath), repeat)
+    results["loadProjectFromFileLazy"] = measure(lambda: rbTypes.loadProjectFromFile(filePath, lazy=True), repeat)
+
+    scanDirectory = os.path.join(tempDir, "shots")
+    os.makedirs(scanDirectory)
+    buildDirectory(scanDirectory, arguments.scan_shots, 2, 2, arguments.scan_frames)
+    results["generateFromDirectory"] = measure(
+        lambda: rbTypes.Project().generateFromDirectory(scanDirectory), repeat
+    )
+
+    # Lookups are timed per call, in microseconds
+    rng = random.Random(arguments.seed)
+    shotNames = [rng.choice(project.shots).name for _ in range(arguments.lookups)]
+    shot = project.shots[len(project.shots) // 2]
+    layerNames = [rng.choice(shot.layers).name for _ in range(arguments.lookups)]
+    lookupScale = arguments.lookups / 1e3
+    results["getShot"] = measure(lambda: [project.getShot(name) for name in shotNames], repeat, scale=lookupScale)
+    results["getLayer"] = measure(lambda: [shot.getLayer(name) for name in layerNames], repeat, scale=lookupScale)
+    results["getShot"]["unit"] = results["getLayer"]["unit"] = "us"
+
+    from renderboy.data.searchIndex import SearchIndex
+
+    results["searchIndexBuild"] = measure(lambda: SearchIndex.fromProject(project), repeat)
+    index = SearchIndex.fromProject(project)
+    results["searchShots"] = measure(
+        lambda: [index.search(query) for query in searchQueries], repeat, scale=len(searchQueries)
+    )
+    return results
+
+
+def runWindow(filePath, repeat):
+    """Time populating and filtering the shot list of a window, printing the timings as json. Run in a fresh
+    interpreter.
+    """
+    from PySide2 import QtWidgets
+
+    from renderboy.ui.renderboyWindow import RenderBoyWindow
+
+    app = QtWidgets.QApplication([])
+    project = rbTypes.loadProjectFromFile(filePath)
+    with tempfile.TemporaryDirectory() as userFolderPath:
+        window = RenderBoyWindow(userFolderPath)
+        window.show()
+        # Wait for the empty saved project to load
+        while window.projectWorker is not None:
+            app.processEvents()
+
+        def clearProject():
+            window.setProject(rbTypes.Project())
+            app.processEvents()
+
+        def populate():
+            window.setProject(project)
+            app.processEvents()
+
+        def search(query):
+            window.sidebarSearchBar.setText(query)
+            window.searchShots()
+            app.processEvents()
+
+        def resetSearch():
+            search("")
+            window.searchIndex = None
+
+        results = {
+            "qtPopulateShotList": measure(populate, repeat, setup=clearProject),
+            # The first search builds the search index
+            "qtFirstSearch": measure(lambda: search(searchQueries[0]), repeat, setup=resetSearch),
+            "qtFilterShotList": measure(
+                lambda: [search(query) for query in searchQueries], repeat, scale=len(searchQueries)
+            ),
+            "qtClearFilter": measure(lambda: search(""), repeat, setup=lambda: search(searchQueries[0])),
+        }
+        window.close()
+    print(json.dumps(results))
+
+
+def benchmarkWindow(arguments, tempDir):
+    """Return the timings of the window, by name, or an empty dict if it couldn't be run."""
+    filePath = os.path.join(tempDir, "projectData.json")
+    env = dict(os.environ)
+    if not env.get("DISPLAY") and not env.get("WAYLAND_DISPLAY"):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.benchSuite", "--window", filePath, "--repeat", str(arguments.repeat)],
+            cwd=_repositoryPath,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True,
+            universal_newlines=True,
+        )
+        return json.loads(result.stdout.strip().splitlines()[-1])
+    except (subprocess.CalledProcessError, ValueError, IndexError) as e:
+        stderr = (getattr(e, "stderr", None) or "").strip()
+        print(f"WARNING: Could not time the window: {stderr.splitlines()[-1] if stderr else e}", file=sys.stderr)
+        return {}
+
+
+def getEnvironment():
+    """Return what the results depend on besides the code: the interpreter, the machine and the commit."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=_repositoryPath, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            universal_newlines=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpuCount": os.cpu_count(),
+        "commit": commit,
+    }
+
+
+def compareResults(baseline, results, stream=sys.stdout):
+    """Print each median next to the baseline's.
+
+    Returns:
+        dict: The ratio of each median to the baseline's, for timings in both runs.
+    """
+    if baseline.get("suiteVersion") != results["suiteVersion"]:
+        print("WARNING: The baseline was made by a different version of the suite.", file=sys.stderr)
+    if baseline.get("parameters") != results["parameters"]:
+        print("WARNING: The baseline was run with different parameters.", file=sys.stderr)
+
+    ratios = {}
+    print(f"{'benchmark':>24} {'baseline':>10} {'median':>10} {'change':>8}", file=stream)
+    for name, timing in results["timings"].items():
+        baselineTiming = baseline.get("timings", {}).get(name)
+        if baselineTiming is None or not baselineTiming["median"]:
+            continue
+        ratios[name] = timing["median"] / baselineTiming["median"]
+        print(
+            f"{name:>24} {baselineTiming['median']:>10.3f} {timing['median']:>10.3f} {ratios[name] - 1:>+8.1%}",
+            file=stream,
+        )
+    return ratios
+
+
+def buildParser():
+    """Return the argument parser of the suite."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--shots", type=int, default=1000, help="Shots in the generated project.")
+    parser.add_argument("--layers", type=int, default=5, help="Layers in each shot.")
+    parser.add_argument("--renders", type=int, default=5, help="Renders in each shot.")
+    parser.add_argument("--list-size", type=int, default=20, help="Entries in each exclude, matte and phantom list.")
+    parser.add_argument("--scan-shots", type=int, default=200, help="Shot folders in the scanned directory.")
+    parser.add_argument("--scan-frames", type=int, default=20, help="Frames of each layer in the scanned directory.")
+    parser.add_argument("--lookups", type=int, default=10000, help="Calls made to time getShot and getLayer.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs of each benchmark.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the names looked up.")
+    parser.add_argument("--no-window", action="store_true", help="Skip the window timings.")
+    parser.add_argument("--output", help="The json file to write the results to. Defaults to stdout.")
+    parser.add_argument("--compare", metavar="BASELINE", help="A json file of earlier results to compare with.")
+    parser.add_argument("--max-slowdown", type=float, metavar="FRACTION",
+                        help="With --compare, exit with an error if a median is this much slower, e.g. 0.1.")
+    parser.add_argument("--window", metavar="PROJECT", help=argparse.SUPPRESS)
+    return parser
+
+
+def main():
+    """Run the suite, printing or writing the results as json."""
+    arguments = buildParser().parse_args()
+    if arguments.window:
+        runWindow(arguments.window, arguments.repeat)
+        return 0
+
+    parameters = {
+        key: getattr(arguments, key)
+        for key in ("shots", "layers", "renders", "list_size", "scan_shots", "scan_frames", "lookups", "repeat", "seed")
+    }
+    with tempfile.TemporaryDirectory() as tempDir:
+        timings = benchmarkData(arguments, tempDir)
+        if not arguments.no_window:
+            timings.update(benchmarkWindow(arguments, tempDir))
+    for timing in timings.values():
+        timing.setdefault("unit", "ms")
+
+    results = {
+        "suiteVersion": suiteVersion,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": getEnvironment(),
+        "parameters": parameters,
+        "timings": timings,
+    }
+    text = json.dumps(results, indent=4)
+    if arguments.output:
+        with open(arguments.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if arguments.compare:
+        with open(arguments.compare) as f:
+            # Kept off stdout when the results are printed there
+            ratios = compareResults(json.load(f), results, sys.stdout if arguments.output else sys.stderr)
+        if arguments.max_slowdown is not None:
+            slower = [name for name, ratio in ratios.items() if ratio > 1 + arguments.max_slowdown]
+            if slower:
+                print(f"Slower than the baseline: {', '.join(slower)}", file=sys.stderr)
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,20 @@
-"""Main entry point for the RenderBoy application."""
+"""Main entry point for the RenderBoy application.
+
+With no arguments the window is opened. With arguments, the headless command line interface in renderboy.cli is run,
+which never imports Qt. Run it as a module from the repository root, e.g. python -m renderboy.
+"""
 
 if __name__ == "__main__":
     import sys
+
+    if len(sys.argv) > 1:
+        from renderboy.cli import main
+
+        sys.exit(main())
+
     from PySide2 import QtWidgets
 
-    from ui.renderboyWindow import RenderBoyWindow
+    from renderboy.ui.renderboyWindow import RenderBoyWindow
 
     app = QtWidgets.QApplication(sys.argv)
     window = RenderBoyWindow()
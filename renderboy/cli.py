@@ -0,0 +1,590 @@
+"""Headless command line interface for scanning, querying, editing and exporting a project without Qt.
+
+The project is the one the RenderBoy window keeps, unless --project points at another project file. Edits are
+journaled the same way the window journals them, so the window picks them up the next time it loads the project.
+
+Examples:
+    python -m renderboy scan /jobs/show/shots
+    python -m renderboy query renders --shot "sh01*" --missing
+    python -m renderboy bulk-edit layers --shot "sh01*" --layer beauty --set notes="Needs denoising"
+    python -m renderboy bulk-edit layers --shot "sh01*" --layer beauty --add matte=chr_hero
+    python -m renderboy batch edits.jsonl
+    python -m renderboy export --format csv --output renders.csv
+    python -m renderboy render --shot sh010 --render "lighting*" --command "render -s {start} -e {end} {shot}.ma"
+    python -m renderboy convert projectData.json projectData.rbp
+    python -m renderboy --project projectData.db query shots --shot "sh01*"
+"""
+
+
+import argparse
+import fnmatch
+import json
+import os
+import sys
+
+import renderboy.data.renderTypes as rbTypes
+from renderboy.data.projectJournal import applyRecord, recordFields
+from renderboy.data.projectShards import (
+    ShardedProjectStore, defaultShardedProjectFolderName, isShardedProject, openProjectStore, writeShardedProject
+)
+
+
+# The project the RenderBoy window keeps, and the snapshot of the directory it was scanned from
+defaultUserFolderPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ui", "_user")
+defaultProjectDataPath = os.path.join(defaultUserFolderPath, "projectData.json")
+defaultShardedProjectPath = os.path.join(defaultUserFolderPath, defaultShardedProjectFolderName)
+defaultProjectDatabasePath = os.path.join(defaultUserFolderPath, "projectData.db")
+directorySnapshotFileName = "directorySnapshot.json"
+
+# The RenderBoyObject type listed by each query level
+_levelTypes = {"shots": rbTypes.Shot, "layers": rbTypes.Layer, "renders": rbTypes.Render}
+
+# Fields of a shot that hold other objects, left out of shot queries unless asked for
+_shotContentFields = ("layers", "renders")
+
+# The type of object added by each record that adds one
+_addedTypes = {"addShot": rbTypes.Shot, "addLayer": rbTypes.Layer, "addRender": rbTypes.Render}
+
+
+class CommandError(Exception):
+    """Raised when a command can't be run as given. The message is shown to the user."""
+
+
+def _writeJsonLine(data, output):
+    """Write a json serializable value to the output as one line."""
+    output.write(json.dumps(data, default=rbTypes.serializeRenderBoyObject))
+    output.write("\n")
+
+
+def _parseValue(text):
+    """Return the value of a FIELD=VALUE argument, read as json if it can be, e.g. 1001 or ["a", "b"], or as text."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _parseAssignments(assignments, objectType):
+    """Return (field, value) pairs from FIELD=VALUE arguments, checking each field belongs to the object type."""
+    pairs = []
+    for assignment in assignments or ():
+        field, separator, value = assignment.partition("=")
+        if not separator:
+            raise CommandError(f"Expected FIELD=VALUE, got {assignment!r}.")
+        if field not in objectType.getLoadableFields() or field in _shotContentFields:
+            raise CommandError(f"{objectType.objectType} has no field {field!r} that can be set.")
+        pairs.append((field, _parseValue(value)))
+    return pairs
+
+
+def _parseFields(fields, objectType):
+    """Return the field names given as a comma separated list, checking each belongs to the object type."""
+    if not fields:
+        return None
+    fieldNames = [field.strip() for field in fields.split(",") if field.strip()]
+    allowed = objectType.getLoadableFields() + (("missingFrames",) if objectType is rbTypes.Render else ())
+    for field in fieldNames:
+        if field not in allowed:
+            raise CommandError(f"{objectType.objectType} has no field {field!r}.")
+    return fieldNames
+
+
+def _matches(pattern, name):
+    """Return whether a name matches a glob pattern. No pattern matches everything."""
+    return pattern is None or fnmatch.fnmatchcase(name, pattern)
+
+
+def iterMatches(project, level, shotPattern=None, layerPattern=None, renderPattern=None, shotNames=None):
+    """Yield (shot, object) for each shot, layer or render matching the patterns.
+
+    Shots are filtered by name before their layers or renders are loaded.
+
+    Arguments:
+        project (Project): The project to search.
+        level (str): "shots", "layers" or "renders".
+        shotPattern (str): A glob the shot names must match.
+        layerPattern (str): A glob the layer names must match.
+        renderPattern (str): A glob the render names must match.
+        shotNames (list): Only look in these shots, in this order, e.g. the results of a search.
+    """
+    shots = project.shots if shotNames is None else [project._shotIndex[name] for name in shotNames]
+    for shot in shots:
+        if not _matches(shotPattern, shot.name):
+            continue
+        if level == "shots":
+            yield shot, shot
+        elif level == "layers":
+            for layer in shot.layers:
+                if _matches(layerPattern, layer.name):
+                    yield shot, layer
+        else:
+            for render in shot.renders:
+                if _matches(renderPattern, render.name):
+                    yield shot, render
+
+
+def describe(shot, obj, fields=None):
+    """Return a json serializable dict of a matched shot, layer or render.
+
+    Arguments:
+        shot (Shot): The shot the object belongs to.
+        obj (RenderBoyObject): The shot, layer or render.
+        fields (list): The fields to include. Defaults to every field, except the layers and renders of shots.
+    """
+    if fields is None:
+        fields = [field for field in type(obj).getLoadableFields() if not (obj is shot and field in _shotContentFields)]
+
+    if obj is shot:
+        d = {}
+    else:
+        d = {"shot": shot.name}
+    for field in fields:
+        if field == "missingFrames":
+            d[field] = str(obj.getMissingFrames())
+        else:
+            d[field] = getattr(obj, field)
+    return d
+
+
+class ProjectSession:
+    """A project loaded from its journal, whose edits are journaled when the session is saved."""
+
+    def __init__(self, projectDataPath, record=True):
+        """Load the project.
+
+        Arguments:
+            projectDataPath (str): The project snapshot, e.g. projectData.json, a database such as projectData.db, or a
+                sharded project.
+            record (bool): Whether edits are journaled. If False, nothing is written.
+        """
+        if record:
+            os.makedirs(os.path.dirname(os.path.abspath(projectDataPath)), exist_ok=True)
+        self.journal = openProjectStore(projectDataPath)
+        self.project = self.journal.load()
+        self.record = record
+        self._replaced = False
+        if record:
+            self.project.subscribe(self.journal.recordEvents)
+
+    @property
+    def directorySnapshotPath(self):
+        """The snapshot of the directory the project was scanned from, kept next to the project."""
+        folder = os.path.dirname(os.path.abspath(self.journal.projectDataPath))
+        if isinstance(self.journal, ShardedProjectStore):
+            # Next to the folder of the sharded project, where the window keeps it
+            folder = os.path.dirname(folder)
+        return os.path.join(folder, directorySnapshotFileName)
+
+    def replaceProject(self, project):
+        """Replace the project with a new one, saved as a whole once the session is closed."""
+        self.project.unsubscribe(self.journal.recordEvents)
+        self.project = project
+        self._replaced = True
+
+    def close(self):
+        """Write the edits made in the session."""
+        if self.record and self._replaced:
+            self.journal.saveSnapshot(self.project)
+        self.journal.close()
+
+
+def runScan(args, session, output):
+    """Scan a project directory, merging the shots found into the project."""
+    from renderboy.data.directorySnapshot import DirectorySnapshot, rescanProjectDirectory
+    from renderboy.data import shotScanner
+
+    directory = os.path.normpath(os.path.abspath(args.directory))
+    if not os.path.isdir(directory):
+        raise CommandError(f"{args.directory} is not a directory.")
+
+    # The snapshot lets a rescan of the same directory skip shots that haven't changed
+    snapshot = DirectorySnapshot.load(session.directorySnapshotPath)
+    if args.new:
+        session.replaceProject(rbTypes.Project())
+        snapshot = DirectorySnapshot()
+
+    project = session.project
+    with project.batchEvents():
+        summary = rescanProjectDirectory(
+            project, directory, snapshot, maxWorkers=args.workers or shotScanner.defaultMaxWorkers
+        )
+    if session.record:
+        snapshot.save(session.directorySnapshotPath)
+
+    summary["shots"] = len(project.shots)
+    _writeJsonLine(summary, output)
+    return 0
+
+
+def runQuery(args, session, output):
+    """Print each matching shot, layer or render as a line of json."""
+    project = session.project
+    objectType = _levelTypes[args.level]
+    fields = _parseFields(args.fields, objectType)
+    if args.missing and objectType is rbTypes.Layer:
+        raise CommandError("Only shots and renders have missing frames.")
+
+    shotNames = None
+    if args.search:
+        from renderboy.data.searchIndex import SearchIndex
+
+        shotNames = [shotName for shotName, _ in SearchIndex.fromProject(project, readLayers=True).search(args.search)]
+
+    count = 0
+    matches = iterMatches(project, args.level, args.shot, args.layer, args.render, shotNames)
+    for shot, obj in matches:
+        if args.missing:
+            missingFrames = obj.getMissingFrames()
+            if not missingFrames:
+                continue
+        _writeJsonLine(describe(shot, obj, fields), output)
+        count += 1
+        if args.limit is not None and count >= args.limit:
+            break
+    return 0
+
+
+def runBulkEdit(args, session, output):
+    """Set fields of, and add or remove list entries of, every matching shot, layer or render."""
+    objectType = _levelTypes[args.level]
+    assignments = _parseAssignments(args.set, objectType)
+    additions = _parseAssignments(args.add, objectType)
+    removals = _parseAssignments(args.remove, objectType)
+    for field, _ in additions + removals:
+        if field not in rbTypes.Layer.listTypes or objectType is not rbTypes.Layer:
+            raise CommandError(f"Only the {', '.join(rbTypes.Layer.listTypes)} lists of layers can be added to.")
+    if not (assignments or additions or removals):
+        raise CommandError("Nothing to edit. Use --set, --add or --remove.")
+
+    matched = 0
+    changed = 0
+    project = session.project
+    # One batch, so the whole edit is journaled together
+    with project.batchEvents():
+        for _, obj in list(iterMatches(project, args.level, args.shot, args.layer, args.render)):
+            matched += 1
+            objectChanged = False
+            for field, value in assignments:
+                objectChanged = obj.setField(field, value) or objectChanged
+            for field, value in additions:
+                entries = value if isinstance(value, list) else [value]
+                if obj.addToList(field, entries):
+                    objectChanged = True
+            for field, value in removals:
+                entries = value if isinstance(value, list) else [value]
+                if obj.removeFromList(field, entries):
+                    objectChanged = True
+            changed += objectChanged
+
+    _writeJsonLine({"matched": matched, "changed": changed, "dryRun": not session.record}, output)
+    return 0
+
+
+def readBatchRecords(lines):
+    """Return the records given as lines of json, checking each is a record the journal can apply.
+
+    Blank lines and lines starting with # are skipped. Records take the same form as journal records, e.g.
+    {"op": "setLayer", "shot": "sh010", "layer": "beauty", "field": "notes", "value": "Needs denoising"}
+
+    Returns:
+        list: (line number, record) for each record.
+
+    Raises:
+        CommandError: If any line isn't a valid record. Nothing should be applied in that case.
+    """
+    records = []
+    errors = []
+    for lineNumber, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            record = json.loads(line, object_hook=rbTypes.loadRenderBoyObject)
+        except ValueError as e:
+            errors.append(f"line {lineNumber}: {e}")
+            continue
+
+        op = record.get("op") if isinstance(record, dict) else None
+        if op not in recordFields:
+            errors.append(f"line {lineNumber}: unknown op {op!r}")
+            continue
+        missingKeys = [key for key in recordFields[op] if key not in record]
+        if missingKeys:
+            errors.append(f"line {lineNumber}: {op} needs {', '.join(missingKeys)}")
+            continue
+        if op in _addedTypes and not isinstance(record["value"], _addedTypes[op]):
+            errors.append(f"line {lineNumber}: {op} needs a {_addedTypes[op].objectType} value")
+            continue
+        records.append((lineNumber, record))
+
+    if errors:
+        raise CommandError("Invalid batch input, nothing was applied:\n" + "\n".join(errors))
+    return records
+
+
+def runBatch(args, session, output):
+    """Apply records read as lines of json from a file or stdin."""
+    if args.input == "-":
+        records = readBatchRecords(sys.stdin)
+    else:
+        with open(args.input, "r", encoding="utf-8") as f:
+            records = readBatchRecords(f)
+
+    skipped = []
+    with session.project.batchEvents():
+        for lineNumber, record in records:
+            if not applyRecord(session.project, record):
+                skipped.append(lineNumber)
+
+    if skipped:
+        print(f"WARNING: {len(skipped)} records were for shots, layers or renders that don't exist.", file=sys.stderr)
+    _writeJsonLine(
+        {"applied": len(records) - len(skipped), "skipped": skipped, "dryRun": not session.record}, output
+    )
+    return 0
+
+
+def runExport(args, session, output):
+    """Write the project, or the matching shots, as json, json lines of shots, or csv rows of renders."""
+    project = session.project
+    shots = [shot for shot, _ in iterMatches(project, "shots", args.shot)]
+
+    if args.format == "json":
+        data = project.toDict()
+        data["shots"] = shots
+        json.dump(data, output, default=rbTypes.serializeRenderBoyObject, indent=4)
+        output.write("\n")
+    elif args.format == "jsonl":
+        for shot in shots:
+            _writeJsonLine(shot, output)
+    else:
+        import csv
+
+        writer = csv.writer(output)
+        writer.writerow(["shot", "render", "author", "frameStart", "frameEnd", "resolution", "frames", "missingFrames"])
+        for shot in shots:
+            for render in shot.renders:
+                writer.writerow([
+                    shot.name,
+                    render.name,
+                    render.author,
+                    render.frameStart,
+                    render.frameEnd,
+                    render.resolution,
+                    "" if render.frames is None else str(render.frames),
+                    str(render.getMissingFrames()),
+                ])
+    return 0
+
+
+def runRender(args, session, output):
+    """Render the frames of every matching render locally, printing a summary of each render as a line of json."""
+    from renderboy.data import renderScheduler
+
+    if args.dummy is not None:
+        commandTemplate = renderScheduler.dummyCommandTemplate + ["--seconds", str(args.dummy)]
+        framePattern = args.frame_pattern or renderScheduler.dummyFramePattern
+    elif args.command:
+        commandTemplate = args.command
+        framePattern = args.frame_pattern
+    else:
+        raise CommandError("Give the command to render each chunk with --command, or use --dummy.")
+
+    jobs = []
+    try:
+        for shot, render in iterMatches(session.project, "renders", args.shot, renderPattern=args.render):
+            frames = render.getMissingFrames() if args.missing else None
+            if frames is not None and not frames:
+                continue
+            jobs.append(renderScheduler.RenderJob(render, commandTemplate, frames))
+    except ValueError as e:
+        raise CommandError(str(e)) from None
+    if not jobs:
+        raise CommandError("No renders to render.")
+
+    renderScheduler.renderLocally(
+        jobs,
+        maxWorkers=args.workers,
+        maxRetries=args.retries,
+        minChunkSize=args.min_chunk,
+        maxChunkSize=args.max_chunk,
+        framePattern=framePattern,
+    )
+    for job in jobs:
+        _writeJsonLine(job.toDict(), output)
+    return 1 if any(job.getStatusCounts()["failed"] for job in jobs) else 0
+
+
+def _addMatchArguments(parser, levels=True):
+    """Add the arguments that pick which shots, layers or renders a command works on."""
+    if levels:
+        parser.add_argument("level", choices=sorted(_levelTypes), help="What to work on.")
+    parser.add_argument("--shot", help="Only shots whose name matches this glob, e.g. 'sh01*'.")
+    if levels:
+        parser.add_argument("--layer", help="Only layers whose name matches this glob.")
+        parser.add_argument("--render", help="Only renders whose name matches this glob.")
+
+
+def runConvert(args, session, output):
+    """Convert a project between json, the binary project format, a SQLite database and a sharded project folder."""
+    from renderboy.data import projectBinary, projectDatabase
+
+    toFormat = args.to
+    if toFormat is None:
+        extension = os.path.splitext(args.destination)[1].lower()
+        if extension == projectBinary.fileExtension:
+            toFormat = "binary"
+        elif extension in projectDatabase.fileExtensions:
+            toFormat = "database"
+        else:
+            toFormat = "json" if extension else "shards"
+
+    if toFormat == "binary":
+        projectBinary.convertJsonToBinary(args.source, args.destination)
+    elif toFormat == "shards":
+        writeShardedProject(rbTypes.loadProjectFromFile(args.source, lazy=True), args.destination)
+        print(f"Wrote {args.destination}", file=sys.stderr)
+        return 0
+    elif toFormat == "database":
+        database = projectDatabase.ProjectDatabase(args.destination)
+        try:
+            database.importProject(rbTypes.loadProjectFromFile(args.source, lazy=True))
+        finally:
+            database.close()
+    else:
+        projectBinary.convertBinaryToJson(args.source, args.destination)
+    print(f"Wrote {args.destination} ({os.path.getsize(args.destination)} bytes)", file=sys.stderr)
+    return 0
+
+
+def buildParser():
+    """Return the argument parser for the command line interface."""
+    parser = argparse.ArgumentParser(
+        prog="renderboy", description="Scan, query, edit and export RenderBoy projects without the window."
+    )
+    parser.add_argument(
+        "--project",
+        help="The project file, a .db database, or the folder of a sharded project. Defaults to the window's project.",
+    )
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+    subparsers.required = True
+
+    scanParser = subparsers.add_parser("scan", help="Scan a project directory into the project.")
+    scanParser.add_argument("directory", help="The directory holding one folder per shot.")
+    scanParser.add_argument("--new", action="store_true", help="Start a new project rather than merging into it.")
+    scanParser.add_argument("--workers", type=int, help="The most shot folders to scan at once.")
+    scanParser.add_argument("--dry-run", action="store_true", help="Report what would change without saving it.")
+    scanParser.set_defaults(run=runScan)
+
+    queryParser = subparsers.add_parser("query", help="Print matching shots, layers or renders as json lines.")
+    _addMatchArguments(queryParser)
+    queryParser.add_argument("--search", help="Only shots found by a fuzzy search, best match first.")
+    queryParser.add_argument("--missing", action="store_true", help="Only shots or renders with missing frames.")
+    queryParser.add_argument("--fields", help="Comma separated fields to print. Renders also have missingFrames.")
+    queryParser.add_argument("--limit", type=int, help="The most results to print.")
+    queryParser.set_defaults(run=runQuery, readOnly=True)
+
+    editParser = subparsers.add_parser("bulk-edit", help="Edit every matching shot, layer or render.")
+    _addMatchArguments(editParser)
+    editParser.add_argument("--set", action="append", metavar="FIELD=VALUE", help="Set a field. Repeatable.")
+    editParser.add_argument("--add", action="append", metavar="LIST=ENTRY",
+                            help="Add an entry, or a json list of entries, to a layer list. Repeatable.")
+    editParser.add_argument("--remove", action="append", metavar="LIST=ENTRY",
+                            help="Remove an entry, or a json list of entries, from a layer list. Repeatable.")
+    editParser.add_argument("--dry-run", action="store_true", help="Report what would change without saving it.")
+    editParser.set_defaults(run=runBulkEdit)
+
+    batchParser = subparsers.add_parser("batch", help="Apply journal records read as json lines.")
+    batchParser.add_argument("input", nargs="?", default="-", help="The file to read. Defaults to stdin.")
+    batchParser.add_argument("--dry-run", action="store_true", help="Check and apply the records without saving.")
+    batchParser.set_defaults(run=runBatch)
+
+    exportParser = subparsers.add_parser("export", help="Write the project as json, json lines or csv.")
+    _addMatchArguments(exportParser, levels=False)
+    exportParser.add_argument(
+        "--format", choices=("json", "jsonl", "csv"), default="json",
+        help="json for a project file, jsonl for one shot per line or csv for one render per row.",
+    )
+    exportParser.add_argument("--output", help="The file to write. Defaults to stdout.")
+    exportParser.set_defaults(run=runExport, readOnly=True)
+
+    renderParser = subparsers.add_parser("render", help="Render the frames of matching renders on this machine.")
+    _addMatchArguments(renderParser, levels=False)
+    renderParser.add_argument("--render", help="Only renders whose name matches this glob.")
+    renderParser.add_argument("--command", help="The command that renders a chunk, with {start}, {end}, {frames}, "
+                                                "{shot}, {render}, {resolution} and {layers} filled in.")
+    renderParser.add_argument("--dummy", type=float, metavar="SECONDS",
+                              help="Render with a dummy command that takes this many seconds a frame.")
+    renderParser.add_argument("--frame-pattern", help="A regex matching the line the command prints as each frame "
+                                                      "is done, with the frame number as its first group.")
+    renderParser.add_argument("--missing", action="store_true", help="Only render frames missing on disk.")
+    renderParser.add_argument("--workers", type=int, help="The most chunks to run at once. Defaults to the cores.")
+    renderParser.add_argument("--retries", type=int, default=2, help="How many times to retry a failed frame.")
+    renderParser.add_argument("--min-chunk", type=int, default=1, help="The fewest frames in a chunk.")
+    renderParser.add_argument("--max-chunk", type=int, help="The most frames in a chunk.")
+    renderParser.set_defaults(run=runRender, readOnly=True)
+
+    convertParser = subparsers.add_parser(
+        "convert", help="Convert a project between json, binary, a database and sharded."
+    )
+    convertParser.add_argument(
+        "source", help="The project to read: json, binary, a database or a sharded project folder."
+    )
+    convertParser.add_argument("destination", help="The project file or folder to write.")
+    convertParser.add_argument("--to", choices=("json", "binary", "database", "shards"),
+                               help="The format to write. Defaults to binary for .rbp files, a database for .db and "
+                                    ".sqlite files, a sharded project for paths without an extension and json "
+                                    "otherwise.")
+    convertParser.set_defaults(run=runConvert, readOnly=True, usesSession=False)
+
+    return parser
+
+
+def getDefaultProjectPath():
+    """Return where the window keeps its project: a sharded project or database if there is one, or projectData.json."""
+    if isShardedProject(defaultShardedProjectPath):
+        return defaultShardedProjectPath
+    if os.path.isfile(defaultProjectDatabasePath):
+        return defaultProjectDatabasePath
+    return defaultProjectDataPath
+
+
+def main(argv=None):
+    """Run the command line interface.
+
+    Arguments:
+        argv (list): The arguments, without the program name. Defaults to sys.argv.
+
+    Returns:
+        int: The exit code.
+    """
+    args = buildParser().parse_args(argv)
+    readOnly = getattr(args, "readOnly", False)
+    record = not (readOnly or getattr(args, "dry_run", False))
+
+    output = sys.stdout
+    try:
+        if getattr(args, "output", None):
+            output = open(args.output, "w", encoding="utf-8", newline="")
+        if not getattr(args, "usesSession", True):
+            return args.run(args, None, output)
+        session = ProjectSession(args.project or getDefaultProjectPath(), record=record)
+        try:
+            return args.run(args, session, output)
+        finally:
+            session.close()
+    except BrokenPipeError:
+        # The output was piped into something like head, which stopped reading. Python would report the pipe again
+        # when it flushes stdout on exit.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (CommandError, OSError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""Incremental rescans of a project directory, using a snapshot of the directories read by the last scan."""
+
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import renderboy.data.renderTypes as rbTypes
+from renderboy.data import instrumentation, shotScanner
+
+
+# Directories modified this close to the scan may have changed again within the filesystem's mtime resolution
+racyWindowNs = 2 * 10**9
+
+
+def _getSettledStats(stats, scanTime):
+    """Return the stats of a directory, or None if it was modified within the racy window of the scan that read it."""
+    if stats is None or stats[0] >= scanTime - racyWindowNs:
+        return None
+    return stats
+
+
+class DirectorySnapshot:
+    """The [mtime, inode, entry count] of every directory read by a scan, grouped by shot.
+
+    A shot only needs to be read again if one of its directories no longer matches, which can be checked with a stat
+    of each directory rather than a listing of every frame.
+    """
+
+    def __init__(self, directory=None):
+        """Initialize an empty snapshot.
+
+        Arguments:
+            directory (str): The project directory the snapshot is of.
+        """
+        self.directory = directory
+        self.scanTime = 0
+        self.root = None
+        self.shots = {}
+
+    @classmethod
+    def load(cls, filePath):
+        """Return the snapshot saved at the given path, or an empty snapshot if there isn't one."""
+        snapshot = cls()
+        if not os.path.isfile(filePath):
+            return snapshot
+
+        with open(filePath, "r") as f:
+            data = json.load(f)
+        snapshot.directory = data["directory"]
+        snapshot.scanTime = data["scanTime"]
+        snapshot.root = data["root"]
+        snapshot.shots = data["shots"]
+        return snapshot
+
+    def copy(self):
+        """Return a copy that can be read while this snapshot is updated.
+
+        The stats of each shot are replaced as a whole by setShot rather than changed, so they are shared.
+        """
+        snapshot = DirectorySnapshot(self.directory)
+        snapshot.scanTime = self.scanTime
+        snapshot.root = self.root
+        snapshot.shots = dict(self.shots)
+        return snapshot
+
+    def save(self, filePath):
+        """Save the snapshot to the given path."""
+        data = {"directory": self.directory, "scanTime": self.scanTime, "root": self.root, "shots": self.shots}
+        rbTypes.writeJsonAtomically(filePath, data, separators=(",", ":"))
+
+    def setRoot(self, stats, scanTime):
+        """Store the stats of the project directory, read by a scan that started at scanTime."""
+        self.root = _getSettledStats(stats, scanTime)
+
+    def setShot(self, shotName, directoryStats, scanTime):
+        """Store the stats of a shot's directories, read by a scan that started at scanTime.
+
+        Directories modified within the racy window of the scan are stored as unknown, so they are read again by the
+        next rescan even if their mtime doesn't change. Each shot is checked against the scan it was read by, so
+        rescanning one shot doesn't change whether the others are current.
+        """
+        self.shots[shotName] = {
+            relativePath: _getSettledStats(stored, scanTime) for relativePath, stored in directoryStats.items()
+        }
+
+    def _isCurrent(self, stored, path):
+        """Return whether the stored stats of a directory still match it on disk."""
+        if stored is None:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return stat.st_mtime_ns == stored[0] and stat.st_ino == stored[1]
+
+    def isRootCurrent(self):
+        """Return whether the set of shot folders is unchanged since the snapshot."""
+        return self.directory is not None and self._isCurrent(self.root, self.directory)
+
+    def isShotCurrent(self, shotName):
+        """Return whether none of the shot's directories have changed since the snapshot."""
+        directoryStats = self.shots.get(shotName)
+        if not directoryStats:
+            return False
+
+        shotPath = os.path.join(self.directory, shotName)
+        for relativePath, stored in directoryStats.items():
+            path = os.path.join(shotPath, relativePath) if relativePath else shotPath
+            if not self._isCurrent(stored, path):
+                return False
+        return True
+
+
+def mergeShot(existing, scanned):
+    """Merge a freshly scanned shot into an existing one, keeping everything entered by users.
+
+    Renders found on disk update the frame range and layers of the render of the same name, or are added. Layers found
+    on disk are added if the shot doesn't have them yet. Notes, membership lists, authors and anything not found on
+    disk are left alone.
+
+    Returns:
+        bool: Whether the existing shot was changed.
+    """
+    changed = False
+    existing.loadContent()
+
+    for scannedLayer in scanned.layers:
+        if scannedLayer.name not in existing._layerIndex:
+            existing.addLayer(scannedLayer)
+            changed = True
+
+    renders = {render.name: render for render in existing.renders}
+    for scannedRender in scanned.renders:
+        render = renders.get(scannedRender.name)
+        if render is None:
+            existing.addRender(scannedRender)
+            changed = True
+            continue
+        for field in ("frameStart", "frameEnd", "layers", "frames"):
+            if render.setField(field, getattr(scannedRender, field)):
+                changed = True
+
+    if scanned.renders:
+        for field in ("frameStart", "frameEnd"):
+            if existing.setField(field, getattr(scanned, field)):
+                changed = True
+
+    return changed
+
+
+def mergeScannedShot(project, scannedShot, summary):
+    """Add a scanned shot to the project, or merge it into the shot of the same name.
+
+    Arguments:
+        project (Project): The project to update.
+        scannedShot (Shot): The shot read from disk.
+        summary (dict): The shot's name is added to its "added" or "changed" list, if the project changed.
+    """
+    existing = project._shotIndex.get(scannedShot.name)
+    if existing is None:
+        project.addShot(scannedShot, project.getSortedIndex(scannedShot.name))
+        summary["added"].append(scannedShot.name)
+    elif mergeShot(existing, scannedShot):
+        summary["changed"].append(scannedShot.name)
+
+
+@instrumentation.traced("scanChangedShots")
+def scanChangedShots(directory, snapshot, knownShotNames, shotScanned, maxWorkers=shotScanner.defaultMaxWorkers,
+                     progress=None):
+    """Scan the shot folders that changed since the snapshot, passing each scanned shot to a callback.
+
+    Only the snapshot is changed, so this can run on a worker thread while the project stays with its owner, which
+    merges the scanned shots in with mergeScannedShot.
+
+    Arguments:
+        directory (str): The project directory.
+        snapshot (DirectorySnapshot): The snapshot from the last scan. It is updated in place.
+        knownShotNames (set): The names of the shots already in the project. Any other shot folder is always scanned.
+        shotScanned (callable): Called with each scanned shot, on the calling thread, as soon as it is scanned.
+        maxWorkers (int): The most shot folders to check or scan at once.
+        progress (callable): Called with (shots checked, total shots) as each shot finishes.
+
+    Returns:
+        list: The names of the shots in the snapshot that are no longer on disk.
+    """
+    directory = os.path.normpath(directory)
+    if snapshot.directory != directory:
+        snapshot.directory = directory
+        snapshot.root = None
+        snapshot.shots = {}
+
+    scanTime = time.time_ns()
+    if snapshot.isRootCurrent():
+        shotNames = sorted(snapshot.shots)
+    else:
+        rootStats = {}
+        shotNames = [name for name, _ in shotScanner.listShotDirectories(directory, rootStats)]
+        snapshot.setRoot(rootStats.get(""), scanTime)
+
+    def checkShot(shotName):
+        if shotName in knownShotNames and snapshot.isShotCurrent(shotName):
+            return shotName, None, None
+        directoryStats = {}
+        shot = shotScanner.scanShot(shotName, os.path.join(directory, shotName), directoryStats)
+        return shotName, shot, directoryStats
+
+    missing = sorted(set(snapshot.shots) - set(shotNames))
+    for shotName in missing:
+        del snapshot.shots[shotName]
+
+    total = len(shotNames)
+    if progress:
+        progress(0, total)
+
+    with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+        futures = [executor.submit(checkShot, shotName) for shotName in shotNames]
+        for completed, future in enumerate(as_completed(futures), 1):
+            shotName, scannedShot, directoryStats = future.result()
+            if scannedShot is not None:
+                snapshot.setShot(shotName, directoryStats, scanTime)
+                shotScanned(scannedShot)
+            if progress:
+                progress(completed, total)
+
+    snapshot.scanTime = scanTime
+    return missing
+
+
+@instrumentation.traced("rescanDirectory")
+def rescanProjectDirectory(project, directory, snapshot, maxWorkers=shotScanner.defaultMaxWorkers, progress=None):
+    """Update the project from the directory, only reading shot folders that changed since the snapshot.
+
+    Shots that are no longer on disk are kept, so nothing entered by users is lost.
+
+    Arguments:
+        project (Project): The project to update.
+        directory (str): The project directory.
+        snapshot (DirectorySnapshot): The snapshot from the last scan. It is updated in place.
+        maxWorkers (int): The most shot folders to check or scan at once.
+        progress (callable): Called with (shots checked, total shots) as each shot finishes.
+
+    Returns:
+        dict: The names of the shots that were "added", "changed" or "missing" from disk.
+    """
+    summary = {"added": [], "changed": []}
+    summary["missing"] = scanChangedShots(
+        directory,
+        snapshot,
+        set(project._shotIndex),
+        lambda scannedShot: mergeScannedShot(project, scannedShot, summary),
+        maxWorkers,
+        progress,
+    )
+
+    summary["added"].sort()
+    summary["changed"].sort()
+    return summary
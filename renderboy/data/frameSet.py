@@ -0,0 +1,206 @@
+"""A compact set of frame numbers, stored as sorted runs of consecutive frames."""
+
+
+import os
+import re
+from bisect import bisect_right
+
+
+# Matches one run of a frame set string, e.g. "1001-1050" or "1052"
+_rangePattern = re.compile(r"\s*(-?\d+)\s*(?:-\s*(-?\d+))?\s*")
+
+
+class FrameSet:
+    """A set of frame numbers stored as sorted, non-overlapping runs of consecutive frames.
+
+    Memory and the cost of set operations grow with the number of runs, i.e. the number of gaps, not the number of
+    frames. A complete 100,000 frame render is a single run.
+    """
+
+    __slots__ = ("_starts", "_ends")
+
+    def __init__(self, ranges=()):
+        """Initialize the frame set.
+
+        Arguments:
+            ranges (iterable): (start, end) pairs of inclusive frame ranges, in any order and possibly overlapping.
+        """
+        self._starts = []
+        self._ends = []
+        for start, end in sorted((start, end) for start, end in ranges if start <= end):
+            self._appendRun(start, end)
+
+    def _appendRun(self, start, end):
+        """Add a run that starts at or after the start of the last run, merging it with the last run if they touch."""
+        if self._ends and start <= self._ends[-1] + 1:
+            if end > self._ends[-1]:
+                self._ends[-1] = end
+        else:
+            self._starts.append(start)
+            self._ends.append(end)
+
+    @classmethod
+    def _fromSortedRuns(cls, runs):
+        """Return a frame set from runs that are already sorted by start."""
+        frameSet = cls()
+        for start, end in runs:
+            frameSet._appendRun(start, end)
+        return frameSet
+
+    @classmethod
+    def fromFrames(cls, frames):
+        """Return a frame set of the given frame numbers."""
+        frameSet = cls()
+        for frame in sorted(frames):
+            frameSet._appendRun(frame, frame)
+        return frameSet
+
+    @classmethod
+    def fromRange(cls, start, end):
+        """Return a frame set of every frame from start to end inclusive."""
+        return cls([(start, end)])
+
+    @classmethod
+    def fromString(cls, text):
+        """Return a frame set from a string of comma separated runs, e.g. "1001-1050,1052-1100"."""
+        ranges = []
+        for part in text.split(","):
+            if not part.strip():
+                continue
+            match = _rangePattern.fullmatch(part)
+            if not match:
+                raise ValueError(f"Invalid frame range {part!r}")
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) is not None else start
+            ranges.append((start, end))
+        return cls(ranges)
+
+    @classmethod
+    def fromDirectory(cls, path):
+        """Return a frame set of the frame files in the given directory, reading the listing once."""
+        from renderboy.data.shotScanner import getFrameNumber
+
+        frames = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                frame = getFrameNumber(entry.name)
+                if frame is not None:
+                    frames.append(frame)
+        return cls.fromFrames(frames)
+
+    @property
+    def first(self):
+        """The first frame in the set, or None if it is empty."""
+        return self._starts[0] if self._starts else None
+
+    @property
+    def last(self):
+        """The last frame in the set, or None if it is empty."""
+        return self._ends[-1] if self._ends else None
+
+    def ranges(self):
+        """Return the runs of the set as a list of inclusive (start, end) pairs."""
+        return list(zip(self._starts, self._ends))
+
+    def __len__(self):
+        """Return the number of frames in the set."""
+        return sum(self._ends) - sum(self._starts) + len(self._starts)
+
+    def __bool__(self):
+        """Return whether the set has any frames."""
+        return bool(self._starts)
+
+    def __contains__(self, frame):
+        """Return whether the frame is in the set."""
+        i = bisect_right(self._starts, frame) - 1
+        return i >= 0 and frame <= self._ends[i]
+
+    def __iter__(self):
+        """Iterate over every frame in the set, in order."""
+        for start, end in zip(self._starts, self._ends):
+            yield from range(start, end + 1)
+
+    def __eq__(self, other):
+        """Return whether both sets hold the same frames."""
+        if not isinstance(other, FrameSet):
+            return NotImplemented
+        return self._starts == other._starts and self._ends == other._ends
+
+    def __str__(self):
+        """Return the set as comma separated runs, e.g. "1001-1050,1052-1100"."""
+        return ",".join(
+            str(start) if start == end else f"{start}-{end}" for start, end in zip(self._starts, self._ends)
+        )
+
+    def __repr__(self):
+        """Return a representation of the set."""
+        return f"FrameSet({str(self)!r})"
+
+    def union(self, other):
+        """Return a frame set of the frames in either set."""
+        runs = []
+        i = j = 0
+        while i < len(self._starts) or j < len(other._starts):
+            if j >= len(other._starts) or (i < len(self._starts) and self._starts[i] <= other._starts[j]):
+                runs.append((self._starts[i], self._ends[i]))
+                i += 1
+            else:
+                runs.append((other._starts[j], other._ends[j]))
+                j += 1
+        return FrameSet._fromSortedRuns(runs)
+
+    def intersection(self, other):
+        """Return a frame set of the frames in both sets."""
+        runs = []
+        i = j = 0
+        while i < len(self._starts) and j < len(other._starts):
+            start = max(self._starts[i], other._starts[j])
+            end = min(self._ends[i], other._ends[j])
+            if start <= end:
+                runs.append((start, end))
+            if self._ends[i] < other._ends[j]:
+                i += 1
+            else:
+                j += 1
+        return FrameSet._fromSortedRuns(runs)
+
+    def difference(self, other):
+        """Return a frame set of the frames in this set but not in the other."""
+        runs = []
+        j = 0
+        for start, end in zip(self._starts, self._ends):
+            # Skip the other set's runs that end before this one starts
+            while j < len(other._starts) and other._ends[j] < start:
+                j += 1
+
+            k = j
+            while k < len(other._starts) and other._starts[k] <= end:
+                if other._starts[k] > start:
+                    runs.append((start, other._starts[k] - 1))
+                start = max(start, other._ends[k] + 1)
+                k += 1
+            if start <= end:
+                runs.append((start, end))
+        return FrameSet._fromSortedRuns(runs)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def missing(self, start=None, end=None):
+        """Return a frame set of the frames from start to end that are not in this set.
+
+        Arguments:
+            start (int): The first expected frame. Defaults to the first frame in the set.
+            end (int): The last expected frame. Defaults to the last frame in the set.
+        """
+        start = self.first if start is None else start
+        end = self.last if end is None else end
+        if start is None or end is None:
+            return FrameSet()
+        return FrameSet.fromRange(start, end) - self
+
+    def isComplete(self, start, end):
+        """Return whether every frame from start to end is in the set."""
+        i = bisect_right(self._starts, start) - 1
+        return i >= 0 and end <= self._ends[i]
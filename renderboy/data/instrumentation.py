@@ -0,0 +1,296 @@
+"""Timing spans and counters around the slow paths of RenderBoy, for finding out where the time goes.
+
+Recording is off unless the RENDERBOY_TRACE environment variable is set, or it is turned on in the settings sidebar.
+While it is off, a traced function only checks a flag before calling through, and span() hands back one shared span
+that does nothing, so the instrumentation can stay in hot code. Set RENDERBOY_TRACE to 1 to record, or to a file path
+to also write a Chrome trace there when RenderBoy exits, which can be opened in chrome://tracing or Perfetto.
+
+Example:
+    with instrumentation.span("scanDirectory", directory=directory):
+        ...
+
+    @instrumentation.traced("loadProject")
+    def loadProjectFromFile(filePath):
+        ...
+
+    if instrumentation.enabled:
+        instrumentation.count("getShot")
+"""
+
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+environmentVariable = "RENDERBOY_TRACE"
+
+# The most spans kept for the trace. Totals per span name are kept for every span.
+defaultMaxEvents = 100000
+
+# Read directly by instrumented code, so it costs a single lookup while recording is off
+enabled = False
+
+
+class Recorder:
+    """Spans and counters recorded from any thread."""
+
+    def __init__(self, maxEvents=defaultMaxEvents):
+        """Initialize the recorder.
+
+        Arguments:
+            maxEvents (int): The most spans to keep for the trace, dropping the oldest first.
+        """
+        self.startTime = time.perf_counter_ns()
+        # (name, category, start, duration, thread id, args) with times in nanoseconds
+        self.events = deque(maxlen=maxEvents)
+        # Span name to [count, total nanoseconds, longest nanoseconds]
+        self.totals = {}
+        self.counters = {}
+        self.threadNames = {}
+        self._lock = threading.Lock()
+
+    def addSpan(self, name, category, start, duration, args=None):
+        """Record a span that started at the given perf_counter_ns and lasted the given nanoseconds."""
+        thread = threading.current_thread()
+        with self._lock:
+            self.events.append((name, category, start, duration, thread.ident, args))
+            self.threadNames[thread.ident] = thread.name
+            total = self.totals.get(name)
+            if total is None:
+                self.totals[name] = [1, duration, duration]
+            else:
+                total[0] += 1
+                total[1] += duration
+                if duration > total[2]:
+                    total[2] = duration
+
+    def count(self, name, value=1):
+        """Add to a counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def getSummary(self):
+        """Return the totals of each span name and the value of each counter.
+
+        Returns:
+            dict: "spans" of name to its "count" and "totalMs", "meanMs" and "maxMs" timings, sorted by total time,
+            and "counters" of name to value.
+        """
+        with self._lock:
+            totals = sorted(self.totals.items(), key=lambda item: -item[1][1])
+            counters = dict(sorted(self.counters.items()))
+        spans = {
+            name: {"count": count, "totalMs": total / 1e6, "meanMs": total / count / 1e6, "maxMs": longest / 1e6}
+            for name, (count, total, longest) in totals
+        }
+        return {"spans": spans, "counters": counters}
+
+    def toDict(self):
+        """Return the summary plus every span kept, as json serializable data."""
+        with self._lock:
+            events = list(self.events)
+        data = self.getSummary()
+        data["events"] = [
+            {
+                "name": name,
+                "category": category,
+                "startMs": (start - self.startTime) / 1e6,
+                "durationMs": duration / 1e6,
+                "thread": threadId,
+                **({"args": args} if args else {}),
+            }
+            for name, category, start, duration, threadId, args in events
+        ]
+        return data
+
+    def toChromeTrace(self):
+        """Return the spans and counters in the Chrome trace event format."""
+        with self._lock:
+            events = list(self.events)
+            counters = dict(self.counters)
+            threadNames = dict(self.threadNames)
+        pid = os.getpid()
+        traceEvents = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": threadId, "args": {"name": threadName}}
+            for threadId, threadName in threadNames.items()
+        ]
+        for name, category, start, duration, threadId, args in events:
+            traceEvents.append({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - self.startTime) / 1e3,
+                "dur": duration / 1e3,
+                "pid": pid,
+                "tid": threadId,
+                "args": args or {},
+            })
+        if counters:
+            traceEvents.append({
+                "name": "counters",
+                "ph": "C",
+                "ts": (time.perf_counter_ns() - self.startTime) / 1e3,
+                "pid": pid,
+                "tid": 0,
+                "args": counters,
+            })
+        return {"traceEvents": traceEvents, "displayTimeUnit": "ms"}
+
+
+recorder = Recorder()
+
+
+class _Span:
+    """Records the time from entering to leaving a with block."""
+
+    __slots__ = ("name", "category", "args", "start")
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        recorder.addSpan(self.name, self.category, self.start, time.perf_counter_ns() - self.start, self.args)
+        return False
+
+
+class _NullSpan:
+    """A span that records nothing, handed out while recording is off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        return False
+
+
+_nullSpan = _NullSpan()
+
+
+def span(name, category="renderboy", **args):
+    """Return a context manager that records how long its with block takes.
+
+    Arguments:
+        name (str): What the span times, e.g. "loadProject".
+        category (str): The group of the span in a Chrome trace, e.g. "ui".
+        **args: Details shown with the span in a Chrome trace. Must be json serializable.
+    """
+    if not enabled:
+        return _nullSpan
+    return _Span(name, category, args)
+
+
+def traced(name=None, category="renderboy"):
+    """Decorate a function so each call is recorded as a span.
+
+    Arguments:
+        name (str): The span name. Defaults to the function's qualified name.
+        category (str): The group of the span in a Chrome trace.
+    """
+    def decorate(function):
+        spanName = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                recorder.addSpan(spanName, category, start, time.perf_counter_ns() - start)
+
+        return wrapper
+
+    return decorate
+
+
+def count(name, value=1):
+    """Add to a counter if recording is on. Check enabled first in hot code to skip the call."""
+    if enabled:
+        recorder.count(name, value)
+
+
+def isEnabled():
+    """Return whether spans and counters are being recorded."""
+    return enabled
+
+
+def setEnabled(isEnabled):
+    """Turn recording on or off. What was already recorded is kept."""
+    global enabled
+    enabled = bool(isEnabled)
+
+
+def clear():
+    """Drop everything recorded so far."""
+    global recorder
+    recorder = Recorder(recorder.events.maxlen)
+
+
+def getSummary():
+    """Return the totals of each span name and the value of each counter. See Recorder.getSummary."""
+    return recorder.getSummary()
+
+
+def formatSummary():
+    """Return the summary as a plain text table."""
+    summary = getSummary()
+    lines = [f"{'span':<32} {'count':>8} {'total (ms)':>11} {'mean (ms)':>10} {'max (ms)':>10}"]
+    for name, timing in summary["spans"].items():
+        lines.append(
+            f"{name:<32} {timing['count']:>8} {timing['totalMs']:>11.2f} {timing['meanMs']:>10.3f} "
+            f"{timing['maxMs']:>10.2f}"
+        )
+    if summary["counters"]:
+        lines.append("")
+        lines.append(f"{'counter':<32} {'value':>8}")
+        for name, value in summary["counters"].items():
+            lines.append(f"{name:<32} {value:>8}")
+    return "\n".join(lines)
+
+
+def writeJson(filePath):
+    """Write the summary and every span kept to a json file."""
+    with open(filePath, "w") as f:
+        json.dump(recorder.toDict(), f, indent=4)
+
+
+def writeChromeTrace(filePath):
+    """Write the spans and counters to a Chrome trace file, for chrome://tracing or Perfetto."""
+    with open(filePath, "w") as f:
+        json.dump(recorder.toChromeTrace(), f)
+
+
+def _enableFromEnvironment():
+    """Start recording if the environment variable asks for it, writing a trace on exit if it names a file."""
+    value = os.environ.get(environmentVariable, "").strip()
+    if not value or value.lower() in ("0", "false", "no", "off"):
+        return
+    setEnabled(True)
+    if value.lower() in ("1", "true", "yes", "on"):
+        return
+
+    import atexit
+
+    def writeTraceOnExit():
+        try:
+            writeChromeTrace(value)
+        except OSError as e:
+            print(f"WARNING: Could not write the trace to {value}: {e}")
+
+    atexit.register(writeTraceOnExit)
+
+
+_enableFromEnvironment()
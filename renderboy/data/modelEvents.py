@@ -0,0 +1,57 @@
+"""Change events sent to the observers of a project as its shots, layers and renders are edited."""
+
+
+# The kinds of change event, and what their fields hold
+eventKinds = {
+    "projectChanged": "A field of the project was set. field, oldValue and newValue say which and how.",
+    "shotAdded": "target is a shot added to the project at index.",
+    "shotRemoved": "target is a shot removed from the project at index.",
+    "shotChanged": "A field of the shot was set.",
+    "layerAdded": "target is a layer added to the shot at index.",
+    "layerRemoved": "target is a layer removed from the shot at index.",
+    "layerRenamed": "The layer was renamed from oldValue to newValue.",
+    "layerChanged": "A field of the layer, other than its name, was set. Setting a whole membership list also sends "
+                    "this, with the old and new entries as oldValue and newValue.",
+    "layerListChanged": "Entries were added to or removed from the layer's field list. newValue holds the entries "
+                        "added and oldValue the entries removed. index holds the positions the entries were added "
+                        "at or removed from.",
+    "renderAdded": "target is a render added to the shot at index.",
+    "renderRemoved": "target is a render removed from the shot at index.",
+    "renderChanged": "A field of the render was set.",
+}
+
+
+class ChangeEvent:
+    """A single change to a project, passed to the project's observers.
+
+    The names are taken when the event is sent, so an observer that handles a batch of events later still knows what
+    the shot and target were called at the time, even if they were renamed later in the batch.
+    """
+
+    __slots__ = ("kind", "target", "shot", "field", "oldValue", "newValue", "index", "targetName", "shotName")
+
+    def __init__(self, kind, target, shot=None, field=None, oldValue=None, newValue=None, index=None):
+        """Initialize the event.
+
+        Arguments:
+            kind (str): What happened. One of the keys of eventKinds.
+            target (RenderBoyObject): The project, shot, layer or render that changed, was added or was removed.
+            shot (Shot): The shot the target belongs to, or the target itself if it is a shot. None for the project.
+            field (str): The field that was set, if any.
+            oldValue: The value of the field before the change.
+            newValue: The value of the field after the change.
+            index: The position the target was added at or removed from, or for layerListChanged the list of
+                positions of the entries.
+        """
+        self.kind = kind
+        self.target = target
+        self.shot = shot
+        self.field = field
+        self.oldValue = oldValue
+        self.newValue = newValue
+        self.index = index
+        self.targetName = getattr(target, "name", None)
+        self.shotName = shot.name if shot is not None else None
+
+    def __repr__(self):
+        return f"ChangeEvent({self.kind!r}, {self.targetName!r}, field={self.field!r})"
@@ -0,0 +1,186 @@
+"""An ordered set of entries, used for the exclude, matte and phantom lists of layers."""
+
+
+class OrderedSet:
+    """A set that keeps its entries in the order they were added, stored as the keys of a dict.
+
+    Membership, adding to the end and removing are O(1). Positions are only worked out when they are asked for, which
+    takes one pass over the entries however many are asked about, so bulk edits cost O(n + k) rather than O(n * k).
+    """
+
+    __slots__ = ("_entries",)
+
+    def __init__(self, entries=()):
+        """Initialize the set.
+
+        Arguments:
+            entries (iterable): The entries, in order. Repeated entries are kept once, where they first appear.
+        """
+        # Layers start with empty lists, so skip the call for them
+        self._entries = dict.fromkeys(entries) if entries != () else {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __bool__(self):
+        return bool(self._entries)
+
+    def __contains__(self, entry):
+        return entry in self._entries
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __reversed__(self):
+        return reversed(self._entries)
+
+    def __getitem__(self, index):
+        """Return the entry at a position, or a list of the entries in a slice. Takes a pass over the entries."""
+        return list(self._entries)[index]
+
+    def __eq__(self, other):
+        """Ordered sets are equal to ordered sets, lists and tuples with the same entries in the same order."""
+        if isinstance(other, OrderedSet):
+            return list(self._entries) == list(other._entries)
+        if isinstance(other, (list, tuple)):
+            return list(self._entries) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"OrderedSet({list(self._entries)!r})"
+
+    def copy(self):
+        """Return a copy of the set."""
+        newSet = OrderedSet()
+        newSet._entries = self._entries.copy()
+        return newSet
+
+    def index(self, entry):
+        """Return the position of an entry. Raises ValueError if the set doesn't have it."""
+        if entry in self._entries:
+            for position, setEntry in enumerate(self._entries):
+                if setEntry == entry:
+                    return position
+        raise ValueError(f"{entry!r} is not in the set")
+
+    def add(self, entry):
+        """Add an entry to the end, unless the set already has it.
+
+        Returns:
+            bool: Whether the entry was added.
+        """
+        if entry in self._entries:
+            return False
+        self._entries[entry] = None
+        return True
+
+    def discard(self, entry):
+        """Remove an entry if the set has it.
+
+        Returns:
+            bool: Whether the entry was removed.
+        """
+        if entry not in self._entries:
+            return False
+        del self._entries[entry]
+        return True
+
+    def update(self, entries):
+        """Add entries to the end, skipping any the set already has.
+
+        Returns:
+            list: The entries that were added, in order.
+        """
+        added = [entry for entry in dict.fromkeys(entries) if entry not in self._entries]
+        self._entries.update(dict.fromkeys(added))
+        return added
+
+    def insertAll(self, positions, entries):
+        """Insert entries so each ends up at the given position, skipping any the set already has.
+
+        Arguments:
+            positions (list): Where each entry should end up, in ascending order. Positions past the end append.
+            entries (list): The entries to insert, in the same order as their positions.
+
+        Returns:
+            tuple: The positions the inserted entries ended up at and the inserted entries, both in order.
+        """
+        pending = []
+        seen = set()
+        for position, entry in zip(positions, entries):
+            if entry not in self._entries and entry not in seen:
+                seen.add(entry)
+                pending.append((position, entry))
+        if not pending:
+            return [], []
+
+        # Appending keeps the dict as it is, so only inserting before the end rebuilds it
+        if pending[0][0] >= len(self._entries):
+            start = len(self._entries)
+            inserted = [entry for _, entry in pending]
+            self._entries.update(dict.fromkeys(inserted))
+            return list(range(start, start + len(inserted))), inserted
+
+        newEntries = {}
+        remaining = iter(self._entries)
+        insertedPositions = []
+        inserted = []
+        for position, entry in pending:
+            while len(newEntries) < position:
+                nextEntry = next(remaining, _missing)
+                if nextEntry is _missing:
+                    break
+                newEntries[nextEntry] = None
+            insertedPositions.append(len(newEntries))
+            inserted.append(entry)
+            newEntries[entry] = None
+        for entry in remaining:
+            newEntries[entry] = None
+        self._entries = newEntries
+        return insertedPositions, inserted
+
+    def discardAll(self, entries):
+        """Remove entries, ignoring any the set doesn't have.
+
+        Returns:
+            tuple: The positions the removed entries were at and the removed entries, both in the order they were in.
+        """
+        toRemove = {entry for entry in entries if entry in self._entries}
+        if not toRemove:
+            return [], []
+
+        positions = []
+        removed = []
+        for position, entry in enumerate(self._entries):
+            if entry in toRemove:
+                positions.append(position)
+                removed.append(entry)
+        for entry in removed:
+            del self._entries[entry]
+        return positions, removed
+
+    def union(self, other):
+        """Return the entries of this set followed by the entries of the other it doesn't have."""
+        newSet = self.copy()
+        newSet.update(other)
+        return newSet
+
+    def intersection(self, other):
+        """Return the entries of this set that the other has, in this set's order."""
+        other = other if isinstance(other, (OrderedSet, set, frozenset, dict)) else set(other)
+        return OrderedSet(entry for entry in self._entries if entry in other)
+
+    def difference(self, other):
+        """Return the entries of this set that the other doesn't have, in this set's order."""
+        other = other if isinstance(other, (OrderedSet, set, frozenset, dict)) else set(other)
+        return OrderedSet(entry for entry in self._entries if entry not in other)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+
+# Marks the end of the entries while inserting
+_missing = object()
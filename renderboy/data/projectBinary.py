@@ -0,0 +1,455 @@
+"""A compact binary project file, as an alternative to projectData.json for large productions.
+
+Every string is written once, in a string table, and referred to by number. Every other value is written as 32 bit
+tokens, so a whole section is read back with a single array copy rather than parsed character by character. The
+field names of each kind of object are written once, in a class table, rather than with every object.
+
+The file is a sequence of sections, each prefixed with its length in bytes:
+
+    magic and version
+    string lengths        the length of each string, in characters
+    string text           every string joined together, as utf-8
+    classes               the type name and field names of each kind of object written
+    project               the project's fields, other than its shots
+    shots                 each shot's fields, other than its layers and renders
+    shot spans            where each shot's layers and renders are in the file
+    shot contents         the layers and renders of each shot, one section per shot
+
+The file is memory mapped when loaded, and the layers and renders of each shot can be left in the file until the shot
+is first used, the same way a lazily loaded json project leaves them.
+"""
+
+
+import gc
+import mmap
+import struct
+import sys
+from array import array
+
+import renderboy.data.renderTypes as rbTypes
+from renderboy.data import instrumentation
+from renderboy.data.frameSet import FrameSet
+from renderboy.data.projectStream import lazyShotKeys
+
+
+magic = b"RBPB"
+formatVersion = 1
+fileExtension = ".rbp"
+
+_header = struct.Struct("<4sI")
+_sectionLength = struct.Struct("<Q")
+
+# A token holds a tag in its low bits and a payload, such as a number or a string's index, in the rest
+_tagBits = 4
+_tagMask = (1 << _tagBits) - 1
+_tagConstant = 0  # payload 0 is None, 1 False and 2 True
+_tagInt = 1  # payload is the int
+_tagString = 2  # payload is the string's index
+_tagList = 3  # payload is the length, followed by the items
+_tagObject = 4  # payload is the class's index, followed by a value for each of its fields
+_tagFloat = 5  # payload is the index of the float's repr
+_tagBigInt = 6  # payload is the index of the int's digits, for ints too large for a payload
+_tagFrameSet = 7  # payload is the number of runs, followed by the start and end of each
+_tagStringList = 8  # payload is the length, followed by the index of each string
+_tagDict = 9  # payload is the length, followed by each key and value
+
+_minPayload = -(1 << (31 - _tagBits))
+_maxPayload = (1 << (31 - _tagBits)) - 1
+_constants = (None, False, True)
+
+# Tokens are stored little endian
+_swapBytes = sys.byteorder != "little"
+
+
+class _Writer:
+    """Encodes values as tokens, interning strings and classes as it goes."""
+
+    def __init__(self):
+        self.strings = []
+        self.stringIndexes = {}
+        self.classes = []
+        self.classIndexes = {}
+
+    def intern(self, text):
+        """Return the index of a string in the string table."""
+        index = self.stringIndexes.get(text)
+        if index is None:
+            index = self.stringIndexes[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+    def internClass(self, objectType, fields):
+        """Return the index of a kind of object, with the given fields in order, in the class table."""
+        key = (objectType, fields)
+        index = self.classIndexes.get(key)
+        if index is None:
+            index = self.classIndexes[key] = len(self.classes)
+            self.classes.append(key)
+        return index
+
+    def writeValue(self, tokens, value):
+        """Append the tokens of a value."""
+        if isinstance(value, str):
+            tokens.append((self.intern(value) << _tagBits) | _tagString)
+        elif value is None or value is False or value is True:
+            tokens.append((_constants.index(value) << _tagBits) | _tagConstant)
+        elif isinstance(value, int):
+            if _minPayload <= value <= _maxPayload:
+                tokens.append((value << _tagBits) | _tagInt)
+            else:
+                tokens.append((self.intern(str(value)) << _tagBits) | _tagBigInt)
+        elif isinstance(value, float):
+            tokens.append((self.intern(repr(value)) << _tagBits) | _tagFloat)
+        elif isinstance(value, list):
+            if value and all(isinstance(item, str) for item in value):
+                tokens.append((len(value) << _tagBits) | _tagStringList)
+                tokens.extend([self.intern(item) for item in value])
+            else:
+                tokens.append((len(value) << _tagBits) | _tagList)
+                for item in value:
+                    self.writeValue(tokens, item)
+        elif isinstance(value, rbTypes.RenderBoyObject):
+            self.writeObject(tokens, value.objectType, value.toDict())
+        elif isinstance(value, FrameSet):
+            ranges = value.ranges()
+            tokens.append((len(ranges) << _tagBits) | _tagFrameSet)
+            for start, end in ranges:
+                tokens.append(start)
+                tokens.append(end)
+        elif isinstance(value, dict):
+            tokens.append((len(value) << _tagBits) | _tagDict)
+            for key, item in value.items():
+                self.writeValue(tokens, key)
+                self.writeValue(tokens, item)
+        else:
+            raise TypeError(f"Can't write {type(value).__name__} values to a binary project file.")
+
+    def writeObject(self, tokens, objectType, fields):
+        """Append the tokens of an object, given a dict of its fields."""
+        fields = {key: value for key, value in fields.items() if key != "objectType"}
+        tokens.append((self.internClass(objectType, tuple(fields)) << _tagBits) | _tagObject)
+        for value in fields.values():
+            self.writeValue(tokens, value)
+
+
+def _section(data):
+    """Return a section of the file: its length followed by the data."""
+    return [_sectionLength.pack(len(data)), data]
+
+
+def _tokenSection(tokens):
+    """Return a section holding the given tokens."""
+    tokens = array("i", tokens)
+    if _swapBytes:
+        tokens.byteswap()
+    return _section(tokens.tobytes())
+
+
+def encodeProject(project):
+    """Return the bytes of the binary file of a project."""
+    writer = _Writer()
+
+    projectFields = project.toDict()
+    shots = projectFields.pop("shots")
+    projectTokens = array("i")
+    writer.writeObject(projectTokens, project.objectType, projectFields)
+
+    shotTokens = array("i")
+    shotTokens.append(len(shots))
+    contentSections = []
+    for shot in shots:
+        # Shots that haven't been loaded are read straight from their content, without keeping it loaded
+        shotFields = shot.toDict()
+        content = {key: shotFields.pop(key) for key in lazyShotKeys if key in shotFields}
+        writer.writeObject(shotTokens, shot.objectType, shotFields)
+        contentTokens = array("i")
+        writer.writeObject(contentTokens, "", content)
+        contentSections.append(contentTokens)
+
+    classTokens = array("i")
+    classTokens.append(len(writer.classes))
+    for objectType, fields in writer.classes:
+        classTokens.append(writer.intern(objectType))
+        classTokens.append(len(fields))
+        classTokens.extend([writer.intern(field) for field in fields])
+
+    # Every string is known once everything else is encoded
+    stringLengths = array("i", [len(text) for text in writer.strings])
+    stringText = "".join(writer.strings).encode("utf-8", "surrogatepass")
+
+    chunks = [_header.pack(magic, formatVersion)]
+    chunks += _tokenSection(stringLengths)
+    chunks += _section(stringText)
+    chunks += _tokenSection(classTokens)
+    chunks += _tokenSection(projectTokens)
+    chunks += _tokenSection(shotTokens)
+
+    # Where each shot's content section starts, once the spans section before them is written
+    offset = sum(len(chunk) for chunk in chunks) + _sectionLength.size + 16 * len(contentSections)
+    spans = array("q")
+    for contentTokens in contentSections:
+        length = len(contentTokens) * contentTokens.itemsize
+        spans.append(offset + _sectionLength.size)
+        spans.append(length)
+        offset += _sectionLength.size + length
+    if _swapBytes:
+        spans.byteswap()
+    chunks += _section(spans.tobytes())
+    for contentTokens in contentSections:
+        chunks += _tokenSection(contentTokens)
+    return b"".join(chunks)
+
+
+@instrumentation.traced("writeProjectBinary")
+def writeProjectBinary(project, filePath):
+    """Write a project to a binary file, swapping it in so the file is never left half written."""
+    rbTypes.writeBytesAtomically(filePath, encodeProject(project))
+
+
+def isBinaryProjectFile(filePath):
+    """Return whether a file is a binary project file, rather than json."""
+    with open(filePath, "rb") as f:
+        return f.read(len(magic)) == magic
+
+
+class _Decoder:
+    """Decodes tokens back into values, using the string and class tables of a file."""
+
+    def __init__(self, strings, classes):
+        """Initialize the decoder.
+
+        Arguments:
+            strings (list): The string table.
+            classes (list): (object class or None, type name, field names, whether each field is loadable) for each
+                class in the class table.
+        """
+        self.strings = strings
+        self.classes = classes
+
+    def decode(self, tokens):
+        """Return the values encoded in a list of tokens."""
+        strings = self.strings
+        classes = self.classes
+        position = 0
+        tokenCount = len(tokens)
+
+        def readValue():
+            nonlocal position
+            token = tokens[position]
+            position += 1
+            tag = token & _tagMask
+            payload = token >> _tagBits
+            if tag == _tagString:
+                return strings[payload]
+            if tag == _tagInt:
+                return payload
+            if tag == _tagStringList:
+                start = position
+                position += payload
+                return [strings[index] for index in tokens[start:position]]
+            if tag == _tagObject:
+                objectClass, objectType, fields, loadable = classes[payload]
+                if objectClass is None:
+                    d = {"objectType": objectType} if objectType else {}
+                    for field in fields:
+                        d[field] = readValue()
+                    return d
+                newObject = objectClass()
+                for field, isLoadable in zip(fields, loadable):
+                    value = readValue()
+                    if isLoadable:
+                        setattr(newObject, field, value)
+                newObject._postLoad()
+                return newObject
+            if tag == _tagList:
+                return [readValue() for _ in range(payload)]
+            if tag == _tagConstant:
+                return _constants[payload]
+            if tag == _tagFrameSet:
+                start = position
+                position += 2 * payload
+                runs = tokens[start:position]
+                return FrameSet._fromSortedRuns(zip(runs[0::2], runs[1::2]))
+            if tag == _tagFloat:
+                return float(strings[payload])
+            if tag == _tagBigInt:
+                return int(strings[payload])
+            if tag == _tagDict:
+                d = {}
+                for _ in range(payload):
+                    key = readValue()
+                    d[key] = readValue()
+                return d
+            raise ValueError(f"Unknown token tag {tag} in binary project file.")
+
+        values = []
+        while position < tokenCount:
+            values.append(readValue())
+        return values
+
+
+def _readTokens(buffer, start, length):
+    """Return the tokens in part of the file as a list of ints."""
+    tokens = array("i")
+    tokens.frombytes(buffer[start:start + length])
+    if _swapBytes:
+        tokens.byteswap()
+    return tokens.tolist()
+
+
+class BinaryProjectSource:
+    """A memory mapped binary project file that lazily loaded shots read their layers and renders from."""
+
+    def __init__(self, filePath):
+        """Map the file and read its string and class tables.
+
+        Raises:
+            ValueError: If the file isn't a binary project file this version can read.
+        """
+        self.filePath = filePath
+        with open(filePath, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        fileMagic, version = _header.unpack_from(self.buffer, 0)
+        if fileMagic != magic:
+            raise ValueError(f"{filePath} is not a binary project file.")
+        if version > formatVersion:
+            raise ValueError(f"{filePath} was written by a newer version of RenderBoy.")
+        self._position = _header.size
+
+        lengths = self._readTokenSection()
+        text = self._readSection().decode("utf-8", "surrogatepass")
+        strings = []
+        start = 0
+        for length in lengths:
+            strings.append(text[start:start + length])
+            start += length
+
+        classTokens = self._readTokenSection()
+        classes = []
+        position = 1
+        for _ in range(classTokens[0]):
+            objectType = strings[classTokens[position]]
+            fieldCount = classTokens[position + 1]
+            fields = [strings[index] for index in classTokens[position + 2:position + 2 + fieldCount]]
+            position += 2 + fieldCount
+
+            objectClass = rbTypes.renderBoyObjectTypes.get(objectType)
+            loadableFields = objectClass.getLoadableFields() if objectClass is not None else ()
+            classes.append((objectClass, objectType, fields, [field in loadableFields for field in fields]))
+        self.decoder = _Decoder(strings, classes)
+
+    def _readSection(self):
+        """Return the next section of the file as bytes."""
+        length, = _sectionLength.unpack_from(self.buffer, self._position)
+        start = self._position + _sectionLength.size
+        self._position = start + length
+        return self.buffer[start:start + length]
+
+    def _readTokenSection(self):
+        """Return the tokens of the next section of the file."""
+        length, = _sectionLength.unpack_from(self.buffer, self._position)
+        start = self._position + _sectionLength.size
+        self._position = start + length
+        return _readTokens(self.buffer, start, length)
+
+    def readProject(self, lazy=True, progress=None, shotLoaded=None):
+        """Return the project in the file.
+
+        Arguments:
+            lazy (bool): If True, only load the layers and renders of each shot when it is first used.
+            progress (callable): Called with (shots read, shot count) after each shot is read.
+            shotLoaded (callable): Called with each shot as soon as it is read, in file order.
+        """
+        project, = self.decoder.decode(self._readTokenSection())
+        if not isinstance(project, rbTypes.Project):
+            raise ValueError(f"{self.filePath} does not hold a project.")
+
+        shotTokens = self._readTokenSection()
+        shots = self.decoder.decode(shotTokens[1:])
+        spans = array("q")
+        spans.frombytes(self._readSection())
+        if _swapBytes:
+            spans.byteswap()
+
+        shotCount = len(shots)
+        for i, shot in enumerate(shots):
+            content = BinaryShotContent(self, spans[2 * i], spans[2 * i + 1])
+            if lazy and isinstance(shot, rbTypes.Shot):
+                shot._setLazyContent(content)
+            else:
+                for key, value in content.load().items():
+                    if isinstance(shot, dict):
+                        shot[key] = value
+                    else:
+                        setattr(shot, key, value)
+            if shotLoaded:
+                shotLoaded(shot)
+            if progress:
+                progress(i + 1, shotCount)
+
+        project.shots = shots
+        # Shots passed to shotLoaded may already have been added to another project, so leave them where they are
+        project._rebuildShotIndex(adoptShots=shotLoaded is None)
+        return project
+
+    def loadContent(self, start, length):
+        """Return a dict of the layers and renders in a shot's content section."""
+        content, = self.decoder.decode(_readTokens(self.buffer, start, length))
+        return content
+
+
+class BinaryShotContent:
+    """The layers and renders of a shot that are still in a binary project file, loaded when the shot is touched."""
+
+    __slots__ = ("source", "start", "length")
+
+    def __init__(self, source, start, length):
+        """Initialize the lazy content.
+
+        Arguments:
+            source (BinaryProjectSource): The file the shot was read from.
+            start (int): Where the shot's content section starts in the file.
+            length (int): The length of the section in bytes.
+        """
+        self.source = source
+        self.start = start
+        self.length = length
+
+    def load(self):
+        """Return a dict of the shot's layers and renders."""
+        return self.source.loadContent(self.start, self.length)
+
+
+def loadProjectBinary(filePath, lazy=False, progress=None, shotLoaded=None):
+    """Load a project from a binary file.
+
+    Arguments:
+        filePath (str): The binary project file.
+        lazy (bool): If True, keep the file mapped and only load the layers and renders of each shot when it is first
+            used.
+        progress (callable): Called with (shots read, shot count) after each shot is read.
+        shotLoaded (callable): Called with each shot as soon as it is read, in file order.
+    """
+    # Building the tree allocates a lot of objects, so pause the cyclic garbage collector until it is done
+    gcWasEnabled = gc.isenabled()
+    gc.disable()
+    try:
+        source = BinaryProjectSource(filePath)
+        project = source.readProject(lazy, progress, shotLoaded)
+        if not lazy:
+            source.buffer.close()
+    finally:
+        if gcWasEnabled:
+            gc.enable()
+    return project
+
+
+def convertJsonToBinary(jsonPath, binaryPath):
+    """Write the project in a json project file to a binary project file."""
+    writeProjectBinary(rbTypes.loadProjectFromFile(jsonPath, lazy=True), binaryPath)
+
+
+def convertBinaryToJson(binaryPath, jsonPath):
+    """Write the project in a binary project file to a json project file."""
+    rbTypes.loadProjectFromFile(binaryPath, lazy=True).writeToFile(jsonPath)
@@ -0,0 +1,618 @@
+"""A SQLite backed store for projects, as an alternative to projectData.json for large productions."""
+
+
+import json
+import os
+import threading
+
+import renderboy.data.renderTypes as rbTypes
+from renderboy.data import instrumentation
+from renderboy.data.frameSet import FrameSet
+
+
+# Project files with these extensions are SQLite databases
+fileExtensions = (".db", ".sqlite")
+
+schema = """
+CREATE TABLE IF NOT EXISTS project (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    name TEXT NOT NULL DEFAULT '',
+    notes TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS shots (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    notes TEXT NOT NULL DEFAULT '',
+    frameStart INTEGER NOT NULL DEFAULT 0,
+    frameEnd INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS layers (
+    id INTEGER PRIMARY KEY,
+    shotId INTEGER NOT NULL REFERENCES shots(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    notes TEXT NOT NULL DEFAULT '',
+    exclude TEXT NOT NULL DEFAULT '[]',
+    matte TEXT NOT NULL DEFAULT '[]',
+    phantom TEXT NOT NULL DEFAULT '[]'
+);
+CREATE TABLE IF NOT EXISTS renders (
+    id INTEGER PRIMARY KEY,
+    shotId INTEGER NOT NULL REFERENCES shots(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    author TEXT NOT NULL DEFAULT '',
+    notes TEXT NOT NULL DEFAULT '',
+    frameStart INTEGER NOT NULL DEFAULT 0,
+    frameEnd INTEGER NOT NULL DEFAULT 0,
+    resolution TEXT NOT NULL DEFAULT '',
+    layers TEXT NOT NULL DEFAULT '[]',
+    frames TEXT
+);
+CREATE INDEX IF NOT EXISTS shotsName ON shots(name);
+CREATE INDEX IF NOT EXISTS shotsFrameRange ON shots(frameStart, frameEnd);
+CREATE INDEX IF NOT EXISTS layersShotName ON layers(shotId, name);
+CREATE INDEX IF NOT EXISTS layersName ON layers(name);
+CREATE INDEX IF NOT EXISTS rendersShotPosition ON renders(shotId, position);
+CREATE INDEX IF NOT EXISTS rendersAuthor ON renders(author);
+CREATE INDEX IF NOT EXISTS rendersFrameRange ON renders(frameStart, frameEnd);
+"""
+
+shotColumns = ("name", "notes", "frameStart", "frameEnd")
+layerColumns = ("name", "notes", "exclude", "matte", "phantom")
+renderColumns = ("name", "author", "notes", "frameStart", "frameEnd", "resolution", "layers", "frames")
+
+# Columns that hold a list, stored as json text
+listColumns = {"exclude", "matte", "phantom", "layers"}
+
+
+def _toColumn(column, value):
+    """Return the value as it is stored in the given column."""
+    if column in listColumns:
+        return json.dumps(list(value))
+    if isinstance(value, FrameSet):
+        return str(value)
+    return value
+
+
+def _fromRow(objectClass, columns, row):
+    """Return a new object of the given class filled from a row of the given columns."""
+    newObject = objectClass()
+    for column, value in zip(columns, row):
+        setattr(newObject, column, json.loads(value) if column in listColumns else value)
+    return newObject
+
+
+def _getShotRows(shot):
+    """Return the column values of a shot, and of each of its layers and renders in order."""
+    return (
+        [getattr(shot, column) for column in shotColumns],
+        [[_toColumn(column, getattr(layer, column)) for column in layerColumns] for layer in shot.layers],
+        [[_toColumn(column, getattr(render, column)) for column in renderColumns] for render in shot.renders],
+    )
+
+
+def isProjectDatabase(filePath):
+    """Return whether a project file is a SQLite database, going by its extension."""
+    return os.path.splitext(filePath)[1].lower() in fileExtensions
+
+
+def loadProjectDatabase(filePath, lazy=True, progress=None, shotLoaded=None):
+    """Load the project in a SQLite database. See ProjectDatabase.loadProject.
+
+    The database is kept open for as long as shots that haven't been loaded yet need it.
+    """
+    return ProjectDatabase(filePath).loadProject(lazy, progress, shotLoaded)
+
+
+class DatabaseShotContent:
+    """The layers and renders of a shot that are still in the database, loaded the first time the shot is touched."""
+
+    __slots__ = ("database", "shotId")
+
+    def __init__(self, database, shotId):
+        """Initialize the lazy content.
+
+        Arguments:
+            database (ProjectDatabase): The database the shot was read from.
+            shotId (int): The id of the shot in the database.
+        """
+        self.database = database
+        self.shotId = shotId
+
+    def load(self):
+        """Return a dict of the shot's layers and renders."""
+        return self.database.loadShotContent(self.shotId)
+
+
+class ProjectDatabase:
+    """Store a project in a SQLite database.
+
+    Shots, layers and renders are rows that can be read and written one at a time, with indexes on shot names, layer
+    names, render authors and frame ranges. loadProject() returns the usual Project, with each shot's layers and
+    renders read from the database the first time the shot is used.
+
+    The database also keeps a project the same way as ProjectJournal and ShardedProjectStore, and takes the same change
+    events, so any of them can keep a project. Each batch of edits is written as one transaction, rewriting only the
+    rows of the shots it touched. Writes are made one at a time on a single writer thread, in the order they were made.
+    """
+
+    def __init__(self, filePath, writeDelay=0.0, minWriteInterval=0.0, maxWriteDelay=5.0):
+        """Open or create the database.
+
+        Arguments:
+            filePath (str): The database file, or ":memory:".
+            writeDelay (float): Kept for the window's autosave settings. Each batch of edits is written as one
+                transaction as soon as it is recorded, so nothing is held.
+            minWriteInterval (float): As writeDelay.
+            maxWriteDelay (float): As writeDelay.
+        """
+        # Only loaded when a database is opened, since the window may never use one
+        import sqlite3
+
+        self.filePath = filePath
+        self.projectDataPath = filePath
+        self.writeDelay = writeDelay
+        self.minWriteInterval = minWriteInterval
+        self.maxWriteDelay = maxWriteDelay
+
+        # Shared by the writer thread and whichever thread loads a shot, one at a time
+        self.connection = sqlite3.connect(filePath, check_same_thread=False)
+        self._lock = threading.RLock()
+        # Started on the first write, so loading a project to read it never starts a thread
+        self._writer = None
+        self.metrics = {"batches": 0, "shotWrites": 0, "writes": 0}
+
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(schema)
+        self._addMissingColumns()
+        self.connection.execute("INSERT OR IGNORE INTO project (id) VALUES (1)")
+        self.connection.commit()
+
+    def close(self):
+        """Wait for any queued writes to finish and close the database."""
+        if self._writer is not None:
+            self._writer.shutdown()
+            self._writer = None
+        with self._lock:
+            self.connection.close()
+
+    def _addMissingColumns(self):
+        """Add columns introduced after a database was created."""
+        renderTableColumns = {row[1] for row in self.connection.execute("PRAGMA table_info(renders)")}
+        if "frames" not in renderTableColumns:
+            self.connection.execute("ALTER TABLE renders ADD COLUMN frames TEXT")
+
+    # IMPORT AND LOAD
+
+    @instrumentation.traced("importProjectDatabase")
+    def importProject(self, project):
+        """Replace the contents of the database with the given project.
+
+        Shots read from this database whose layers and renders haven't been loaded keep their rows, so they can still
+        be loaded once the project has been imported.
+        """
+        with self._lock:
+            keptShots = {}
+            newShots = []
+            for shot in project.shots:
+                content = shot._lazyContent
+                if isinstance(content, DatabaseShotContent) and content.database is self:
+                    if content.shotId not in keptShots:
+                        keptShots[content.shotId] = [getattr(shot, column) for column in shotColumns]
+                        continue
+                # Loads the layers and renders of shots read from elsewhere, before any rows are removed
+                newShots.append(_getShotRows(shot))
+
+            with self.connection:
+                shotIds = [row[0] for row in self.connection.execute("SELECT id FROM shots")]
+                # Layers and renders are removed along with their shots
+                self.connection.executemany(
+                    "DELETE FROM shots WHERE id = ?", ((shotId,) for shotId in shotIds if shotId not in keptShots)
+                )
+                self.connection.executemany(
+                    f"UPDATE shots SET {', '.join(f'{column} = ?' for column in shotColumns)} WHERE id = ?",
+                    (values + [shotId] for shotId, values in keptShots.items()),
+                )
+                self.connection.execute(
+                    "UPDATE project SET name = ?, notes = ? WHERE id = 1", (project.name, project.notes)
+                )
+                for rows in newShots:
+                    self._insertShotRows(*rows)
+
+    def importFromJson(self, filePath):
+        """Replace the contents of the database with the project in the given projectData.json file."""
+        self.importProject(rbTypes.loadProjectFromFile(filePath, lazy=True))
+
+    @instrumentation.traced("loadProjectDatabase")
+    def loadProject(self, lazy=True, progress=None, shotLoaded=None):
+        """Return the project, with the layers and renders of each shot loaded when the shot is first used.
+
+        Arguments:
+            lazy (bool): If False, read the layers and renders of every shot now.
+            progress (callable): Called with (shots read, shot count) as shots are read.
+            shotLoaded (callable): Called with each shot as soon as it is read, in name order.
+        """
+        project = rbTypes.Project()
+        with self._lock:
+            project.name, project.notes = self.connection.execute(
+                "SELECT name, notes FROM project WHERE id = 1"
+            ).fetchone()
+            rows = self.connection.execute(f"SELECT id, {', '.join(shotColumns)} FROM shots ORDER BY name, id")
+            rows = rows.fetchall()
+
+        for i, row in enumerate(rows):
+            shot = _fromRow(rbTypes.Shot, shotColumns, row[1:])
+            shot._setLazyContent(DatabaseShotContent(self, row[0]))
+            if not lazy:
+                shot.loadContent()
+            project.shots.append(shot)
+            if shotLoaded:
+                shotLoaded(shot)
+            if progress:
+                progress(i + 1, len(rows))
+        # Shots passed to shotLoaded may already have been added to another project, so leave them where they are
+        project._rebuildShotIndex(adoptShots=shotLoaded is None)
+        return project
+
+    def loadShotContent(self, shotId):
+        """Return a dict of the layers and renders of the shot with the given id."""
+        with self._lock:
+            return {"layers": self.getLayers(shotId), "renders": self.getRenders(shotId)}
+
+    def exportToJson(self, filePath):
+        """Write the project to a projectData.json file."""
+        self.loadProject().writeToFile(filePath)
+
+    # PROJECT STORE
+
+    def load(self, progress=None):
+        """Load the project, or return an empty project if the database is new.
+
+        Arguments:
+            progress (callable): Called with (shots read, shot count) as shots are read.
+        """
+        return self.loadProject(progress=progress)
+
+    @property
+    def isDirty(self):
+        """Whether there are edits that haven't been written to disk yet. Edits are written as they are recorded."""
+        return False
+
+    @property
+    def autosaves(self):
+        """Whether edits are held and autosaved in the background. Each batch is written as it is recorded instead."""
+        return False
+
+    def getMetrics(self):
+        """Return counts of the batches of edits recorded, the shots written and the transactions written."""
+        with self._lock:
+            return dict(self.metrics)
+
+    def recordEvents(self, events):
+        """Record a batch of change events sent to a project's observers, as one transaction.
+
+        Shots are removed and renamed in the order the events came in. The touched shots are then written as they are
+        once the batch is over, so a shot edited many times in a batch is written once, and only shots whose layers
+        or renders changed have those rewritten.
+        """
+        renames = []
+        addedShots = {}
+        headerShots = {}
+        contentShots = {}
+        projectFields = {}
+        for event in events:
+            kind = event.kind
+            if kind == "projectChanged":
+                if event.field in ("name", "notes"):
+                    projectFields[event.field] = event.newValue
+            elif kind == "shotAdded":
+                addedShots[id(event.target)] = event.target
+            elif kind == "shotRemoved":
+                # Shots added earlier in the batch were never written
+                if addedShots.pop(id(event.target), None) is None:
+                    renames.append((event.targetName, None))
+            elif event.shot is None or id(event.shot) in addedShots:
+                # Shots added in the batch are written whole once it is over
+                continue
+            elif kind == "shotChanged":
+                if event.field == "name":
+                    renames.append((event.oldValue, event.newValue))
+                elif event.field in ("layers", "renders"):
+                    contentShots[id(event.shot)] = event.shot
+                elif event.field in shotColumns:
+                    headerShots[id(event.shot)] = event.shot
+            else:
+                contentShots[id(event.shot)] = event.shot
+
+        # Shots removed later in the batch are left out
+        newShots = [_getShotRows(shot) for shot in addedShots.values() if shot._project is not None]
+        headers = {
+            id(shot): (shot.name, [getattr(shot, column) for column in shotColumns])
+            for shot in headerShots.values() if shot._project is not None
+        }
+        contents = [(shot.name, _getShotRows(shot)) for shot in contentShots.values() if shot._project is not None]
+        if not (renames or newShots or headers or contents or projectFields):
+            return
+
+        future = self._submitWrite(self._writeEdits, renames, newShots, list(headers.values()), contents, projectFields)
+        future.result()
+
+    def flush(self):
+        """Wait for any queued writes to finish."""
+        if self._writer is not None:
+            self._writer.submit(lambda: None).result()
+
+    def _submitWrite(self, fn, *args):
+        """Run a function on the writer thread, after any write already queued. Returns its Future."""
+        if self._writer is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="RenderBoyDatabase")
+        return self._writer.submit(fn, *args)
+
+    @instrumentation.traced("writeDatabaseEdits")
+    def _writeEdits(self, renames, newShots, headers, contents, projectFields):
+        """Write a batch of edits as one transaction."""
+        with self._lock, self.connection:
+            for oldName, newName in renames:
+                shotId = self.getShotId(oldName)
+                if newName is None:
+                    self.connection.execute("DELETE FROM shots WHERE id = ?", (shotId,))
+                else:
+                    self.connection.execute("UPDATE shots SET name = ? WHERE id = ?", (newName, shotId))
+            for rows in newShots:
+                self._insertShotRows(*rows)
+            for shotName, values in headers:
+                self.connection.execute(
+                    f"UPDATE shots SET {', '.join(f'{column} = ?' for column in shotColumns)} WHERE id = ?",
+                    values + [self.getShotId(shotName)],
+                )
+            for shotName, rows in contents:
+                shotId = self.getShotId(shotName)
+                if shotId is None:
+                    self._insertShotRows(*rows)
+                    continue
+                self.connection.execute("DELETE FROM layers WHERE shotId = ?", (shotId,))
+                self.connection.execute("DELETE FROM renders WHERE shotId = ?", (shotId,))
+                self._insertContentRows(shotId, rows[1], rows[2])
+            for field, value in projectFields.items():
+                self.connection.execute(f"UPDATE project SET {field} = ? WHERE id = 1", (value,))
+            self.metrics["batches"] += 1
+            self.metrics["shotWrites"] += len(newShots) + len(contents)
+            self.metrics["writes"] += 1
+
+    def saveSnapshot(self, project, wait=True):
+        """Write the whole project, replacing what is in the database.
+
+        Arguments:
+            project (Project): The project to save.
+            wait (bool): If False, save a copy of the project as it is now on the writer thread, so it can keep being
+                edited while it is written.
+
+        Returns:
+            Future: Finishes once the project has been written.
+        """
+        future = self._submitWrite(self.importProject, project if wait else project.copy())
+        if wait:
+            future.result()
+        return future
+
+    def removeFiles(self):
+        """Remove the database, e.g. once the project has been saved somewhere else. Call close first."""
+        for filePath in (self.filePath, self.filePath + "-wal", self.filePath + "-shm"):
+            if os.path.isfile(filePath):
+                os.remove(filePath)
+
+    # SHOTS
+
+    def _insertShot(self, shot):
+        """Insert a shot and everything under it, returning its id."""
+        return self._insertShotRows(*_getShotRows(shot))
+
+    def _insertShotRows(self, shotValues, layerRows, renderRows):
+        """Insert a shot and its layers and renders from their column values, returning its id."""
+        cursor = self.connection.execute(
+            f"INSERT INTO shots ({', '.join(shotColumns)}) VALUES ({', '.join('?' * len(shotColumns))})", shotValues
+        )
+        shotId = cursor.lastrowid
+        self._insertContentRows(shotId, layerRows, renderRows)
+        return shotId
+
+    def _insertContentRows(self, shotId, layerRows, renderRows):
+        """Insert the layers and renders of a shot from their column values, in order."""
+        self.connection.executemany(
+            f"INSERT INTO layers (shotId, position, {', '.join(layerColumns)}) "
+            f"VALUES (?, ?, {', '.join('?' * len(layerColumns))})",
+            ([shotId, position] + values for position, values in enumerate(layerRows)),
+        )
+        self.connection.executemany(
+            f"INSERT INTO renders (shotId, position, {', '.join(renderColumns)}) "
+            f"VALUES (?, ?, {', '.join('?' * len(renderColumns))})",
+            ([shotId, position] + values for position, values in enumerate(renderRows)),
+        )
+
+    def getShotId(self, shotName):
+        """Return the id of the shot with the given name, or None."""
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT id FROM shots WHERE name = ? ORDER BY id LIMIT 1", (shotName,)
+            ).fetchone()
+            return row[0] if row else None
+
+    def getShot(self, shotName):
+        """Return the shot with the given name, with its layers and renders, or None."""
+        with self._lock:
+            shotId = self.getShotId(shotName)
+            if shotId is None:
+                print(f"WARNING: Shot {shotName} not found.")
+                return None
+
+            row = self.connection.execute(
+                f"SELECT {', '.join(shotColumns)} FROM shots WHERE id = ?", (shotId,)
+            ).fetchone()
+            shot = _fromRow(rbTypes.Shot, shotColumns, row)
+            shot.layers = self.getLayers(shotId)
+            shot.renders = self.getRenders(shotId)
+            return shot
+
+    def addShot(self, shot):
+        """Add a shot and everything under it."""
+        with self._lock, self.connection:
+            self._insertShot(shot)
+
+    def removeShot(self, shotName):
+        """Remove the shot with the given name and everything under it."""
+        with self._lock, self.connection:
+            cursor = self.connection.execute("DELETE FROM shots WHERE id = ?", (self.getShotId(shotName),))
+        return cursor.rowcount > 0
+
+    def setShotField(self, shotName, field, value):
+        """Set one field of a shot."""
+        if field not in shotColumns:
+            raise ValueError(f"Unknown shot field {field}")
+        with self._lock, self.connection:
+            self.connection.execute(f"UPDATE shots SET {field} = ? WHERE id = ?", (value, self.getShotId(shotName)))
+
+    # LAYERS
+
+    def getLayers(self, shotId):
+        """Return the layers of the shot with the given id, in order."""
+        with self._lock:
+            rows = self.connection.execute(
+                f"SELECT {', '.join(layerColumns)} FROM layers WHERE shotId = ? ORDER BY position", (shotId,)
+            )
+            return [_fromRow(rbTypes.Layer, layerColumns, row) for row in rows]
+
+    def _getLayerId(self, shotName, layerName):
+        """Return the id of the first layer with the given name in the given shot, or None."""
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT layers.id FROM layers JOIN shots ON shots.id = layers.shotId "
+                "WHERE shots.name = ? AND layers.name = ? ORDER BY layers.position LIMIT 1",
+                (shotName, layerName),
+            ).fetchone()
+            return row[0] if row else None
+
+    def getLayer(self, shotName, layerName):
+        """Return the layer with the given name in the given shot, or None."""
+        with self._lock:
+            layerId = self._getLayerId(shotName, layerName)
+            if layerId is None:
+                print(f"WARNING: Layer {layerName} not found.")
+                return None
+
+            row = self.connection.execute(f"SELECT {', '.join(layerColumns)} FROM layers WHERE id = ?", (layerId,))
+            return _fromRow(rbTypes.Layer, layerColumns, row.fetchone())
+
+    def addLayer(self, shotName, layer):
+        """Add a layer to the end of the given shot."""
+        with self._lock, self.connection:
+            shotId = self.getShotId(shotName)
+            self.connection.execute(
+                f"INSERT INTO layers (shotId, position, {', '.join(layerColumns)}) "
+                f"VALUES (?, (SELECT COALESCE(MAX(position), -1) + 1 FROM layers WHERE shotId = ?), "
+                f"{', '.join('?' * len(layerColumns))})",
+                [shotId, shotId] + [_toColumn(column, getattr(layer, column)) for column in layerColumns],
+            )
+
+    def removeLayer(self, shotName, layerName):
+        """Remove the layer with the given name from the given shot."""
+        with self._lock, self.connection:
+            cursor = self.connection.execute(
+                "DELETE FROM layers WHERE id = ?", (self._getLayerId(shotName, layerName),)
+            )
+        return cursor.rowcount > 0
+
+    def setLayerField(self, shotName, layerName, field, value):
+        """Set one field of a layer. Setting the name renames the layer."""
+        if field not in layerColumns:
+            raise ValueError(f"Unknown layer field {field}")
+        with self._lock, self.connection:
+            self.connection.execute(
+                f"UPDATE layers SET {field} = ? WHERE id = ?",
+                (_toColumn(field, value), self._getLayerId(shotName, layerName)),
+            )
+
+    # RENDERS
+
+    def getRenders(self, shotId):
+        """Return the renders of the shot with the given id, in order."""
+        with self._lock:
+            rows = self.connection.execute(
+                f"SELECT {', '.join(renderColumns)} FROM renders WHERE shotId = ? ORDER BY position", (shotId,)
+            )
+            return [_fromRow(rbTypes.Render, renderColumns, row) for row in rows]
+
+    def addRender(self, shotName, render):
+        """Add a render to the end of the given shot."""
+        with self._lock, self.connection:
+            shotId = self.getShotId(shotName)
+            self.connection.execute(
+                f"INSERT INTO renders (shotId, position, {', '.join(renderColumns)}) "
+                f"VALUES (?, (SELECT COALESCE(MAX(position), -1) + 1 FROM renders WHERE shotId = ?), "
+                f"{', '.join('?' * len(renderColumns))})",
+                [shotId, shotId] + [_toColumn(column, getattr(render, column)) for column in renderColumns],
+            )
+
+    def setRenderField(self, shotName, renderName, field, value):
+        """Set one field of the first render with the given name in the given shot."""
+        if field not in renderColumns:
+            raise ValueError(f"Unknown render field {field}")
+        with self._lock, self.connection:
+            self.connection.execute(
+                f"UPDATE renders SET {field} = ? WHERE id = ("
+                "SELECT renders.id FROM renders JOIN shots ON shots.id = renders.shotId "
+                "WHERE shots.name = ? AND renders.name = ? ORDER BY renders.position LIMIT 1)",
+                (_toColumn(field, value), shotName, renderName),
+            )
+
+    # SEARCH
+
+    def findShots(self, text):
+        """Return the names of shots whose name starts with the given text."""
+        with self._lock:
+            # Ranges on the indexed column are used instead of LIKE, which can't use the index when case sensitive
+            rows = self.connection.execute(
+                "SELECT name FROM shots WHERE name >= ? AND name < ? ORDER BY name", (text, text + "\U0010ffff")
+            )
+            return [row[0] for row in rows]
+
+    def findShotsInFrameRange(self, frameStart, frameEnd):
+        """Return the names of shots that overlap the given frame range."""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT name FROM shots WHERE frameStart <= ? AND frameEnd >= ? ORDER BY name", (frameEnd, frameStart)
+            )
+            return [row[0] for row in rows]
+
+    def findLayers(self, layerName):
+        """Return (shot name, layer name) pairs for every layer with the given name."""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT shots.name, layers.name FROM layers JOIN shots ON shots.id = layers.shotId "
+                "WHERE layers.name = ? ORDER BY shots.name",
+                (layerName,),
+            )
+            return rows.fetchall()
+
+    def findRendersByAuthor(self, author):
+        """Return (shot name, render name) pairs for every render by the given author."""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT shots.name, renders.name FROM renders JOIN shots ON shots.id = renders.shotId "
+                "WHERE renders.author = ? ORDER BY shots.name, renders.position",
+                (author,),
+            )
+            return rows.fetchall()
+
+    def findRendersInFrameRange(self, frameStart, frameEnd):
+        """Return (shot name, render name) pairs for every render that overlaps the given frame range."""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT shots.name, renders.name FROM renders JOIN shots ON shots.id = renders.shotId "
+                "WHERE renders.frameStart <= ? AND renders.frameEnd >= ? ORDER BY shots.name, renders.position",
+                (frameEnd, frameStart),
+            )
+            return rows.fetchall()
@@ -0,0 +1,595 @@
+"""Journaled saving of a project, so small edits don't rewrite the whole project file."""
+
+
+import json
+import os
+import threading
+import time
+
+import renderboy.data.renderTypes as rbTypes
+from renderboy.data import instrumentation
+from renderboy.data.projectStream import readLeadingValue
+
+
+# Key written at the start of a snapshot recording the last journal record it includes
+sequenceKey = "journalSequence"
+
+# The keys of each kind of record, besides "op" and "seq"
+recordFields = {
+    "setProject": ("field", "value"),
+    "addShot": ("value",),
+    "removeShot": ("shot",),
+    "setShot": ("shot", "field", "value"),
+    "addLayer": ("shot", "value"),
+    "removeLayer": ("shot", "layer"),
+    "setLayer": ("shot", "layer", "field", "value"),
+    "addRender": ("shot", "value"),
+    "removeRender": ("shot", "render"),
+    "setRender": ("shot", "render", "field", "value"),
+}
+
+# addLayer, addRender and removeRender records may also hold the index of the layer or render in its list
+
+# Records that only set a value, so a later record setting the same value makes them redundant
+_setOps = ("setProject", "setShot", "setLayer", "setRender")
+
+
+def _findRender(shot, renderName, index=None):
+    """Return the render in the shot with the given name, or None.
+
+    Arguments:
+        shot (Shot): The shot to look in.
+        renderName (str): The name of the render.
+        index (int): Where the render is expected to be. If another render is there, the first render with the name
+            is returned.
+    """
+    if index is not None and 0 <= index < len(shot.renders) and shot.renders[index].name == renderName:
+        return shot.renders[index]
+    for render in shot.renders:
+        if render.name == renderName:
+            return render
+    return None
+
+
+def _clampIndex(index, items):
+    """Return the index to insert at, within the given list, or None for the end."""
+    if index is None or index >= len(items):
+        return None
+    return max(index, 0)
+
+
+def applyRecord(project, record):
+    """Apply a journal record to the project.
+
+    Records for shots, layers or renders that no longer exist are ignored.
+
+    Arguments:
+        project (Project): The project to change.
+        record (dict): The record to apply.
+
+    Returns:
+        bool: Whether the record was applied, rather than ignored.
+    """
+    op = record["op"]
+    if op == "setProject":
+        project.setField(record["field"], record["value"])
+        return True
+    if op == "addShot":
+        project.addShot(record["value"])
+        return True
+    if op == "removeShot":
+        if record["shot"] not in project._shotIndex:
+            return False
+        return project.removeShot(record["shot"])
+
+    shot = project._shotIndex.get(record["shot"])
+    if shot is None:
+        return False
+
+    if op == "setShot":
+        shot.loadContent()
+        shot.setField(record["field"], record["value"])
+    elif op == "addLayer":
+        shot.loadContent()
+        shot.addLayer(record["value"], _clampIndex(record.get("index"), shot.layers))
+    elif op == "removeLayer":
+        shot.loadContent()
+        if record["layer"] not in shot._layerIndex:
+            return False
+        shot.removeLayer(record["layer"])
+    elif op == "setLayer":
+        shot.loadContent()
+        layer = shot._layerIndex.get(record["layer"])
+        if layer is None:
+            return False
+        layer.setField(record["field"], record["value"])
+    elif op == "addRender":
+        shot.addRender(record["value"], _clampIndex(record.get("index"), shot.renders))
+    elif op == "removeRender":
+        render = _findRender(shot, record["render"], record.get("index"))
+        if render is None:
+            return False
+        shot.removeRender(render)
+    elif op == "setRender":
+        render = _findRender(shot, record["render"])
+        if render is None:
+            return False
+        render.setField(record["field"], record["value"])
+    else:
+        print(f"WARNING: Unknown journal record {op}.")
+        return False
+    return True
+
+
+def readRecords(journalPath):
+    """Yield the records in a journal file, stopping at a partly written last line."""
+    if not os.path.isfile(journalPath):
+        return
+
+    with open(journalPath, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                # The last write was interrupted
+                return
+            yield json.loads(line, object_hook=rbTypes.loadRenderBoyObject)
+
+
+def _getCoalesceKey(record):
+    """Return what a record sets, e.g. ("setLayer", shot, layer, "notes"), or None if it does more than set a value."""
+    op = record["op"]
+    if op not in _setOps or (op == "setLayer" and record["field"] == "name"):
+        return None
+    return op, record.get("shot"), record.get("layer", record.get("render")), record["field"]
+
+
+def _coalesceRecords(previous, record):
+    """Return one record with the effect of two consecutive records, or None if they can't be combined.
+
+    Setting the same value twice keeps only the second. Renaming a layer and then renaming it again, e.g. as a name
+    is typed one letter at a time, becomes a single rename from the first name to the last.
+    """
+    key = _getCoalesceKey(record)
+    if key is not None:
+        return record if key == _getCoalesceKey(previous) else None
+
+    if (record["op"] == "setLayer" and previous["op"] == "setLayer" and previous["field"] == "name"
+            and record["field"] == "name" and record["shot"] == previous["shot"]
+            and record["layer"] == previous["value"]):
+        return {**record, "layer": previous["layer"]}
+    return None
+
+
+def _appendFile(sourcePath, destinationPath):
+    """Append the contents of one file to another."""
+    with open(sourcePath, "rb") as source, open(destinationPath, "ab") as destination:
+        destination.write(source.read())
+
+
+class ProjectJournal:
+    """Save a project as a snapshot plus a journal of the edits made since.
+
+    Each edit is appended to projectData.journal as one short json line. Once the journal grows past a threshold it
+    is compacted on a background thread: the journal is set aside, replayed onto the snapshot read fresh from disk,
+    and the result atomically replaces the snapshot. The live project is never touched by the background thread.
+
+    Compactions and snapshot saves are written one at a time, in the order they were asked for, by a single writer
+    thread, so a newer snapshot is never replaced by an older one.
+
+    Records can also be held in memory and autosaved in the background, so that a burst of edits, such as typing into
+    the notes of a layer, is written once. An edit that only sets a value replaces an unwritten record setting the same
+    value, and the held records are written together once no edit has come in for writeDelay seconds, or once the
+    oldest has waited maxWriteDelay seconds, but no sooner than minWriteInterval seconds after the last write.
+    """
+
+    def __init__(self, projectDataPath, compactThreshold=1 << 20, writeDelay=0.0, minWriteInterval=0.0,
+                 maxWriteDelay=5.0):
+        """Initialize the journal.
+
+        Arguments:
+            projectDataPath (str): The path of the project snapshot, e.g. projectData.json.
+            compactThreshold (int): The journal size in bytes that triggers a compaction.
+            writeDelay (float): The seconds to wait for more edits before autosaving. If this and minWriteInterval are
+                both 0, each record is written as soon as it is made.
+            minWriteInterval (float): The fewest seconds between autosaves.
+            maxWriteDelay (float): The most seconds a record is held while edits keep coming in.
+        """
+        self.projectDataPath = projectDataPath
+        self.journalPath = os.path.splitext(projectDataPath)[0] + ".journal"
+        self.compactingPath = self.journalPath + ".compacting"
+        self.compactThreshold = compactThreshold
+        self.sequence = 0
+
+        self._journalFile = None
+        # Started on the first compaction or save, so loading a project to read it never starts a thread
+        self._writer = None
+        self._compaction = None
+        self._pendingSaves = 0
+        self._lock = threading.Lock()
+
+        self.writeDelay = writeDelay
+        self.minWriteInterval = minWriteInterval
+        self.maxWriteDelay = maxWriteDelay
+        # Records not written yet, as (record, json line)
+        self._unwritten = []
+        self._firstEditTime = 0.0
+        self._lastEditTime = 0.0
+        self._lastWriteTime = 0.0
+        self._autosaveThread = None
+        self._autosaveWake = threading.Condition(self._lock)
+        self._closing = False
+        self.metrics = {"records": 0, "coalesced": 0, "writes": 0, "emptyAutosaves": 0, "bytesWritten": 0}
+
+    @instrumentation.traced("loadJournaledProject")
+    def load(self, progress=None):
+        """Load the project from the snapshot and replay the journal onto it.
+
+        Arguments:
+            progress (callable): Called with (bytes read, file size) as the snapshot is read.
+
+        Returns:
+            Project: The loaded project.
+        """
+        if os.path.isfile(self.projectDataPath):
+            project = rbTypes.loadProjectFromFile(self.projectDataPath, lazy=True, progress=progress)
+            snapshotSequence = readLeadingValue(self.projectDataPath, sequenceKey, 0)
+        else:
+            project = rbTypes.Project()
+            snapshotSequence = 0
+
+        self.sequence = snapshotSequence
+        for journalPath in (self.compactingPath, self.journalPath):
+            for record in readRecords(journalPath):
+                if record["seq"] > snapshotSequence:
+                    applyRecord(project, record)
+                    self.sequence = max(self.sequence, record["seq"])
+
+        # Shots added since the snapshot are appended in the order they were added, e.g. as a scan found them
+        project.shots.sort(key=lambda shot: shot.name)
+        return project
+
+    @property
+    def isDirty(self):
+        """Whether there are edits that haven't been written to disk yet."""
+        return bool(self._unwritten)
+
+    @property
+    def autosaves(self):
+        """Whether records are held and autosaved in the background rather than written as they are made."""
+        return self.writeDelay > 0 or self.minWriteInterval > 0
+
+    def getMetrics(self):
+        """Return counts of the records made and the writes they took.
+
+        Returns:
+            dict: "records" made, records "coalesced" into a later one, "writes" to the journal, "skippedWrites" saved
+            by holding records back, autosaves that found nothing to write ("emptyAutosaves") and "bytesWritten".
+        """
+        with self._lock:
+            metrics = dict(self.metrics)
+        metrics["skippedWrites"] = metrics["records"] - metrics["writes"]
+        return metrics
+
+    def record(self, op, **fields):
+        """Append a record of an edit to the journal.
+
+        Arguments:
+            op (str): The kind of edit, e.g. "setLayer".
+            **fields: The details of the edit.
+        """
+        # Values are serialized now, as the objects they come from may keep changing
+        self.sequence += 1
+        record = {"seq": self.sequence, "op": op, **fields}
+        line = json.dumps(record, default=rbTypes.serializeRenderBoyObject, separators=(",", ":")) + "\n"
+
+        with self._lock:
+            self.metrics["records"] += 1
+            wasClean = not self._unwritten
+            if self._unwritten:
+                coalesced = _coalesceRecords(self._unwritten[-1][0], record)
+                if coalesced is not None:
+                    if coalesced is not record:
+                        line = json.dumps(coalesced, separators=(",", ":")) + "\n"
+                    self._unwritten[-1] = (coalesced, line)
+                    self.metrics["coalesced"] += 1
+                else:
+                    self._unwritten.append((record, line))
+            else:
+                self._unwritten.append((record, line))
+
+            if self.autosaves:
+                self._lastEditTime = time.monotonic()
+                if wasClean:
+                    self._firstEditTime = self._lastEditTime
+                self._startAutosave()
+                self._autosaveWake.notify()
+                return
+            journalSize = self._writeUnwritten()
+
+        if journalSize >= self.compactThreshold:
+            self.compact()
+
+    def flush(self):
+        """Write any held records to the journal now."""
+        with self._lock:
+            journalSize = self._writeUnwritten()
+        if journalSize >= self.compactThreshold:
+            self.compact()
+
+    def _writeUnwritten(self):
+        """Write the held records to the journal. Must be called with the lock held.
+
+        Returns:
+            int: The size of the journal afterwards.
+        """
+        if not self._unwritten:
+            return self._journalFile.tell() if self._journalFile is not None else 0
+
+        data = "".join(line for _, line in self._unwritten)
+        instrumentation.count("journalRecordsWritten", len(self._unwritten))
+        self._unwritten = []
+        if self._journalFile is None:
+            self._journalFile = open(self.journalPath, "a", encoding="utf-8")
+        self._journalFile.write(data)
+        self._journalFile.flush()
+        self._lastWriteTime = time.monotonic()
+        self.metrics["writes"] += 1
+        self.metrics["bytesWritten"] += len(data)
+        return self._journalFile.tell()
+
+    def _startAutosave(self):
+        """Start the autosave thread if it isn't running. Must be called with the lock held."""
+        if self._autosaveThread is None and not self._closing:
+            self._autosaveThread = threading.Thread(target=self._autosave, name="RenderBoyAutosave", daemon=True)
+            self._autosaveThread.start()
+
+    def _autosave(self):
+        """Write held records once edits pause, no more often than the minimum interval."""
+        while True:
+            with self._lock:
+                while not self._unwritten and not self._closing:
+                    self._autosaveWake.wait()
+                if self._closing:
+                    return
+
+                dueTime = max(
+                    min(self._lastEditTime + self.writeDelay, self._firstEditTime + self.maxWriteDelay),
+                    self._lastWriteTime + self.minWriteInterval,
+                )
+                waitTime = dueTime - time.monotonic()
+                if waitTime > 0:
+                    self._autosaveWake.wait(waitTime)
+                    continue
+
+                if not self._unwritten:
+                    self.metrics["emptyAutosaves"] += 1
+                    continue
+                journalSize = self._writeUnwritten()
+
+            if journalSize >= self.compactThreshold:
+                self.compact()
+
+    def recordProjectChanged(self, field, value):
+        """Record that a field of the project was set."""
+        self.record("setProject", field=field, value=value)
+
+    def recordShotAdded(self, shot):
+        """Record that a shot was added to the project."""
+        self.record("addShot", value=shot)
+
+    def recordShotChanged(self, shot, field, value):
+        """Record that a field of a shot was set."""
+        self.record("setShot", shot=shot.name, field=field, value=value)
+
+    def recordShotScanned(self, shot):
+        """Record the fields of a shot that are updated by rescanning it from disk."""
+        for field in ("frameStart", "frameEnd", "layers", "renders"):
+            self.recordShotChanged(shot, field, getattr(shot, field))
+
+    def recordLayerAdded(self, shot, layer):
+        """Record that a layer was added to a shot."""
+        self.record("addLayer", shot=shot.name, value=layer)
+
+    def recordLayerRemoved(self, shot, layerName):
+        """Record that a layer was removed from a shot."""
+        self.record("removeLayer", shot=shot.name, layer=layerName)
+
+    def recordLayerRenamed(self, shot, oldName, newName):
+        """Record that a layer was renamed."""
+        self.record("setLayer", shot=shot.name, layer=oldName, field="name", value=newName)
+
+    def recordLayerChanged(self, shot, layer, field):
+        """Record that a field of a layer was set."""
+        self.record("setLayer", shot=shot.name, layer=layer.name, field=field, value=getattr(layer, field))
+
+    def recordRenderAdded(self, shot, render):
+        """Record that a render was added to a shot."""
+        self.record("addRender", shot=shot.name, value=render)
+
+    def recordRenderChanged(self, shot, render, field):
+        """Record that a field of a render was set."""
+        self.record("setRender", shot=shot.name, render=render.name, field=field, value=getattr(render, field))
+
+    def recordEvents(self, events):
+        """Record a batch of change events sent to a project's observers.
+
+        The names of shots, layers and renders are the ones they had when each event was sent, so the records replay
+        in order even if something was renamed later in the batch.
+        """
+        for event in events:
+            kind = event.kind
+            # A shot or render is looked up by the name it had before the change
+            shotName = event.oldValue if kind == "shotChanged" and event.field == "name" else event.shotName
+            renderName = event.oldValue if kind == "renderChanged" and event.field == "name" else event.targetName
+            if kind == "projectChanged":
+                self.record("setProject", field=event.field, value=event.newValue)
+            elif kind == "shotAdded":
+                self.record("addShot", value=event.target)
+            elif kind == "shotRemoved":
+                self.record("removeShot", shot=event.targetName)
+            elif kind == "shotChanged":
+                self.record("setShot", shot=shotName, field=event.field, value=event.newValue)
+            elif kind == "layerAdded":
+                self.record("addLayer", shot=event.shotName, value=event.target, index=event.index)
+            elif kind == "layerRemoved":
+                self.record("removeLayer", shot=event.shotName, layer=event.targetName)
+            elif kind == "layerRenamed":
+                self.record("setLayer", shot=event.shotName, layer=event.oldValue, field="name", value=event.newValue)
+            elif kind == "layerChanged":
+                self.record("setLayer", shot=event.shotName, layer=event.targetName, field=event.field,
+                            value=event.newValue)
+            elif kind == "layerListChanged":
+                # Lists are changed in place, so the whole list is recorded as it is now
+                self.record("setLayer", shot=event.shotName, layer=event.targetName, field=event.field,
+                            value=list(getattr(event.target, event.field)))
+            elif kind == "renderAdded":
+                self.record("addRender", shot=event.shotName, value=event.target, index=event.index)
+            elif kind == "renderRemoved":
+                self.record("removeRender", shot=event.shotName, render=event.targetName, index=event.index)
+            elif kind == "renderChanged":
+                self.record("setRender", shot=event.shotName, render=renderName, field=event.field,
+                            value=event.newValue)
+
+    def _closeJournalFile(self):
+        """Close the journal file so it can be moved. Must be called with the lock held."""
+        if self._journalFile is not None:
+            self._journalFile.close()
+            self._journalFile = None
+
+    def _setJournalAside(self):
+        """Move the journal onto the end of the compacting journal. Must be called with the lock held."""
+        self._writeUnwritten()
+        self._closeJournalFile()
+        if not os.path.isfile(self.journalPath):
+            return
+        if os.path.isfile(self.compactingPath):
+            # A previous compaction or save hasn't finished with it yet, so fold this journal in with it
+            _appendFile(self.journalPath, self.compactingPath)
+            os.remove(self.journalPath)
+        else:
+            os.replace(self.journalPath, self.compactingPath)
+
+    def _submitWrite(self, fn, *args):
+        """Run a function on the writer thread, after any compaction or save already queued. Returns its Future."""
+        if self._writer is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="RenderBoyJournal")
+        return self._writer.submit(fn, *args)
+
+    def _isCompactionQueued(self):
+        """Return whether a compaction is waiting to be or being written. Must be called with the lock held."""
+        return self._compaction is not None and not self._compaction.done()
+
+    def compact(self, wait=False):
+        """Fold the journal into a new snapshot on the writer thread.
+
+        Arguments:
+            wait (bool): If True, block until the compaction has finished.
+        """
+        with self._lock:
+            future = self._compaction
+            if not self._isCompactionQueued():
+                self._setJournalAside()
+                if not os.path.isfile(self.compactingPath):
+                    return
+                future = self._submitWrite(self._compactFiles)
+                self._compaction = future
+
+        if wait:
+            future.result()
+
+    @instrumentation.traced("compactJournal")
+    def _compactFiles(self):
+        """Replay the set aside journal onto the snapshot on disk and swap in the result."""
+        if os.path.isfile(self.projectDataPath):
+            project = rbTypes.loadProjectFromFile(self.projectDataPath)
+            snapshotSequence = readLeadingValue(self.projectDataPath, sequenceKey, 0)
+        else:
+            project = rbTypes.Project()
+            snapshotSequence = 0
+
+        sequence = snapshotSequence
+        for record in readRecords(self.compactingPath):
+            if record["seq"] > snapshotSequence:
+                applyRecord(project, record)
+                sequence = max(sequence, record["seq"])
+
+        self._writeSnapshot(project, sequence)
+        with self._lock:
+            os.remove(self.compactingPath)
+            self._compaction = None
+
+    @instrumentation.traced("writeSnapshot")
+    def _writeSnapshot(self, project, sequence):
+        """Atomically replace the snapshot with the given project."""
+        data = {sequenceKey: sequence, **project.toDict()}
+        rbTypes.writeJsonAtomically(self.projectDataPath, data, default=rbTypes.serializeRenderBoyObject, indent=4)
+
+    def saveSnapshot(self, project, wait=True):
+        """Write the whole project as a new snapshot and discard the journal.
+
+        Use this when the project has been replaced wholesale, e.g. after creating shots from a directory.
+
+        Arguments:
+            project (Project): The project to save.
+            wait (bool): If False, save a copy of the project as it is now on the writer thread, so it can keep being
+                edited while it is written.
+
+        Returns:
+            Future: Finishes once the snapshot has been written.
+        """
+        snapshot = project if wait else project.copy()
+        with self._lock:
+            # Every record so far is in the copy, so the journal can be dropped once it is written. A compaction that
+            # is already queued still needs the records it set aside, and records left in the journal that are older
+            # than the snapshot are skipped when it is replayed.
+            if not self._isCompactionQueued():
+                self._setJournalAside()
+            self._pendingSaves += 1
+            future = self._submitWrite(self._saveSnapshot, snapshot, self.sequence)
+
+        if wait:
+            future.result()
+        return future
+
+    def _saveSnapshot(self, project, sequence):
+        """Write a snapshot of the project, and drop the journal records it includes.
+
+        If the snapshot can't be written, the set aside records are kept so they are replayed on the next load, and the
+        error is raised through the returned Future.
+        """
+        try:
+            self._writeSnapshot(project, sequence)
+        except BaseException:
+            with self._lock:
+                self._pendingSaves -= 1
+            raise
+
+        with self._lock:
+            self._pendingSaves -= 1
+            # A compaction or save queued since may have set aside newer records that this snapshot doesn't have
+            if not self._pendingSaves and not self._isCompactionQueued() and os.path.isfile(self.compactingPath):
+                os.remove(self.compactingPath)
+
+    def removeFiles(self):
+        """Remove the snapshot and journal, e.g. once the project has been saved somewhere else. Call close first."""
+        for filePath in (self.projectDataPath, self.journalPath, self.compactingPath):
+            if os.path.isfile(filePath):
+                os.remove(filePath)
+
+    def close(self):
+        """Write any held records, wait for any compaction or save to finish and close the journal file."""
+        with self._lock:
+            self._closing = True
+            self._autosaveWake.notify()
+            autosaveThread = self._autosaveThread
+        if autosaveThread is not None:
+            autosaveThread.join()
+        self.flush()
+
+        if self._writer is not None:
+            self._writer.submit(lambda: None).result()
+        with self._lock:
+            self._closeJournalFile()
+            self._autosaveThread = None
+            self._closing = False
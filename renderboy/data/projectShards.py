@@ -0,0 +1,611 @@
+"""Sharded saving of a project: a small manifest of the shots plus one file per shot holding its layers and renders.
+
+Opening a project only reads the manifest, and each shot's file is read the first time the shot is used, e.g. when it
+is selected in the sidebar. An edit only rewrites the files of the shots it touched, and the manifest only when a
+shot's name, notes or frame range changed or a shot was added or removed. Several people can save different shots of
+the same project at once, since each writes its own shot files, and manifest changes are merged into the manifest on
+disk under a lock file rather than replacing it.
+
+Layout::
+
+    projectShards/
+        manifest.json
+        shots/
+            sh010-1a2b3c4d.json
+"""
+
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import renderboy.data.renderTypes as rbTypes
+from renderboy.data import instrumentation
+from renderboy.data.projectStream import ProjectFileChangedError, lazyShotKeys, readLeadingValue
+
+
+manifestFileName = "manifest.json"
+shardFolderName = "shots"
+# The folder a sharded project is kept in, in the window's user folder
+defaultShardedProjectFolderName = "projectShards"
+
+# Key written first in a manifest, holding the version of the layout
+formatKey = "shardFormat"
+formatVersion = 1
+
+# How long to wait for another process to finish writing the manifest, and how old a lock file must be to be stale
+_lockTimeout = 10.0
+_staleLockAge = 30.0
+
+_unsafeCharacterPattern = re.compile(r"[^\w.-]")
+
+
+def getShardFileName(shotName):
+    """Return the name of the file holding a shot's layers and renders.
+
+    The name is readable, but made safe for any file system, and ends in a hash of the shot name so that names that
+    only differ in unsafe characters or case still get their own files.
+    """
+    digest = hashlib.sha1(shotName.encode("utf-8")).hexdigest()[:8]
+    return f"{_unsafeCharacterPattern.sub('_', shotName)[:64]}-{digest}.json"
+
+
+def getManifestPath(path):
+    """Return the manifest of the sharded project at a path, which may be its folder, even one not made yet, or its
+    manifest.
+    """
+    if os.path.isfile(path) or os.path.basename(path) == manifestFileName:
+        return path
+    return os.path.join(path, manifestFileName)
+
+
+def isShardedProject(path):
+    """Return whether a path is the folder or the manifest of a sharded project."""
+    manifestPath = getManifestPath(path)
+    if not os.path.isfile(manifestPath):
+        return False
+    try:
+        return readLeadingValue(manifestPath, formatKey) is not None
+    except ValueError:
+        # Not json
+        return False
+
+
+def _getHeader(shot):
+    """Return a dict of the fields of a shot that are kept in the manifest."""
+    header = {"objectType": shot.objectType}
+    for key in type(shot).getLoadableFields():
+        if key not in lazyShotKeys:
+            header[key] = getattr(shot, key)
+    return header
+
+
+def _getProjectFields(project):
+    """Return a dict of the fields of a project that are kept in the manifest."""
+    return {key: getattr(project, key) for key in type(project).getLoadableFields() if key != "shots"}
+
+
+def _dumps(value):
+    return json.dumps(value, default=rbTypes.serializeRenderBoyObject, separators=(",", ":"))
+
+
+def _dumpShard(shot):
+    """Return the json text of a shot's file. Layers and renders that haven't been loaded are copied, not loaded."""
+    content = shot._lazyContent
+    if content is not None:
+        return _dumps({key: value for key, value in content.load().items() if key in lazyShotKeys})
+    return _dumps({key: getattr(shot, key) for key in lazyShotKeys})
+
+
+class ShardContent:
+    """The layers and renders of a shot that are still in its shot file, loaded the first time the shot is touched."""
+
+    __slots__ = ("filePath",)
+
+    def __init__(self, filePath):
+        self.filePath = filePath
+
+    def load(self):
+        """Return a dict of each lazy key and its loaded value."""
+        try:
+            with open(self.filePath, "r", encoding="utf-8") as f:
+                return json.load(f, object_hook=rbTypes.loadRenderBoyObject)
+        except FileNotFoundError:
+            raise ProjectFileChangedError(f"The shot file {self.filePath} no longer exists.") from None
+
+
+def _readManifest(manifestPath):
+    """Return the manifest as a dict of the project fields and a dict of shot name to shot header, or None."""
+    if not os.path.isfile(manifestPath):
+        return None
+    with open(manifestPath, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    shots = {header.get("name"): header for header in manifest.pop("shots", [])}
+    manifest.pop(formatKey, None)
+    return manifest, shots
+
+
+def _dumpManifest(projectFields, shotHeaders):
+    """Return the json text of a manifest, with the shots in name order.
+
+    Arguments:
+        projectFields (dict): The project fields.
+        shotHeaders (dict): Shot name to the json text of its header.
+    """
+    lines = [f"{{{json.dumps(formatKey)}:{formatVersion}"]
+    for key, value in projectFields.items():
+        lines.append(f",{json.dumps(key)}:{_dumps(value)}")
+    lines.append(',"shots":[\n')
+    lines.append(",\n".join(shotHeaders[name] for name in sorted(shotHeaders)))
+    lines.append("\n]}\n")
+    return "".join(lines)
+
+
+@contextmanager
+def _lockFile(lockPath):
+    """Hold a lock file, so only one process at a time merges its changes into the manifest.
+
+    A lock file left behind by a process that died is taken over once it is old enough.
+    """
+    deadline = time.monotonic() + _lockTimeout
+    while True:
+        try:
+            fd = os.open(lockPath, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lockPath) > _staleLockAge:
+                    os.remove(lockPath)
+                    continue
+            except OSError:
+                # Released in the meantime
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for {lockPath} to be released.")
+            time.sleep(0.05)
+    try:
+        os.write(fd, str(os.getpid()).encode("ascii"))
+        os.close(fd)
+        yield
+    finally:
+        os.remove(lockPath)
+
+
+@instrumentation.traced("loadShardedProject")
+def loadShardedProject(path, lazy=True, progress=None, shotLoaded=None):
+    """Load a sharded project, leaving each shot's layers and renders in its shot file until it is first used.
+
+    Arguments:
+        path (str): The folder or the manifest of the project.
+        lazy (bool): If False, read every shot file now.
+        progress (callable): Called with (shots read, shot count) as shots are read.
+        shotLoaded (callable): Called with each shot as soon as it is read, in name order.
+
+    Returns:
+        Project: The loaded project.
+    """
+    manifestPath = getManifestPath(path)
+    shardFolder = os.path.join(os.path.dirname(os.path.abspath(manifestPath)), shardFolderName)
+    with open(manifestPath, "r", encoding="utf-8") as f:
+        manifest = json.load(f, object_hook=rbTypes.loadRenderBoyObject)
+
+    project = rbTypes.Project()
+    fields = rbTypes.Project.getLoadableFields()
+    for key, value in manifest.items():
+        if key in fields and key != "shots":
+            setattr(project, key, value)
+
+    shots = manifest.get("shots", [])
+    for i, shot in enumerate(shots):
+        if isinstance(shot, rbTypes.Shot):
+            shot._setLazyContent(ShardContent(os.path.join(shardFolder, getShardFileName(shot.name))))
+            if not lazy:
+                shot.loadContent()
+        if shotLoaded:
+            shotLoaded(shot)
+        if progress:
+            progress(i + 1, len(shots))
+    project.shots = shots
+    # Shots passed to shotLoaded may already have been added to another project, so leave them where they are
+    project._rebuildShotIndex(adoptShots=shotLoaded is None)
+    return project
+
+
+@instrumentation.traced("writeShardedProject")
+def writeShardedProject(project, path, removedNames=None):
+    """Write a whole project as a sharded project.
+
+    Shots whose layers and renders haven't been loaded from their shot file in the folder are left as they are. By
+    default anything already in the folder is replaced. Given the shots removed from the project since the folder was
+    read, the project is merged into the manifest on disk instead, so shots someone else saved in the meantime are kept.
+
+    Arguments:
+        project (Project): The project to write.
+        path (str): The folder of the project.
+        removedNames (set): The names of the shots to remove from the folder, if merging.
+
+    Returns:
+        dict: The number of "shardWrites" made and "bytesWritten".
+    """
+    shardFolder = os.path.join(path, shardFolderName)
+    os.makedirs(shardFolder, exist_ok=True)
+    metrics = {"shardWrites": 0, "bytesWritten": 0}
+
+    shotHeaders = {}
+    for shot in project.shots:
+        fileName = getShardFileName(shot.name)
+        filePath = os.path.join(shardFolder, fileName)
+        shotHeaders[shot.name] = _dumps(_getHeader(shot))
+        content = shot._lazyContent
+        if isinstance(content, ShardContent) and os.path.abspath(content.filePath) == os.path.abspath(filePath):
+            continue
+        text = _dumpShard(shot)
+        rbTypes.writeTextAtomically(filePath, text)
+        metrics["shardWrites"] += 1
+        metrics["bytesWritten"] += len(text)
+
+    manifestPath = os.path.join(path, manifestFileName)
+    projectFields = _getProjectFields(project)
+    with _lockFile(manifestPath + ".lock"):
+        manifest = _readManifest(manifestPath) if removedNames is not None else None
+        if manifest is not None:
+            fields, headersOnDisk = manifest
+            projectFields = {**fields, **projectFields}
+            mergedHeaders = {
+                name: _dumps(header) for name, header in headersOnDisk.items() if name not in removedNames
+            }
+            mergedHeaders.update(shotHeaders)
+            shotHeaders = mergedHeaders
+        text = _dumpManifest(projectFields, shotHeaders)
+        rbTypes.writeTextAtomically(manifestPath, text)
+    metrics["bytesWritten"] += len(text)
+
+    # Drop the files of shots that are no longer in the project
+    if removedNames is None:
+        keep = {getShardFileName(name) for name in shotHeaders}
+        for entry in os.scandir(shardFolder):
+            if entry.name.endswith(".json") and entry.name not in keep:
+                os.remove(entry.path)
+    else:
+        for name in removedNames:
+            if name not in shotHeaders:
+                try:
+                    os.remove(os.path.join(shardFolder, getShardFileName(name)))
+                except FileNotFoundError:
+                    pass
+    return metrics
+
+
+class ShardedProjectStore:
+    """Save a project as a manifest plus a file per shot, rewriting only what was edited.
+
+    This saves the same way as ProjectJournal and takes the same change events, so either can keep a project. The
+    shots edits touched are recorded, then serialized and written on a single writer thread in the order they were
+    made. Like the journal, records can be held and autosaved once edits pause, which also folds many edits to a shot
+    into one write of its file.
+    """
+
+    def __init__(self, path, writeDelay=0.0, minWriteInterval=0.0, maxWriteDelay=5.0):
+        """Initialize the store.
+
+        Arguments:
+            path (str): The folder or the manifest of the project.
+            writeDelay (float): The seconds to wait for more edits before autosaving. If this and minWriteInterval are
+                both 0, each batch of edits is written as soon as it is recorded.
+            minWriteInterval (float): The fewest seconds between autosaves.
+            maxWriteDelay (float): The most seconds an edit is held while edits keep coming in.
+        """
+        self.projectDataPath = getManifestPath(path)
+        self.directory = os.path.dirname(os.path.abspath(self.projectDataPath))
+        self.shardFolder = os.path.join(self.directory, shardFolderName)
+
+        self.writeDelay = writeDelay
+        self.minWriteInterval = minWriteInterval
+        self.maxWriteDelay = maxWriteDelay
+
+        self._lock = threading.Lock()
+        # Started on the first write, so loading a project to read it never starts a thread
+        self._writer = None
+        # Shard file name to the shot to write to it, or None to remove the file
+        self._unwrittenShards = {}
+        # Shot name to the shot whose header to write, or None to remove the shot from the manifest
+        self._unwrittenHeaders = {}
+        # The shots in the manifest as this store last read or wrote it. Shots in the manifest that aren't here were
+        # saved by someone else, so a snapshot keeps them
+        self._knownShotNames = set()
+        self._unwrittenProjectFields = {}
+        self._firstEditTime = 0.0
+        self._lastEditTime = 0.0
+        self._lastWriteTime = 0.0
+        self._autosaveThread = None
+        self._autosaveWake = threading.Condition(self._lock)
+        self._closing = False
+        self.metrics = {"batches": 0, "shardWrites": 0, "manifestWrites": 0, "writes": 0, "bytesWritten": 0}
+
+    def load(self, progress=None):
+        """Load the project, or return an empty project if there isn't one yet.
+
+        Arguments:
+            progress (callable): Called with (shots read, shot count) as the manifest is read.
+        """
+        if not os.path.isfile(self.projectDataPath):
+            return rbTypes.Project()
+        project = loadShardedProject(self.projectDataPath, progress=progress)
+        with self._lock:
+            self._knownShotNames = {shot.name for shot in project.shots}
+        return project
+
+    @property
+    def isDirty(self):
+        """Whether there are edits that haven't been written to disk yet."""
+        return bool(self._unwrittenShards or self._unwrittenHeaders or self._unwrittenProjectFields)
+
+    @property
+    def autosaves(self):
+        """Whether edits are held and autosaved in the background rather than written as they are made."""
+        return self.writeDelay > 0 or self.minWriteInterval > 0
+
+    def getMetrics(self):
+        """Return counts of the batches of edits recorded, the shot files and manifests written, and bytes written."""
+        with self._lock:
+            return dict(self.metrics)
+
+    def recordEvents(self, events):
+        """Record a batch of change events sent to a project's observers, marking the shots they touched as dirty.
+
+        The touched shots are serialized as they are when they are written, so a shot edited many times before a
+        write is written once.
+        """
+        removedNames = []
+        headerShots = {}
+        shardShots = {}
+        projectFields = {}
+        for event in events:
+            kind = event.kind
+            if kind == "projectChanged":
+                projectFields[event.field] = event.newValue
+            elif kind == "shotAdded":
+                headerShots[id(event.target)] = shardShots[id(event.target)] = event.target
+            elif kind == "shotRemoved":
+                removedNames.append(event.targetName)
+            elif kind == "shotChanged":
+                if event.field == "name":
+                    # The shot moves to the file for its new name
+                    removedNames.append(event.oldValue)
+                    headerShots[id(event.shot)] = shardShots[id(event.shot)] = event.shot
+                elif event.field in lazyShotKeys:
+                    shardShots[id(event.shot)] = event.shot
+                else:
+                    headerShots[id(event.shot)] = event.shot
+            elif event.shot is not None:
+                shardShots[id(event.shot)] = event.shot
+
+        shards = {getShardFileName(name): None for name in removedNames}
+        headers = dict.fromkeys(removedNames)
+        # Shots removed later in the batch are left out
+        for shot in shardShots.values():
+            if shot._project is not None:
+                shards[getShardFileName(shot.name)] = shot
+        for shot in headerShots.values():
+            if shot._project is not None:
+                headers[shot.name] = shot
+        if not (shards or headers or projectFields):
+            return
+
+        with self._lock:
+            self.metrics["batches"] += 1
+            self._unwrittenShards.update(shards)
+            self._unwrittenHeaders.update(headers)
+            self._unwrittenProjectFields.update(projectFields)
+            if self.autosaves:
+                self._lastEditTime = time.monotonic()
+                if self._firstEditTime == 0.0:
+                    self._firstEditTime = self._lastEditTime
+                self._startAutosave()
+                self._autosaveWake.notify()
+                return
+            future = self._submitUnwritten()
+        future.result()
+
+    def flush(self):
+        """Write any held edits now."""
+        with self._lock:
+            future = self._submitUnwritten()
+        if future is not None:
+            future.result()
+
+    def _submitUnwritten(self):
+        """Hand the held edits to the writer thread. Must be called with the lock held. Returns a Future, or None."""
+        if not self.isDirty:
+            return None
+        shards, self._unwrittenShards = self._unwrittenShards, {}
+        headers, self._unwrittenHeaders = self._unwrittenHeaders, {}
+        projectFields, self._unwrittenProjectFields = self._unwrittenProjectFields, {}
+        self._firstEditTime = 0.0
+        self._lastWriteTime = time.monotonic()
+        return self._submitWrite(self._writeEdits, shards, headers, projectFields)
+
+    def _submitWrite(self, fn, *args):
+        """Run a function on the writer thread, after any write already queued. Returns its Future."""
+        if self._writer is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="RenderBoyShards")
+        return self._writer.submit(fn, *args)
+
+    @instrumentation.traced("writeShards")
+    def _writeEdits(self, shards, headers, projectFields):
+        """Write the files of edited shots, then merge any header changes into the manifest on disk.
+
+        Shots are serialized here rather than as their edits are recorded, so the thread editing them isn't held up.
+        """
+        os.makedirs(self.shardFolder, exist_ok=True)
+        bytesWritten = 0
+        shardWrites = 0
+        writtenFiles = set()
+        for shot in shards.values():
+            # Shots removed since their edits were recorded are left to the removal
+            if shot is not None and shot._project is not None:
+                fileName = getShardFileName(shot.name)
+                text = _dumpShard(shot)
+                rbTypes.writeTextAtomically(os.path.join(self.shardFolder, fileName), text)
+                writtenFiles.add(fileName)
+                bytesWritten += len(text)
+                shardWrites += 1
+
+        manifestWritten = False
+        if headers or projectFields:
+            with _lockFile(self.projectDataPath + ".lock"):
+                # Start from the manifest on disk, which may have shots someone else saved since it was read
+                manifest = _readManifest(self.projectDataPath)
+                fields, shotHeaders = manifest if manifest is not None else ({}, {})
+                fields.update(projectFields)
+                shotHeaders = {name: _dumps(header) for name, header in shotHeaders.items()}
+                for name, shot in headers.items():
+                    if shot is None:
+                        shotHeaders.pop(name, None)
+                    elif shot._project is not None:
+                        shotHeaders[shot.name] = _dumps(_getHeader(shot))
+                text = _dumpManifest(fields, shotHeaders)
+                rbTypes.writeTextAtomically(self.projectDataPath, text)
+            bytesWritten += len(text)
+            manifestWritten = True
+
+        # Files are only removed once the manifest no longer lists their shots
+        for fileName, shot in shards.items():
+            if shot is None and fileName not in writtenFiles:
+                try:
+                    os.remove(os.path.join(self.shardFolder, fileName))
+                except FileNotFoundError:
+                    pass
+
+        with self._lock:
+            for name, shot in headers.items():
+                if shot is None:
+                    self._knownShotNames.discard(name)
+                elif shot._project is not None:
+                    self._knownShotNames.add(shot.name)
+            self.metrics["writes"] += 1
+            self.metrics["shardWrites"] += shardWrites
+            self.metrics["manifestWrites"] += manifestWritten
+            self.metrics["bytesWritten"] += bytesWritten
+
+    def _startAutosave(self):
+        """Start the autosave thread if it isn't running. Must be called with the lock held."""
+        if self._autosaveThread is None and not self._closing:
+            self._autosaveThread = threading.Thread(target=self._autosave, name="RenderBoyAutosave", daemon=True)
+            self._autosaveThread.start()
+
+    def _autosave(self):
+        """Write held edits once edits pause, no more often than the minimum interval."""
+        while True:
+            with self._lock:
+                while not self.isDirty and not self._closing:
+                    self._autosaveWake.wait()
+                if self._closing:
+                    return
+
+                dueTime = max(
+                    min(self._lastEditTime + self.writeDelay, self._firstEditTime + self.maxWriteDelay),
+                    self._lastWriteTime + self.minWriteInterval,
+                )
+                waitTime = dueTime - time.monotonic()
+                if waitTime > 0:
+                    self._autosaveWake.wait(waitTime)
+                    continue
+                self._submitUnwritten()
+
+    def saveSnapshot(self, project, wait=True):
+        """Write the whole project and drop any held edits.
+
+        The project is merged into the manifest on disk, so shots someone else saved since this store read it are
+        kept, and only the files of shots removed from this project are removed.
+
+        Arguments:
+            project (Project): The project to save.
+            wait (bool): If False, save a copy of the project as it is now on the writer thread, so it can keep being
+                edited while it is written.
+
+        Returns:
+            Future: Finishes once the project has been written.
+        """
+        snapshot = project if wait else project.copy()
+        with self._lock:
+            # Every edit so far is in the copy, other than which shots were removed
+            removedNames = {name for name, shot in self._unwrittenHeaders.items() if shot is None}
+            self._unwrittenShards = {}
+            self._unwrittenHeaders = {}
+            self._unwrittenProjectFields = {}
+            self._firstEditTime = 0.0
+            future = self._submitWrite(self._saveSnapshot, snapshot, removedNames)
+
+        if wait:
+            future.result()
+        return future
+
+    def _saveSnapshot(self, project, removedNames):
+        shotNames = {shot.name for shot in project.shots}
+        with self._lock:
+            # Shots this store knew of that the project no longer has were removed from it
+            removedNames |= self._knownShotNames - shotNames
+        metrics = writeShardedProject(project, self.directory, removedNames=removedNames)
+        with self._lock:
+            self._knownShotNames = shotNames
+            self.metrics["writes"] += 1
+            self.metrics["shardWrites"] += metrics["shardWrites"]
+            self.metrics["manifestWrites"] += 1
+            self.metrics["bytesWritten"] += metrics["bytesWritten"]
+
+    def removeFiles(self):
+        """Remove the manifest and shot files, e.g. once the project has been saved somewhere else. Call close first."""
+        import shutil
+
+        if os.path.isfile(self.projectDataPath):
+            os.remove(self.projectDataPath)
+        shutil.rmtree(self.shardFolder, ignore_errors=True)
+        try:
+            os.rmdir(self.directory)
+        except OSError:
+            # Holds other files
+            pass
+
+    def close(self):
+        """Write any held edits and wait for them to finish."""
+        with self._lock:
+            self._closing = True
+            self._autosaveWake.notify()
+            autosaveThread = self._autosaveThread
+        if autosaveThread is not None:
+            autosaveThread.join()
+        self.flush()
+
+        if self._writer is not None:
+            self._writer.submit(lambda: None).result()
+        with self._lock:
+            self._autosaveThread = None
+            self._closing = False
+
+
+def openProjectStore(projectPath, **options):
+    """Return a ShardedProjectStore for a sharded project, a ProjectDatabase for a database, otherwise a ProjectJournal.
+
+    Arguments:
+        projectPath (str): The folder or manifest of a sharded project, a SQLite database such as projectData.db, or
+            a project snapshot such as projectData.json.
+        **options: Passed to the store, e.g. writeDelay.
+    """
+    if isShardedProject(projectPath):
+        return ShardedProjectStore(projectPath, **options)
+
+    from renderboy.data import projectDatabase
+
+    if projectDatabase.isProjectDatabase(projectPath):
+        return projectDatabase.ProjectDatabase(projectPath, **options)
+
+    from renderboy.data.projectJournal import ProjectJournal
+
+    return ProjectJournal(projectPath, **options)
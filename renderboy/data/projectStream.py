@@ -0,0 +1,430 @@
+"""Streaming loader that builds shot headers up front and loads the rest of each shot on demand."""
+
+
+import json
+import os
+import re
+import threading
+
+import renderboy.data.renderTypes as rbTypes
+
+
+# Keys of a shot that are left on disk until the shot is first touched
+lazyShotKeys = ("layers", "renders")
+
+_whitespacePattern = re.compile(r"[ \t\n\r]*")
+# Everything up to the next bracket that isn't inside a string, taking whole strings at a time. Stops at the opening
+# quote of a string that runs past the end of the buffer.
+_skipPattern = re.compile(r'(?:[^{}\[\]"]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.DOTALL)
+
+
+class ProjectFileChangedError(RuntimeError):
+    """Raised when a lazily loaded shot is read from a project file that has changed since it was opened."""
+
+
+class _JsonStream:
+    """Read a json file in chunks, tracking byte offsets into the file.
+
+    The file is decoded as latin-1 so that one character is one byte. Json structure characters are all ascii and
+    utf-8 continuation bytes never look like quotes or backslashes, so spans found this way are correct byte spans.
+    Values that need their real contents are decoded from the raw bytes.
+    """
+
+    def __init__(self, f, chunkSize=1 << 20):
+        """Initialize the stream.
+
+        Arguments:
+            f (file): A file opened in binary mode.
+            chunkSize (int): The number of bytes to read at a time.
+        """
+        self.f = f
+        self.chunkSize = chunkSize
+        self.buffer = ""
+        self.bufferOffset = 0
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+        self.atEnd = False
+
+    def fill(self, size=None):
+        """Read more of the file into the buffer, dropping what has already been consumed."""
+        if self.atEnd:
+            return False
+
+        data = self.f.read(size or self.chunkSize)
+        if not data:
+            self.atEnd = True
+            return False
+
+        self.bufferOffset += self.pos
+        self.buffer = self.buffer[self.pos:] + data.decode("latin-1")
+        self.pos = 0
+        return True
+
+    def tell(self):
+        """Return the file offset of the current position."""
+        return self.bufferOffset + self.pos
+
+    def peek(self):
+        """Skip whitespace and return the next character without consuming it."""
+        while True:
+            self.pos = _whitespacePattern.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                raise ValueError(f"Unexpected end of file at offset {self.tell()}")
+
+    def expect(self, char):
+        """Consume the given character, raising if it is not next."""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} at offset {self.tell()}, found {found!r}")
+        self.pos += 1
+
+    def _decodeNext(self):
+        """Consume the next value, returning it as decoded from the latin-1 buffer along with its byte offsets."""
+        self.peek()
+        readSize = self.chunkSize
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                end = None
+
+            # A value that runs up to the end of the buffer may have been cut short, e.g. a number
+            if end is not None and (end < len(self.buffer) or self.atEnd):
+                break
+            if not self.fill(readSize):
+                if end is not None:
+                    break
+                raise ValueError(f"Invalid json value at offset {self.tell()}")
+            readSize *= 2
+
+        start = self.tell()
+        self.pos = end
+        return value, start, self.tell()
+
+    def skipValue(self):
+        """Consume the next value and return its (start, end) byte offsets in the file.
+
+        Objects and arrays are skipped by matching brackets outside strings, without decoding what they hold, so
+        skipping a shot's layers and renders costs a scan rather than building them.
+        """
+        if self.peek() not in "{[":
+            _, start, end = self._decodeNext()
+            return start, end
+
+        start = self.tell()
+        if self._skipIndented():
+            return start, self.tell()
+
+        depth = 0
+        while True:
+            end = _skipPattern.match(self.buffer, self.pos).end()
+            if end == len(self.buffer) or self.buffer[end] == '"':
+                # Keep an unfinished string, if any, and read on
+                self.pos = end
+                if not self.fill():
+                    raise ValueError(f"Unexpected end of file at offset {self.tell()}")
+                continue
+
+            self.pos = end + 1
+            if self.buffer[end] in "{[":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return start, self.tell()
+
+    def _ensure(self, size):
+        """Read until the buffer holds at least size characters from the current position, or the file ends."""
+        while len(self.buffer) - self.pos < size and self.fill():
+            pass
+
+    def _skipIndented(self):
+        """Skip a pretty printed object or array at the current position by finding the line that closes it.
+
+        Json written with an indent puts each element of a container on its own line, indented deeper than the line
+        the container opens on, and closes it on a line indented the same as that line. Strings can't hold raw
+        newlines, so the first such closing line is the matching bracket, and str.find gets there much faster than
+        scanning every character.
+
+        Returns:
+            bool: Whether the value was skipped. False if it isn't laid out that way, leaving the position unchanged.
+        """
+        lineStart = self.buffer.rfind("\n", 0, self.pos) + 1
+        if lineStart == 0 and self.bufferOffset:
+            # The start of the line has already been dropped from the buffer
+            return False
+        prefix = self.buffer[lineStart:self.pos]
+        indent = prefix[:len(prefix) - len(prefix.lstrip(" \t"))]
+
+        # The first element must be on the next line, indented deeper than the container
+        self._ensure(len(indent) + 3)
+        elementStart = self.pos + 2
+        if (
+            self.buffer[self.pos + 1:elementStart] != "\n"
+            or not self.buffer.startswith(indent, elementStart)
+            or self.buffer[elementStart + len(indent):elementStart + len(indent) + 1] not in (" ", "\t")
+        ):
+            return False
+
+        closing = "\n" + indent + ("]" if self.buffer[self.pos] == "[" else "}")
+        self.pos = elementStart
+        while True:
+            found = self.buffer.find(closing, self.pos)
+            if found != -1:
+                self.pos = found + len(closing)
+                return True
+            # Keep enough of the end of the buffer to find a closing line that straddles the next read
+            self.pos = max(self.pos, len(self.buffer) - len(closing) + 1)
+            if not self.fill():
+                raise ValueError(f"Unexpected end of file at offset {self.tell()}")
+
+    def readValue(self, objectHook=None):
+        """Consume the next value and return it decoded.
+
+        Arguments:
+            objectHook (callable): Passed to json as the object_hook for objects inside the value.
+        """
+        value, start, end = self._decodeNext()
+        text = self.buffer[start - self.bufferOffset:end - self.bufferOffset]
+        if text.isascii() and (objectHook is None or not isinstance(value, (dict, list))):
+            return value
+        return json.loads(text.encode("latin-1"), object_hook=objectHook)
+
+    def readKey(self):
+        """Consume an object key and the colon after it, returning the key."""
+        key = self.readValue()
+        self.expect(":")
+        return key
+
+    def iterObject(self):
+        """Consume an object, yielding each key. The caller must consume the value for each key."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            yield self.readKey()
+            separator = self.peek()
+            self.pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError(f"Expected ',' or '}}' at offset {self.tell() - 1}")
+
+    def iterArray(self):
+        """Consume an array, yielding once per element. The caller must consume each element."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield
+            separator = self.peek()
+            self.pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(f"Expected ',' or ']' at offset {self.tell() - 1}")
+
+
+class ProjectFileSource:
+    """A project file that lazily loaded shots read their layers and renders from.
+
+    If the file is replaced, for example when a journal is compacted into a new snapshot, the shots are found again by
+    name in the new file the next time one of them is loaded. Shots are keyed by their name and how many shots before
+    them have the same name, so shots that share a name each load their own content.
+    """
+
+    def __init__(self, filePath, fileStamp):
+        """Initialize the source.
+
+        Arguments:
+            filePath (str): The project file.
+            fileStamp (tuple): The (size, mtime) of the file when it was read.
+        """
+        self.filePath = filePath
+        self.fileStamp = fileStamp
+        # (shot name, occurrence) to the spans of the shot's lazy keys
+        self.shotSpans = {}
+        self.lock = threading.Lock()
+
+    def addShotSpans(self, shotName, spans):
+        """Record the spans of the next shot read with the given name, returning the key its content is loaded by."""
+        return _addShotSpans(self.shotSpans, shotName, spans)
+
+    def load(self, shotKey):
+        """Return a dict of each lazy key of the given shot and its loaded value.
+
+        Arguments:
+            shotKey (tuple): The key returned by addShotSpans for the shot.
+        """
+        with self.lock, open(self.filePath, "rb") as f:
+            if getOpenFileStamp(f) != self.fileStamp:
+                self._relocate(f)
+
+            spans = self.shotSpans.get(shotKey)
+            if spans is None:
+                raise ProjectFileChangedError(f"Shot {shotKey[0]} is no longer in {self.filePath}.")
+
+            content = {}
+            for key, (start, end) in spans.items():
+                f.seek(start)
+                content[key] = json.loads(f.read(end - start), object_hook=rbTypes.loadRenderBoyObject)
+        return content
+
+    def _relocate(self, f):
+        """Find the lazy keys of every shot again in the given open file."""
+        fileStamp = getOpenFileStamp(f)
+        shotSpans = {}
+        stream = _JsonStream(f)
+        for key in stream.iterObject():
+            if key != "shots":
+                stream.skipValue()
+                continue
+            for _ in stream.iterArray():
+                _, header, spans = _readShotHeader(stream)
+                _addShotSpans(shotSpans, header.get("name"), spans)
+
+        self.shotSpans = shotSpans
+        self.fileStamp = fileStamp
+
+
+class LazyShotContent:
+    """The layers and renders of a shot that are still on disk, loaded the first time the shot is touched."""
+
+    __slots__ = ("source", "shotKey")
+
+    def __init__(self, source, shotKey):
+        """Initialize the lazy content.
+
+        Arguments:
+            source (ProjectFileSource): The project file the shot was read from.
+            shotKey (tuple): The key of the shot in the source, as returned by addShotSpans.
+        """
+        self.source = source
+        self.shotKey = shotKey
+
+    def load(self):
+        """Return a dict of each lazy key and its loaded value."""
+        return self.source.load(self.shotKey)
+
+
+def getFileStamp(filePath):
+    """Return a (size, mtime) tuple used to tell whether a file has changed."""
+    stat = os.stat(filePath)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def getOpenFileStamp(f):
+    """Return a (size, mtime) tuple for an open file."""
+    stat = os.fstat(f.fileno())
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _addShotSpans(shotSpans, shotName, spans):
+    """Add the spans of a shot under its name and the number of shots already added with that name."""
+    occurrence = 0
+    while (shotName, occurrence) in shotSpans:
+        occurrence += 1
+    shotSpans[(shotName, occurrence)] = spans
+    return shotName, occurrence
+
+
+def _readShotHeader(stream):
+    """Read a shot from the stream, leaving its layers and renders on disk.
+
+    Returns:
+        tuple: The start offset of the shot, a dict of its decoded keys and a dict of the spans of its lazy keys.
+    """
+    start = stream.tell()
+    header = {}
+    spans = {}
+    for key in stream.iterObject():
+        if key in lazyShotKeys:
+            spans[key] = stream.skipValue()
+        else:
+            header[key] = stream.readValue(objectHook=rbTypes.loadRenderBoyObject)
+    return start, header, spans
+
+
+def _readShot(stream, source):
+    """Read a shot from the stream, leaving its layers and renders on disk."""
+    start, header, spans = _readShotHeader(stream)
+
+    objectClass = rbTypes.renderBoyObjectTypes.get(header.get("objectType"))
+    if objectClass is None or not issubclass(objectClass, rbTypes.Shot):
+        # Not a shot, so load it the same way the full loader would
+        with open(source.filePath, "rb") as f:
+            f.seek(start)
+            return json.loads(f.read(stream.tell() - start), object_hook=rbTypes.loadRenderBoyObject)
+
+    shot = objectClass()
+    fields = objectClass.getLoadableFields()
+    for key, value in header.items():
+        if key in fields:
+            setattr(shot, key, value)
+
+    shotKey = source.addShotSpans(shot.name, spans)
+    if spans:
+        shot._setLazyContent(LazyShotContent(source, shotKey))
+    return shot
+
+
+def readLeadingValue(filePath, key, default=None):
+    """Return the value of a top level key that is written before the shots, without reading the shots.
+
+    Arguments:
+        filePath (str): The project file to read.
+        key (str): The key to look for.
+        default: The value to return if the key isn't found before the shots.
+    """
+    with open(filePath, "rb") as f:
+        stream = _JsonStream(f)
+        for foundKey in stream.iterObject():
+            if foundKey == key:
+                return stream.readValue()
+            if foundKey == "shots":
+                break
+            stream.skipValue()
+    return default
+
+
+def streamProjectFromFile(filePath, progress=None, shotLoaded=None):
+    """Load a project from the given file path, loading the layers and renders of each shot when it is first used.
+
+    Arguments:
+        filePath (str): The project file to load.
+        progress (callable): Called with (bytes read, file size) after each shot is read.
+        shotLoaded (callable): Called with each shot as soon as it is read, so it can be shown before the rest load.
+
+    Returns:
+        Project: The loaded project.
+    """
+    project = rbTypes.Project()
+    fields = rbTypes.Project.getLoadableFields()
+
+    with open(filePath, "rb") as f:
+        source = ProjectFileSource(filePath, getOpenFileStamp(f))
+        fileSize = os.fstat(f.fileno()).st_size
+        stream = _JsonStream(f)
+        for key in stream.iterObject():
+            if key == "shots":
+                shots = []
+                for _ in stream.iterArray():
+                    shot = _readShot(stream, source)
+                    shots.append(shot)
+                    if shotLoaded:
+                        shotLoaded(shot)
+                    if progress:
+                        progress(stream.tell(), fileSize)
+                project.shots = shots
+            elif key in fields:
+                setattr(project, key, stream.readValue(objectHook=rbTypes.loadRenderBoyObject))
+            else:
+                stream.skipValue()
+
+    # Shots passed to shotLoaded may already have been added to another project, so leave them where they are
+    project._rebuildShotIndex(adoptShots=shotLoaded is None)
+    return project
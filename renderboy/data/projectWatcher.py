@@ -0,0 +1,364 @@
+"""Watch a project directory for new or removed frames, and rescan the shots that changed.
+
+Events are read with inotify on Linux. Elsewhere, or if inotify can't be used, the directories recorded in a
+DirectorySnapshot are polled with a stat each, and only the shots whose directories changed are rescanned.
+
+Renders write frames in bursts, so changes are collected by shot and only rescanned once the shot has been quiet for a
+moment, or after a maximum delay while frames keep arriving. A burst of thousands of frames costs one rescan of each
+shot it touched.
+"""
+
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from renderboy.data import shotScanner
+from renderboy.data.directorySnapshot import DirectorySnapshot
+
+
+# inotify event flags, from <sys/inotify.h>
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# Frames being written only matter once they exist, so writes to them are not watched
+_watchMask = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+_eventHeader = struct.Struct("iIII")
+
+# Directories below the project directory that hold frames: shot/render/layer
+_watchDepth = 3
+
+# Marks every shot as changed, e.g. after the kernel dropped events
+allShots = None
+
+# Errors adding a watch that mean no more directories can be watched, rather than that one directory can't be
+_watchLimitErrors = (errno.ENOSPC, errno.EMFILE, errno.ENOMEM)
+
+
+class _InotifyBackend:
+    """Reports the shots changed under a project directory from inotify events."""
+
+    def __init__(self, directory):
+        """Open an inotify instance and watch every shot, render and layer directory in the project.
+
+        Raises:
+            OSError: If inotify is not available, or there are more directories than can be watched.
+        """
+        libcName = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libcName, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+        self.directory = directory
+        # Watch descriptor to (shot name, depth, path), with the project directory at depth 0
+        self._watches = {}
+        try:
+            self._addWatchTree(directory, None, 0)
+        except OSError:
+            self.close()
+            raise
+
+    def _addWatch(self, path, shotName, depth):
+        """Watch a single directory. Returns whether the watch was added.
+
+        Raises:
+            OSError: If the limit on watches or inotify instances was reached, so the project can't be fully watched.
+        """
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _watchMask)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error in _watchLimitErrors:
+                raise OSError(error, f"Could not watch {path}: {os.strerror(error)}")
+            # Removed or unreadable since it was listed, which a rescan of the shot picks up
+            return False
+        self._watches[wd] = (shotName, depth, path)
+        return True
+
+    def _addWatchTree(self, path, shotName, depth):
+        """Watch a directory and the directories below it, down to the frame directories."""
+        if not self._addWatch(path, shotName, depth) or depth >= _watchDepth:
+            return
+        try:
+            with os.scandir(path) as entries:
+                subDirectories = [(entry.name, entry.path) for entry in entries
+                                  if entry.is_dir() and not entry.name.startswith(".")]
+        except OSError:
+            return
+        for name, subPath in subDirectories:
+            self._addWatchTree(subPath, name if depth == 0 else shotName, depth + 1)
+
+    def read(self, timeout):
+        """Wait up to timeout seconds for events, and return the set of shots they changed.
+
+        Returns:
+            set: The changed shot names, or allShots if events were lost and every shot should be checked.
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 1 << 16)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            if self._readEvents(data, changed) is allShots:
+                changed = allShots
+        return changed
+
+    def _readEvents(self, data, changed):
+        """Add the shots changed by a buffer of events to the changed set."""
+        overflow = False
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _eventHeader.unpack_from(data, offset)
+            nameStart = offset + _eventHeader.size
+            offset = nameStart + length
+
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            watch = self._watches.get(wd)
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            if watch is None:
+                continue
+
+            shotName, depth, path = watch
+            name = os.fsdecode(data[nameStart:offset].rstrip(b"\0"))
+            if depth == 0:
+                if not name or name.startswith("."):
+                    continue
+                shotName = name
+            if changed is not allShots:
+                changed.add(shotName)
+
+            # New directories are watched as they appear, including anything already written into them
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and depth < _watchDepth:
+                self._addWatchTree(os.path.join(path, name), shotName, depth + 1)
+
+        return allShots if overflow else changed
+
+    def close(self):
+        """Close the inotify instance, removing every watch."""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class _PollingBackend:
+    """Reports the shots changed under a project directory by checking the directories recorded in a snapshot."""
+
+    def __init__(self, directory, snapshot, snapshotLock, interval=5.0):
+        """Initialize the backend.
+
+        Arguments:
+            directory (str): The project directory.
+            snapshot (DirectorySnapshot): The stats to check against. Kept up to date by the watcher as it rescans.
+            snapshotLock (threading.Lock): Held while the snapshot is read or updated.
+            interval (float): The seconds between checks.
+        """
+        self.directory = directory
+        self.snapshot = snapshot
+        self.snapshotLock = snapshotLock
+        self.interval = interval
+        self._nextPoll = time.monotonic()
+        self._stop = threading.Event()
+
+    def read(self, timeout):
+        """Wait up to timeout seconds for the next check, and return the set of shots that changed."""
+        wait = self._nextPoll - time.monotonic()
+        if wait > timeout:
+            self._stop.wait(timeout)
+            return set()
+        if wait > 0:
+            self._stop.wait(wait)
+        self._nextPoll = time.monotonic() + self.interval
+
+        # Directories are checked against a copy, so rescans can update the snapshot in the meantime
+        with self.snapshotLock:
+            snapshot = self.snapshot.copy()
+
+        changed = set()
+        if not snapshot.isRootCurrent():
+            scanTime = time.time_ns()
+            rootStats = {}
+            shotNames = {name for name, _ in shotScanner.listShotDirectories(self.directory, rootStats)}
+            with self.snapshotLock:
+                self.snapshot.setRoot(rootStats.get(""), scanTime)
+            changed.update(shotNames - set(snapshot.shots))
+        changed.update(shotName for shotName in snapshot.shots if not snapshot.isShotCurrent(shotName))
+        return changed
+
+    def close(self):
+        """Stop waiting for the next check."""
+        self._stop.set()
+
+
+class ProjectWatcher:
+    """Rescans the shots of a project directory as frames are written to or removed from them.
+
+    Rescanned shots are passed to a callback from a background thread. The callback should hand them over to whichever
+    thread owns the project, e.g. by emitting a Qt signal, and merge them there with directorySnapshot.mergeScannedShot.
+
+    The snapshot is updated on the background threads, so other threads should read it through getSnapshot.
+    """
+
+    def __init__(self, directory, callback, snapshot=None, debounce=0.5, maxDelay=3.0, pollInterval=5.0,
+                 usePolling=None):
+        """Initialize the watcher. Call start to begin watching.
+
+        Arguments:
+            directory (str): The project directory.
+            callback (callable): Called with a dict of shot name to the rescanned Shot, or None for shots that are no
+                longer on disk.
+            snapshot (DirectorySnapshot): The stats from the last scan of the directory. It is kept up to date with
+                each rescan, and is used to find what changed while polling.
+            debounce (float): The seconds a shot must go without changes before it is rescanned.
+            maxDelay (float): The most seconds a changed shot waits to be rescanned while it keeps changing.
+            pollInterval (float): The seconds between checks when polling.
+            usePolling (bool): Whether to poll rather than use inotify. Defaults to polling unless on Linux.
+        """
+        self.directory = os.path.normpath(directory)
+        self.callback = callback
+        self.snapshot = snapshot if snapshot is not None else DirectorySnapshot(self.directory)
+        # Held while the snapshot is read or updated, since the watcher and rescan threads both use it
+        self._snapshotLock = threading.Lock()
+        self.debounce = debounce
+        self.maxDelay = maxDelay
+        self.pollInterval = pollInterval
+        self.usePolling = not sys.platform.startswith("linux") if usePolling is None else usePolling
+
+        # Shot name to the time it first and last changed since it was last rescanned
+        self._pending = {}
+        self._backend = None
+        self._thread = None
+        self._stopped = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def start(self):
+        """Start watching in a background thread."""
+        if self._thread is not None:
+            return
+
+        if not self.usePolling:
+            try:
+                self._backend = _InotifyBackend(self.directory)
+            except (OSError, AttributeError) as e:
+                print(f"WARNING: Could not use inotify, polling {self.directory} instead: {e}")
+        if self._backend is None:
+            self._backend = _PollingBackend(self.directory, self.snapshot, self._snapshotLock, self.pollInterval)
+
+        self._thread = threading.Thread(target=self._run, name="ProjectWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching, and wait for any rescan in progress to finish."""
+        self._stopped.set()
+        if isinstance(self._backend, _PollingBackend):
+            # Wake the thread from its wait for the next check
+            self._backend.close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+        self._executor.shutdown(wait=True)
+
+    def getSnapshot(self):
+        """Return a copy of the snapshot as it is now, which can be read or saved on any thread."""
+        with self._snapshotLock:
+            return self.snapshot.copy()
+
+    def _run(self):
+        """Collect changed shots from the backend, and rescan them once they settle."""
+        while not self._stopped.is_set():
+            try:
+                changed = self._backend.read(self._nextTimeout())
+            except OSError as e:
+                # New directories can take inotify past its limits, so poll from here on
+                print(f"WARNING: Could not keep using inotify, polling {self.directory} instead: {e}")
+                self._backend.close()
+                self._backend = _PollingBackend(self.directory, self.snapshot, self._snapshotLock, self.pollInterval)
+                # Events may have been missed while switching
+                changed = allShots
+            if changed is allShots:
+                changed = self._listAllShots()
+
+            now = time.monotonic()
+            for shotName in changed:
+                firstChanged, _ = self._pending.get(shotName, (now, now))
+                self._pending[shotName] = (firstChanged, now)
+
+            dueShots = [shotName for shotName, (firstChanged, lastChanged) in self._pending.items()
+                        if now - lastChanged >= self.debounce or now - firstChanged >= self.maxDelay]
+            if dueShots:
+                for shotName in dueShots:
+                    del self._pending[shotName]
+                # Rescan away from this thread, so events keep being read while frames are listed
+                self._executor.submit(self._rescan, dueShots)
+
+    def _nextTimeout(self):
+        """Return the seconds until the next pending shot is due, or a second if none are pending."""
+        if not self._pending:
+            return 1.0
+        now = time.monotonic()
+        due = min(min(lastChanged + self.debounce, firstChanged + self.maxDelay)
+                  for firstChanged, lastChanged in self._pending.values())
+        return max(0.0, due - now)
+
+    def _listAllShots(self):
+        """Return the names of every shot in the directory and in the snapshot."""
+        shotNames = {name for name, _ in shotScanner.listShotDirectories(self.directory)}
+        with self._snapshotLock:
+            return shotNames | set(self.snapshot.shots)
+
+    def _rescan(self, shotNames):
+        """Rescan the given shots and pass them to the callback."""
+        scannedShots = {}
+        for shotName in sorted(shotNames):
+            if self._stopped.is_set():
+                return
+            shotPath = os.path.join(self.directory, shotName)
+            if not os.path.isdir(shotPath):
+                with self._snapshotLock:
+                    self.snapshot.shots.pop(shotName, None)
+                scannedShots[shotName] = None
+                continue
+            scanTime = time.time_ns()
+            directoryStats = {}
+            scannedShots[shotName] = shotScanner.scanShot(shotName, shotPath, directoryStats)
+            with self._snapshotLock:
+                # Each shot is checked against the rescan that read it, so scanTime stays that of the last full scan
+                self.snapshot.setShot(shotName, directoryStats, scanTime)
+
+        if scannedShots:
+            try:
+                self.callback(scannedShots)
+            except Exception as e:
+                print(f"WARNING: Could not update the project from {self.directory}: {e}")
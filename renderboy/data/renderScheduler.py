@@ -0,0 +1,394 @@
+"""Render the frames of renders on the local machine, splitting each frame range into chunks run by worker processes.
+
+Each chunk runs a command built from a template, such as ``"render --start {start} --end {end} {shot}/{render}.ma"``.
+A fixed number of chunks run at once, one process each, so every core is kept busy. Chunks are sized from the frames
+still waiting, so they start large and shrink as the renders near the end, and the last chunks finish close together
+rather than one long chunk holding up the end. Frames of a chunk that fails are retried in later chunks.
+
+The status, attempts and time of every frame are kept on a RenderJob, which the render points back to.
+
+Run this module to render frames with a dummy renderer that only waits, for trying out and testing the scheduler:
+
+    python -m renderboy.data.renderScheduler 1001 1010 --seconds 0.1
+"""
+
+
+import argparse
+import math
+import os
+import re
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from bisect import insort
+
+from renderboy.data.frameSet import FrameSet
+
+
+# The status a frame can have, in the order a frame goes through them
+frameStatuses = ("pending", "running", "done", "failed")
+
+defaultMaxWorkers = os.cpu_count() or 1
+defaultMaxRetries = 2
+
+# Each chunk takes this share of the frames waiting per worker, so chunks shrink as the renders near the end
+_chunkShare = 0.5
+
+# Runs the dummy renderer below, which reports each frame in a line matched by dummyFramePattern
+dummyCommandTemplate = [sys.executable, "-m", "renderboy.data.renderScheduler", "{start}", "{end}"]
+dummyFramePattern = r"^Rendered frame (-?\d+)"
+
+
+class FrameState:
+    """The status, attempts and time of one frame of a render job."""
+
+    __slots__ = ("status", "attempts", "seconds", "error")
+
+    def __init__(self):
+        self.status = "pending"
+        self.attempts = 0
+        self.seconds = None
+        self.error = None
+
+
+class RenderJob:
+    """The frames of a render to render locally, and the state of each."""
+
+    def __init__(self, render, commandTemplate, frames=None):
+        """Initialize the job.
+
+        Arguments:
+            render (Render): The render to render. Its shot, name, resolution and layers can be used in the command.
+            commandTemplate (str or list): The command run for each chunk, as a string split like a shell command or
+                a list of arguments. {start} and {end} are replaced with the first and last frame of the chunk, and
+                {frames}, {shot}, {render}, {resolution} and {layers} with the chunk's frames and the render's details.
+            frames (FrameSet): The frames to render. Defaults to frameStart to frameEnd of the render.
+        """
+        self.render = render
+        self.commandTemplate = shlex.split(commandTemplate) if isinstance(commandTemplate, str) else commandTemplate
+        if frames is None:
+            frames = FrameSet.fromRange(render.frameStart, render.frameEnd)
+        self.frames = {frame: FrameState() for frame in frames}
+        self.chunkCount = 0
+        self.startTime = None
+        self.endTime = None
+        render._renderJob = self
+
+        # Check the template up front, rather than failing in every worker
+        self.formatCommand(min(self.frames, default=0), max(self.frames, default=0))
+
+    def formatCommand(self, start, end):
+        """Return the command that renders the frames from start to end, as a list of arguments."""
+        shot = self.render._shot
+        fields = {
+            "start": start,
+            "end": end,
+            "frames": f"{start}-{end}",
+            "shot": shot.name if shot is not None else "",
+            "render": self.render.name,
+            "resolution": self.render.resolution,
+            "layers": ",".join(self.render.layers),
+        }
+        try:
+            return [str(argument).format(**fields) for argument in self.commandTemplate]
+        except (KeyError, IndexError, ValueError) as e:
+            raise ValueError(f"Invalid render command template {self.commandTemplate}: {e!r}") from None
+
+    def getFrames(self, status):
+        """Return a FrameSet of the frames with the given status."""
+        return FrameSet.fromFrames(frame for frame, state in self.frames.items() if state.status == status)
+
+    def getStatusCounts(self):
+        """Return a dict of each status to the number of frames with it."""
+        counts = dict.fromkeys(frameStatuses, 0)
+        for state in self.frames.values():
+            counts[state.status] += 1
+        return counts
+
+    @property
+    def isFinished(self):
+        """Whether every frame is either done or has failed for good."""
+        return all(state.status in ("done", "failed") for state in self.frames.values())
+
+    @property
+    def seconds(self):
+        """The seconds from the first chunk starting to the last one finishing, or None if the job hasn't started."""
+        if self.startTime is None:
+            return None
+        return (self.endTime or time.monotonic()) - self.startTime
+
+    def toDict(self):
+        """Return a json serializable summary of the job."""
+        shot = self.render._shot
+        frameSeconds = [state.seconds for state in self.frames.values() if state.seconds is not None]
+        return {
+            "shot": shot.name if shot is not None else None,
+            "render": self.render.name,
+            **self.getStatusCounts(),
+            "failedFrames": str(self.getFrames("failed")),
+            "retries": sum(max(state.attempts - 1, 0) for state in self.frames.values()),
+            "chunks": self.chunkCount,
+            "seconds": self.seconds,
+            "meanFrameSeconds": sum(frameSeconds) / len(frameSeconds) if frameSeconds else None,
+        }
+
+
+def runProcess(command, lineRead):
+    """Run a command, passing each line it prints to lineRead. The default way chunks are run.
+
+    Returns:
+        tuple: The exit code and the last lines of output, to report if it failed.
+    """
+    lastLines = []
+    with subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, universal_newlines=True,
+        errors="replace", bufsize=1
+    ) as process:
+        for line in process.stdout:
+            lineRead(line)
+            lastLines.append(line)
+            del lastLines[:-10]
+    return process.returncode, "".join(lastLines)
+
+
+class LocalScheduler:
+    """Runs render jobs as chunks of frames on a fixed number of local worker processes."""
+
+    def __init__(self, maxWorkers=None, maxRetries=defaultMaxRetries, minChunkSize=1, maxChunkSize=None,
+                 framePattern=None, runCommand=runProcess):
+        """Initialize the scheduler.
+
+        Arguments:
+            maxWorkers (int): The most chunks to run at once. Defaults to the number of cores.
+            maxRetries (int): How many times a frame is retried after its chunk fails.
+            minChunkSize (int): The fewest frames in a chunk, other than the last of a run of frames.
+            maxChunkSize (int): The most frames in a chunk. Defaults to no limit.
+            framePattern (str): A regex matching a line the command prints when a frame is done, with the frame
+                number as its first group. Frames are then marked done, and timed, one by one as they finish, and only
+                those not done are retried if the chunk fails. Defaults to marking the whole chunk done when it exits.
+            runCommand (callable): Runs a chunk's command, as runProcess does. Replace it to run chunks another way.
+        """
+        self.maxWorkers = maxWorkers or defaultMaxWorkers
+        self.maxRetries = maxRetries
+        self.minChunkSize = max(minChunkSize, 1)
+        self.maxChunkSize = maxChunkSize
+        self.framePattern = re.compile(framePattern) if isinstance(framePattern, str) else framePattern
+        self.runCommand = runCommand
+
+        self._condition = threading.Condition()
+        self._jobs = []
+        # The frames of each job waiting to be rendered, in order
+        self._pending = {}
+        self._pendingCount = 0
+        self._runningCount = 0
+        # The number of chunks of each job running
+        self._runningChunks = {}
+        self._isCancelled = False
+        self._progress = None
+
+    def run(self, jobs, progress=None):
+        """Render the jobs, returning once every frame is done or has failed for good.
+
+        Arguments:
+            jobs (list): The RenderJobs to render. Their frames are rendered in order, and the jobs one after another.
+            progress (callable): Called with each job whenever some of its frames finish. Called on a worker thread.
+
+        Returns:
+            list: The jobs.
+        """
+        self._jobs = list(jobs)
+        self._pending = {id(job): sorted(job.frames) for job in self._jobs}
+        self._pendingCount = sum(len(frames) for frames in self._pending.values())
+        self._runningCount = 0
+        self._runningChunks = {id(job): 0 for job in self._jobs}
+        self._isCancelled = False
+        self._progress = progress
+
+        workerCount = min(self.maxWorkers, self._pendingCount)
+        workers = [
+            threading.Thread(target=self._work, name=f"RenderBoyRender{i}", daemon=True) for i in range(workerCount)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return self._jobs
+
+    def cancel(self):
+        """Stop starting chunks. Chunks already running are left to finish, and frames not started stay pending."""
+        with self._condition:
+            self._isCancelled = True
+            self._condition.notify_all()
+
+    def _getChunkSize(self):
+        """Return how many frames the next chunk should have. Must be called with the condition held."""
+        size = math.ceil(self._pendingCount * _chunkShare / self.maxWorkers)
+        if self.maxChunkSize:
+            size = min(size, self.maxChunkSize)
+        return max(size, self.minChunkSize)
+
+    def _takeChunk(self):
+        """Wait for frames to render and take the next chunk of them.
+
+        Returns:
+            tuple: The job and the list of consecutive frames of the chunk, or None once there is nothing left to
+                render.
+        """
+        with self._condition:
+            while True:
+                if self._isCancelled:
+                    return None
+                for job in self._jobs:
+                    frames = self._pending[id(job)]
+                    if frames:
+                        break
+                else:
+                    # Running chunks may still fail and give back frames to retry
+                    if not self._runningCount:
+                        self._condition.notify_all()
+                        return None
+                    self._condition.wait()
+                    continue
+
+                # A frame being retried runs on its own, so a frame that keeps failing doesn't use up the retries of
+                # the frames around it
+                size = 1 if job.frames[frames[0]].attempts else self._getChunkSize()
+                count = 1
+                while (count < size and count < len(frames) and frames[count] == frames[count - 1] + 1
+                       and not job.frames[frames[count]].attempts):
+                    count += 1
+                chunk = frames[:count]
+                del frames[:count]
+                self._pendingCount -= count
+                self._runningCount += 1
+                self._runningChunks[id(job)] += 1
+
+                if job.startTime is None:
+                    job.startTime = time.monotonic()
+                job.chunkCount += 1
+                for frame in chunk:
+                    state = job.frames[frame]
+                    state.status = "running"
+                    state.attempts += 1
+                return job, chunk
+
+    def _work(self):
+        """Run chunks until there are none left."""
+        while True:
+            taken = self._takeChunk()
+            if taken is None:
+                return
+            self._runChunk(*taken)
+
+    def _runChunk(self, job, chunk):
+        """Render a chunk of frames, then mark each frame done, or give it back to retry."""
+        start = time.monotonic()
+        lastFrameTime = [start]
+        reportedFrames = set()
+
+        def lineRead(line):
+            if self.framePattern is None:
+                return
+            match = self.framePattern.search(line)
+            if not match:
+                return
+            frame = int(match.group(1))
+            state = job.frames.get(frame)
+            if state is None or frame in reportedFrames:
+                return
+            now = time.monotonic()
+            with self._condition:
+                reportedFrames.add(frame)
+                state.status = "done"
+                state.seconds = now - lastFrameTime[0]
+                state.error = None
+            lastFrameTime[0] = now
+            if self._progress is not None:
+                self._progress(job)
+
+        try:
+            returnCode, output = self.runCommand(job.formatCommand(chunk[0], chunk[-1]), lineRead)
+        except OSError as e:
+            returnCode, output = None, str(e)
+
+        end = time.monotonic()
+        with self._condition:
+            unreported = [frame for frame in chunk if frame not in reportedFrames]
+            if returnCode == 0:
+                # Frames the command didn't report share the time left over
+                for frame in unreported:
+                    state = job.frames[frame]
+                    state.status = "done"
+                    state.seconds = (end - lastFrameTime[0]) / len(unreported)
+                    state.error = None
+            else:
+                error = f"Exited with {returnCode}: {output.strip()}" if returnCode is not None else output
+                pending = self._pending[id(job)]
+                for i, frame in enumerate(unreported):
+                    state = job.frames[frame]
+                    if i and self.framePattern is not None:
+                        # Frames after the one that failed were never started
+                        state.attempts -= 1
+                        state.status = "pending"
+                        insort(pending, frame)
+                        self._pendingCount += 1
+                        continue
+                    state.error = error
+                    if state.attempts <= self.maxRetries:
+                        state.status = "pending"
+                        insort(pending, frame)
+                        self._pendingCount += 1
+                    else:
+                        state.status = "failed"
+            self._runningCount -= 1
+            self._runningChunks[id(job)] -= 1
+            if not self._runningChunks[id(job)] and not self._pending[id(job)]:
+                job.endTime = end
+            self._condition.notify_all()
+
+        if self._progress is not None:
+            self._progress(job)
+
+
+def renderLocally(jobs, progress=None, **kwargs):
+    """Render the jobs with a LocalScheduler made with the given keyword arguments, returning the jobs."""
+    return LocalScheduler(**kwargs).run(jobs, progress=progress)
+
+
+def dummyRender(start, end, secondsPerFrame=0.01, failFrames=()):
+    """Pretend to render the frames from start to end, printing a line as each one is done.
+
+    Arguments:
+        start (int): The first frame.
+        end (int): The last frame.
+        secondsPerFrame (float): How long each frame takes.
+        failFrames (iterable): Frames that fail, exiting with an error.
+
+    Returns:
+        int: The exit code.
+    """
+    failFrames = set(failFrames)
+    for frame in range(start, end + 1):
+        time.sleep(secondsPerFrame)
+        if frame in failFrames:
+            print(f"Failed to render frame {frame}", flush=True)
+            return 1
+        print(f"Rendered frame {frame}", flush=True)
+    return 0
+
+
+def main():
+    """Run the dummy renderer."""
+    parser = argparse.ArgumentParser(description="Pretend to render frames, for testing the render scheduler.")
+    parser.add_argument("start", type=int, help="The first frame.")
+    parser.add_argument("end", type=int, help="The last frame.")
+    parser.add_argument("--seconds", type=float, default=0.01, help="How long each frame takes.")
+    parser.add_argument("--fail", default="", help="Frames that fail, e.g. 1005,1010-1012.")
+    args = parser.parse_args()
+    sys.exit(dummyRender(args.start, args.end, args.seconds, FrameSet.fromString(args.fail)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,248 @@
 """Types that are used in the render pipeline."""
 
 
+import gc
 import os
 import json
+from contextlib import contextmanager
+
+from renderboy.data import instrumentation
+from renderboy.data.frameSet import FrameSet
+from renderboy.data.modelEvents import ChangeEvent
+from renderboy.data.orderedSet import OrderedSet
+
+
+# Registry of every RenderBoyObject subclass by name. Subclasses are added when they are defined.
+renderBoyObjectTypes = {}
 
 
 class RenderBoyObject:
-    """A base class for all renderboy objects. This class is used to identify the type of an object."""
+    """A base class for all renderboy objects. This class is used to identify the type of an object.
 
-    def __init__(self) -> None:
-        """Initialize the object."""
-        self.objectType = type(self).__name__
+    Subclasses declare their attributes in __slots__ so instances don't carry a __dict__. The objectType is stored
+    once on the class rather than on every instance.
+    """
+
+    __slots__ = ()
+
+    objectType = "RenderBoyObject"
+    _loadableFields = None
+    # The kind of change event sent when a field is set with setField
+    _changedEventKind = "objectChanged"
+
+    def __init_subclass__(cls, **kwargs):
+        """Register the subclass so it can be loaded from a file."""
+        super().__init_subclass__(**kwargs)
+        renderBoyObjectTypes[cls.__name__] = cls
+        cls.objectType = cls.__name__
+        cls._loadableFields = None
+
+    @classmethod
+    def getLoadableFields(cls):
+        """Return the attribute names, in order, that are saved to and loaded from a file.
+
+        Public attributes are included, as are properties backed by an attribute of the same name with a leading
+        underscore.
+        """
+        if cls._loadableFields is None:
+            attributeNames = []
+            for klass in reversed(cls.__mro__):
+                slots = klass.__dict__.get("__slots__", ())
+                attributeNames.extend([slots] if isinstance(slots, str) else slots)
+            # Subclasses that don't declare __slots__ keep their attributes in __dict__
+            attributeNames.extend(getattr(cls(), "__dict__", ()))
+
+            fields = []
+            for key in attributeNames:
+                if key in ("objectType", "__dict__", "__weakref__") or key in fields:
+                    continue
+                if not key.startswith("_"):
+                    fields.append(key)
+                elif isinstance(getattr(cls, key[1:], None), property):
+                    fields.append(key[1:])
+            cls._loadableFields = tuple(fields)
+        return cls._loadableFields
+
+    def _postLoad(self):
+        """Rebuild any derived state after the object has been loaded from a file."""
+        pass
+
+    def toDict(self):
+        """Return a json serializable dict of the object's loadable fields."""
+        d = {"objectType": self.objectType}
+        for key in type(self).getLoadableFields():
+            d[key] = getattr(self, key)
+        return d
+
+    def copy(self):
+        """Return a copy of the object that shares no lists or RenderBoyObjects with it.
+
+        Strings, numbers and FrameSets are never changed in place, so they are shared. A copy can be saved from another
+        thread while the original keeps being edited.
+        """
+        newObject = type(self)()
+        for key in type(self).getLoadableFields():
+            setattr(newObject, key, _copyValue(getattr(self, key)))
+        newObject._postLoad()
+        return newObject
+
+    def _getProject(self):
+        """Return the project the object belongs to, or None."""
+        return None
+
+    def _getShot(self):
+        """Return the shot the object belongs to, or None."""
+        return None
+
+    def _notify(self, kind, target=None, field=None, oldValue=None, newValue=None, index=None):
+        """Send a change event to the observers of the project the object belongs to.
+
+        Arguments:
+            kind (str): The kind of event. See renderboy.data.modelEvents.eventKinds.
+            target (RenderBoyObject): What changed. Defaults to the object itself.
+            index: Where the target was added or removed. See ChangeEvent.
+        """
+        project = self._getProject()
+        # Objects outside a project, or in a project nobody is watching, don't pay for building events
+        if project is None or not project._observers:
+            return
+
+        target = self if target is None else target
+        shot = self._getShot() or target._getShot()
+        project._sendEvent(ChangeEvent(kind, target, shot, field, oldValue, newValue, index))
+
+    def setField(self, field, value):
+        """Set a loadable field, telling the project's observers if its value changed.
+
+        Returns:
+            bool: Whether the value changed.
+        """
+        oldValue = getattr(self, field)
+        if oldValue == value:
+            return False
+        setattr(self, field, value)
+        self._notify(self._changedEventKind, field=field, oldValue=oldValue, newValue=getattr(self, field))
+        return True
+
+
+def _copyValue(value):
+    """Return a copy of a loadable field value, copying lists, dicts and RenderBoyObjects."""
+    if isinstance(value, RenderBoyObject):
+        return value.copy()
+    if isinstance(value, list):
+        return [_copyValue(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _copyValue(item) for key, item in value.items()}
+    return value
+
+
+def serializeRenderBoyObject(o):
+    """Return a json serializable dict for the given object, skipping private attributes."""
+    if isinstance(o, FrameSet):
+        return str(o)
+    if isinstance(o, OrderedSet):
+        return list(o)
+    return o.toDict()
+
+
+def writeJsonAtomically(filePath, data, **kwargs):
+    """Write data to a json file so that readers see either the old file or the new one, never a partial write.
+
+    Arguments:
+        filePath (str): The file to write.
+        data: The data to write.
+        **kwargs: Passed to json.dump.
+    """
+    _writeAtomically(filePath, lambda f: json.dump(data, f, **kwargs))
+
+
+def writeTextAtomically(filePath, text):
+    """Write text, such as json that has already been serialized, so readers never see a partial write."""
+    _writeAtomically(filePath, lambda f: f.write(text))
+
+
+def writeBytesAtomically(filePath, data):
+    """Write bytes, such as an encoded binary project, so readers never see a partial write."""
+    _writeAtomically(filePath, lambda f: f.write(data), binary=True)
+
+
+def _writeAtomically(filePath, write, binary=False):
+    """Write a file by calling write with a temporary file and swapping it in once it is complete.
+
+    The temporary file is opened as text, or as bytes if binary is True.
+    """
+    import tempfile
+
+    directory = os.path.dirname(os.path.abspath(filePath))
+    # Keep the permissions of the file being replaced, rather than the private ones mkstemp uses
+    mode = os.stat(filePath).st_mode & 0o777 if os.path.exists(filePath) else 0o644
+    fd, tempPath = tempfile.mkstemp(prefix=os.path.basename(filePath), suffix=".tmp", dir=directory)
+    try:
+        os.chmod(tempPath, mode)
+        with os.fdopen(fd, "wb") if binary else os.fdopen(fd, "w", encoding="utf-8") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tempPath, filePath)
+    except BaseException:
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+        raise
 
 
 def loadRenderBoyObject(d: dict):
     """Return a RenderBoyObject from the given dict."""
-    objectType = d.get("objectType")
-    newObject = listAllRenderBoyObjects().get(objectType)
-    newObject = newObject()
-
-    if newObject is None:
+    objectClass = renderBoyObjectTypes.get(d.get("objectType"))
+    if objectClass is None:
         return d
 
-    for var in d:
-        if var in vars(newObject):
-            setattr(newObject, var, d[var])
+    newObject = objectClass()
+    fields = objectClass.getLoadableFields()
+    for var, value in d.items():
+        if var in fields:
+            setattr(newObject, var, value)
 
+    newObject._postLoad()
     return newObject
 
 
-def loadProjectFromFile(filePath):
-    """Load a project from the given file path."""
-    with open(filePath, "r") as f:
-        project = json.load(f, object_hook=loadRenderBoyObject)
+@instrumentation.traced("loadProject")
+def loadProjectFromFile(filePath, lazy=False, progress=None, shotLoaded=None):
+    """Load a project from the given file path.
+
+    Arguments:
+        filePath (str): The project file to load: json, a binary project file, a SQLite database (.db or .sqlite), or
+            the folder or manifest of a sharded project.
+        lazy (bool): If True, stream the file and only load the layers and renders of each shot when it is first used.
+        progress (callable): If lazy, called with (bytes read, file size) as shots are read, or (shots read, shot
+            count) for a binary or sharded project or a database.
+        shotLoaded (callable): If lazy, called with each shot as soon as it is read, in file order.
+    """
+    from renderboy.data import projectBinary, projectDatabase, projectShards
+
+    if projectShards.isShardedProject(filePath):
+        return projectShards.loadShardedProject(filePath, lazy, progress, shotLoaded)
+    if projectDatabase.isProjectDatabase(filePath):
+        return projectDatabase.loadProjectDatabase(filePath, lazy, progress, shotLoaded)
+    if projectBinary.isBinaryProjectFile(filePath):
+        project = projectBinary.loadProjectBinary(filePath, lazy, progress, shotLoaded)
+        project.shots.sort(key=lambda x: x.name)
+        return project
+
+    # Building the tree allocates a lot of objects, so pause the cyclic garbage collector until it is done
+    gcWasEnabled = gc.isenabled()
+    gc.disable()
+    try:
+        if lazy:
+            from renderboy.data.projectStream import streamProjectFromFile
+
+            project = streamProjectFromFile(filePath, progress, shotLoaded)
+        else:
+            with open(filePath, "r") as f:
+                project = json.load(f, object_hook=loadRenderBoyObject)
+    finally:
+        if gcWasEnabled:
+            gc.enable()
     project.shots.sort(key=lambda x: x.name)
     return project
 
@@ -40,6 +250,10 @@ def loadProjectFromFile(filePath):
 class Project(RenderBoyObject):
     """A project object. A project may have 0 or more shots."""
 
+    __slots__ = ("name", "notes", "shots", "_shotIndex", "_observers", "_pendingEvents", "_batchDepth")
+
+    _changedEventKind = "projectChanged"
+
     def __init__(self, directory=None):
         """Initialize the project object.
 
@@ -55,42 +269,209 @@ class Project(RenderBoyObject):
         self.name = ""
         self.notes = ""
         self.shots = []
+        self._shotIndex = {}
+        self._observers = []
+        self._pendingEvents = []
+        self._batchDepth = 0
 
         if directory:
             self.generateFromDirectory(directory)
 
-    def generateFromDirectory(self, directory):
+    @instrumentation.traced("scanDirectory")
+    def generateFromDirectory(self, directory, maxWorkers=None, progress=None):
         """Load the project from the given directory.
 
+        Each folder in the directory becomes a shot, with its renders, layers and frame ranges read from the folders
+        and frame files inside it. See renderboy.data.shotScanner for the expected layout.
+
         Arguments:
             directory (str): The directory of the project.
+            maxWorkers (int): The most shot folders to scan at once. Defaults to shotScanner.defaultMaxWorkers.
+            progress (callable): Called with (shots scanned, total shots) as each shot finishes.
         """
-        shotFolders = os.listdir(directory)
-        for shotFolder in shotFolders:
-            shot = Shot()
-            shot.name = shotFolder
-            self.shots.append(shot)
+        from renderboy.data import shotScanner
+
+        shots = shotScanner.scanProjectDirectory(
+            directory, maxWorkers=maxWorkers or shotScanner.defaultMaxWorkers, progress=progress
+        )
+        for shot in shots:
+            self.addShot(shot)
 
+    @instrumentation.traced("saveProject")
     def writeToFile(self, filePath):
         """Write a json file to the given path."""
-        # Lock the file so it can't be opened by another program while writing
+        # Write to a temporary file and swap it in, so the file is never left half written
+        writeJsonAtomically(filePath, self, default=serializeRenderBoyObject, indent=4)
 
-        with open(filePath, "w") as f:
-            json.dump(self, f, default=lambda o: o.__dict__, indent=4)
+    def _postLoad(self):
+        """Rebuild the shot index after loading."""
+        self._rebuildShotIndex()
 
-    def getShot(self, shotName):
-        """Return the shot with the given name."""
+    def _rebuildShotIndex(self, adoptShots=True):
+        """Rebuild the name to shot index from the shot list.
+
+        Arguments:
+            adoptShots (bool): Whether to make this project the one the shots belong to. False when the shots were
+                handed out while loading, so they may already belong to another project.
+        """
+        self._shotIndex = {}
+        for shot in self.shots:
+            if adoptShots:
+                shot._project = self
+            self._shotIndex.setdefault(shot.name, shot)
+
+    def _getProject(self):
+        """Return the project itself."""
+        return self
+
+    def subscribe(self, observer):
+        """Call the observer with a list of ChangeEvents whenever the project, or anything in it, changes.
+
+        Observers are called on the thread that made the change, straight away or at the end of a batch.
+        """
+        if observer not in self._observers:
+            self._observers.append(observer)
+
+    def unsubscribe(self, observer):
+        """Stop calling the observer with changes."""
+        if observer in self._observers:
+            self._observers.remove(observer)
+
+    @contextmanager
+    def batchEvents(self):
+        """Hold back change events until the end of the block, then send them to each observer as one list.
+
+        Batches can be nested, in which case the events are sent when the outermost batch ends. Bulk edits should be
+        made in a batch, so observers such as the window refresh once rather than once per change.
+        """
+        self._batchDepth += 1
+        try:
+            yield
+        finally:
+            self._batchDepth -= 1
+            if self._batchDepth == 0 and self._pendingEvents:
+                events = self._pendingEvents
+                self._pendingEvents = []
+                self._deliverEvents(events)
+
+    def _sendEvent(self, event):
+        """Send an event to the observers, or hold it back until the current batch ends."""
+        if self._batchDepth:
+            self._pendingEvents.append(event)
+        else:
+            self._deliverEvents([event])
+
+    def _deliverEvents(self, events):
+        """Call each observer with the given events."""
+        for observer in list(self._observers):
+            observer(events)
+
+    def addShot(self, shot, index=None):
+        """Add the given shot to the project.
+
+        Arguments:
+            shot (Shot): The shot to add.
+            index (int): Where to insert the shot in the shot list. Defaults to the end.
+        """
+        shot._project = self
+        index = len(self.shots) if index is None else index
+        self.shots.insert(index, shot)
+        if index == len(self.shots) - 1:
+            self._shotIndex.setdefault(shot.name, shot)
+        else:
+            self._reindexShotName(shot.name)
+        self._notify("shotAdded", shot, index=index)
+        return shot
+
+    def removeShot(self, shot):
+        """Remove the given shot from the project.
+
+        Arguments:
+            shot (Shot or str): The shot, or the name of the shot, to remove.
+
+        Returns:
+            bool: Whether the shot was found and removed.
+        """
+        if isinstance(shot, str):
+            shotName = shot
+            shot = self._shotIndex.get(shotName)
+            if shot is None:
+                print(f"WARNING: Shot {shotName} not found.")
+                return False
+
+        for index, projectShot in enumerate(self.shots):
+            if projectShot is shot:
+                break
+        else:
+            print(f"WARNING: Shot {shot.name} not found.")
+            return False
+
+        del self.shots[index]
+        self._notify("shotRemoved", shot, index=index)
+        shot._project = None
+        if self._shotIndex.get(shot.name) is shot:
+            self._reindexShotName(shot.name)
+        return True
+
+    def _shotRenamed(self, shot, oldName):
+        """Update the shot index after a shot has been renamed."""
+        if self._shotIndex.get(oldName) is shot:
+            self._reindexShotName(oldName)
+        self._shotIndex.setdefault(shot.name, shot)
+
+    def _reindexShotName(self, shotName):
+        """Point the index entry for the given name at the first shot that still has it."""
+        self._shotIndex.pop(shotName, None)
         for shot in self.shots:
             if shot.name == shotName:
-                return shot
+                self._shotIndex[shotName] = shot
+                break
+
+    def getSortedIndex(self, shotName):
+        """Return where to add a shot with the given name to keep the shots in name order, after any of the same name.
+
+        Pass it to addShot, so the index in the shotAdded event is where the shot stays.
+        """
+        low, high = 0, len(self.shots)
+        while low < high:
+            middle = (low + high) // 2
+            if shotName < self.shots[middle].name:
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def getShot(self, shotName):
+        """Return the shot with the given name."""
+        shot = self._shotIndex.get(shotName)
+        if instrumentation.enabled:
+            instrumentation.count("getShot")
+        if shot is not None:
+            return shot
 
+        instrumentation.count("getShotMissed")
         print(f"WARNING: Shot {shotName} not found.")
         return None
 
+    def getMissingFrames(self):
+        """Return a dict of shot name to the missing frames of each of its renders, for shots with missing frames."""
+        missingFrames = {}
+        for shot in self.shots:
+            shotMissingFrames = shot.getMissingFrames()
+            if shotMissingFrames:
+                missingFrames[shot.name] = shotMissingFrames
+        return missingFrames
+
 
 class Shot(RenderBoyObject):
     """A shot object. A shot may have 0 or more layers and renders."""
 
+    __slots__ = (
+        "name", "notes", "_layers", "_renders", "frameStart", "frameEnd", "_layerIndex", "_lazyContent", "_project"
+    )
+
+    _changedEventKind = "shotChanged"
+
     def __init__(self):
         """Initialize the shot object.
 
@@ -106,67 +487,423 @@ class Shot(RenderBoyObject):
 
         self.name = ""
         self.notes = ""
-        self.layers = []
-        self.renders = []
+        self._layers = []
+        self._renders = []
         self.frameStart = 0
         self.frameEnd = 0
+        self._layerIndex = {}
+        self._lazyContent = None
+        self._project = None
+
+    @property
+    def layers(self):
+        """The layers for the shot."""
+        if self._lazyContent is not None:
+            self.loadContent()
+        return self._layers
+
+    @layers.setter
+    def layers(self, value):
+        self.loadContent()
+        self._layers = value
+        self._rebuildLayerIndex()
+
+    @property
+    def renders(self):
+        """The renders for the shot."""
+        if self._lazyContent is not None:
+            self.loadContent()
+        return self._renders
+
+    @renders.setter
+    def renders(self, value):
+        self.loadContent()
+        self._renders = value
+        for render in value:
+            render._shot = self
+
+    @property
+    def isLoaded(self):
+        """Whether the layers and renders for the shot have been loaded."""
+        return self._lazyContent is None
+
+    def _setLazyContent(self, lazyContent):
+        """Defer loading the layers and renders until they are first used.
 
-    def addLayer(self):
-        """Add a layer to the shot."""
-        layer = Layer()
-        layer.name = f"Layer {len(self.layers) + 1}"
-        self.layers.append(layer)
-        return layer
+        Arguments:
+            lazyContent (LazyShotContent): An object whose load() method returns a dict of the deferred fields.
+        """
+        self._lazyContent = lazyContent
+
+    def toDict(self):
+        """Return a json serializable dict of the shot, without keeping any content that had not been loaded."""
+        if self._lazyContent is None:
+            return super().toDict()
+
+        content = self._lazyContent.load()
+        d = {"objectType": self.objectType}
+        for key in type(self).getLoadableFields():
+            d[key] = content[key] if key in content else getattr(self, key)
+        return d
 
-    def removeLayer(self, layerName):
-        """Remove the given layer from the shot."""
+    def copy(self):
+        """Return a copy of the shot. A shot that hasn't been loaded yet shares its unloaded content with the copy."""
+        if self._lazyContent is None:
+            return super().copy()
+
+        newShot = Shot()
+        for key in Shot.getLoadableFields():
+            if key not in ("layers", "renders"):
+                setattr(newShot, key, _copyValue(getattr(self, key)))
+        newShot._setLazyContent(self._lazyContent)
+        return newShot
+
+    def loadContent(self):
+        """Load the layers and renders for the shot if they have not been loaded yet."""
+        if self._lazyContent is None:
+            return
+
+        with instrumentation.span("loadShotContent"):
+            content = self._lazyContent.load()
+        self._setContent(content)
+
+    def _setContent(self, content):
+        """Set the layers and renders of the shot from a dict of loaded content, in place of its unloaded content."""
+        self._lazyContent = None
+        if "layers" in content:
+            self._layers = content["layers"]
+        if "renders" in content:
+            self._renders = content["renders"]
+            for render in self._renders:
+                render._shot = self
+        self._rebuildLayerIndex()
+
+    def _getProject(self):
+        """Return the project the shot belongs to, or None."""
+        return self._project
+
+    def rename(self, newName):
+        """Rename the shot."""
+        oldName = self.name
+        if newName == oldName:
+            return
+        # Content still on disk is found again by the shot's name once the file is rewritten, so read it first
+        self.loadContent()
+        self.name = newName
+        if self._project is not None:
+            self._project._shotRenamed(self, oldName)
+        self._notify("shotChanged", field="name", oldValue=oldName, newValue=newName)
+
+    def setField(self, field, value):
+        """Set a field of the shot, renaming it if the field is its name."""
+        if field == "name":
+            oldName = self.name
+            self.rename(value)
+            return oldName != value
+        return super().setField(field, value)
+
+    def _getShot(self):
+        """Return the shot itself."""
+        return self
+
+    def _rebuildLayerIndex(self):
+        """Rebuild the name to layer index from the layer list."""
+        self._layerIndex = {}
+        for layer in self._layers:
+            layer._shot = self
+            self._layerIndex.setdefault(layer.name, layer)
+
+    def _reindexLayerName(self, layerName):
+        """Point the index entry for the given name at the first layer that still has it."""
+        self._layerIndex.pop(layerName, None)
         for layer in self.layers:
             if layer.name == layerName:
-                del self.layers[self.layers.index(layer)]
-                return True
+                self._layerIndex[layerName] = layer
+                break
 
-        print(f"WARNING: Layer {layerName} not found.")
-        return False
+    def _layerRenamed(self, layer, oldName):
+        """Update the layer index after a layer has been renamed."""
+        if self._layerIndex.get(oldName) is layer:
+            self._reindexLayerName(oldName)
+        self._layerIndex.setdefault(layer.name, layer)
+
+    def addLayer(self, layer=None, index=None):
+        """Add a layer to the shot.
+
+        Arguments:
+            layer (Layer): The layer to add. Defaults to a new layer named after the next free layer number.
+            index (int): Where to insert the layer in the layer list. Defaults to the end.
+        """
+        self.loadContent()
+        if layer is None:
+            layerNumber = len(self.layers) + 1
+            while f"Layer {layerNumber}" in self._layerIndex:
+                layerNumber += 1
+
+            layer = Layer()
+            layer.name = f"Layer {layerNumber}"
+
+        layer._shot = self
+        index = len(self.layers) if index is None else index
+        self.layers.insert(index, layer)
+        if index == len(self.layers) - 1:
+            self._layerIndex.setdefault(layer.name, layer)
+        else:
+            self._reindexLayerName(layer.name)
+        self._notify("layerAdded", layer, index=index)
+        return layer
+
+    def removeLayer(self, layer):
+        """Remove the given layer from the shot.
+
+        Arguments:
+            layer (Layer or str): The layer, or the name of the layer, to remove.
+
+        Returns:
+            bool: Whether the layer was found and removed.
+        """
+        self.loadContent()
+        if isinstance(layer, str):
+            layerName = layer
+            layer = self._layerIndex.get(layerName)
+            if layer is None:
+                print(f"WARNING: Layer {layerName} not found.")
+                return False
+
+        for index, shotLayer in enumerate(self.layers):
+            if shotLayer is layer:
+                break
+        else:
+            print(f"WARNING: Layer {layer.name} not found.")
+            return False
+
+        del self.layers[index]
+        self._reindexLayerName(layer.name)
+        self._notify("layerRemoved", layer, index=index)
+        layer._shot = None
+        return True
 
     def getLayer(self, layerName):
         """Return the layer with the given name."""
-        for layer in self.layers:
-            if layer.name == layerName:
-                return layer
-
+        self.loadContent()
+        layer = self._layerIndex.get(layerName)
+        if instrumentation.enabled:
+            instrumentation.count("getLayer")
+        if layer is not None:
+            return layer
+
+        instrumentation.count("getLayerMissed")
         print(f"WARNING: Layer {layerName} not found.")
         return None
 
+    def addRender(self, render, index=None):
+        """Add the given render to the shot.
+
+        Arguments:
+            render (Render): The render to add.
+            index (int): Where to insert the render in the render list. Defaults to the end.
+        """
+        render._shot = self
+        index = len(self.renders) if index is None else index
+        self.renders.insert(index, render)
+        self._notify("renderAdded", render, index=index)
+        return render
+
+    def removeRender(self, render):
+        """Remove the given render from the shot.
+
+        Returns:
+            bool: Whether the render was found and removed.
+        """
+        for index, shotRender in enumerate(self.renders):
+            if shotRender is render:
+                break
+        else:
+            print(f"WARNING: Render {render.name} not found.")
+            return False
+
+        del self.renders[index]
+        self._notify("renderRemoved", render, index=index)
+        render._shot = None
+        return True
+
+    def getRenderedFrames(self):
+        """Return a FrameSet of the frames rendered by any of the shot's renders."""
+        renderedFrames = FrameSet()
+        for render in self.renders:
+            if render.frames is not None:
+                renderedFrames = renderedFrames | render.frames
+        return renderedFrames
+
+    def getMissingFrames(self):
+        """Return a dict of render name to FrameSet of missing frames, for renders with missing frames."""
+        missingFrames = {}
+        for render in self.renders:
+            renderMissingFrames = render.getMissingFrames()
+            if renderMissingFrames:
+                missingFrames[render.name] = renderMissingFrames
+        return missingFrames
+
+
+def _layerListProperty(listType):
+    """Return a property for a membership list of a layer, which keeps whatever it is set to as an OrderedSet."""
+    attributeName = "_" + listType
+
+    def getList(self):
+        return getattr(self, attributeName)
+
+    def setList(self, value):
+        setattr(self, attributeName, OrderedSet([value] if isinstance(value, str) else value))
+
+    return property(getList, setList, doc=f"The {listType} list of the layer, as an OrderedSet of object paths.")
+
 
 class Layer(RenderBoyObject):
     """A layer object. A shot may have 0 or more layers."""
 
+    __slots__ = ("name", "notes", "_exclude", "_matte", "_phantom", "_shot")
+
+    _changedEventKind = "layerChanged"
+    # The membership lists of a layer
+    listTypes = ("exclude", "matte", "phantom")
+    # How mergeList can combine a list with other entries
+    mergeOperations = ("union", "intersection", "difference")
+
+    exclude = _layerListProperty("exclude")
+    matte = _layerListProperty("matte")
+    phantom = _layerListProperty("phantom")
+
     def __init__(self):
         """Initialize the layer object.
 
         Parameters:
             name (str): The name of the layer.
             notes (str): Any notes about the layer.
-            exclude (list): The exclude list for the layer.
-            matte (list): The matte list for the layer.
-            phantom (list): The phantom list for the layer.
+            exclude (OrderedSet): The exclude list for the layer.
+            matte (OrderedSet): The matte list for the layer.
+            phantom (OrderedSet): The phantom list for the layer.
         """
         super().__init__()
 
         self.name = ""
         self.notes = ""
-        self.exclude = []
-        self.matte = []
-        self.phantom = []
+        self._exclude = OrderedSet()
+        self._matte = OrderedSet()
+        self._phantom = OrderedSet()
+        self._shot = None
+
+    @staticmethod
+    def splitListText(text):
+        """Return the entries in text pasted into a list, separated by whitespace or commas, e.g. a copied selection."""
+        return text.replace(",", " ").split()
+
+    def toDict(self):
+        """Return a json serializable dict of the layer's loadable fields, with its lists as lists."""
+        d = super().toDict()
+        for listType in Layer.listTypes:
+            d[listType] = list(d[listType])
+        return d
+
+    def _getProject(self):
+        """Return the project the layer belongs to, or None."""
+        return self._shot._project if self._shot is not None else None
+
+    def _getShot(self):
+        """Return the shot the layer belongs to, or None."""
+        return self._shot
 
     def rename(self, newName):
         """Rename the layer."""
+        oldName = self.name
+        if newName == oldName:
+            return
         self.name = newName
+        if self._shot is not None:
+            self._shot._layerRenamed(self, oldName)
+        self._notify("layerRenamed", field="name", oldValue=oldName, newValue=newName)
+
+    def setField(self, field, value):
+        """Set a field of the layer, renaming it if the field is its name."""
+        if field == "name":
+            oldName = self.name
+            self.rename(value)
+            return oldName != value
+        if field in Layer.listTypes:
+            # The event holds lists rather than the OrderedSet, which keeps changing in place after it is sent
+            oldEntries = list(getattr(self, field))
+            setattr(self, field, value)
+            newEntries = list(getattr(self, field))
+            if newEntries == oldEntries:
+                return False
+            self._notify(self._changedEventKind, field=field, oldValue=oldEntries, newValue=newEntries)
+            return True
+        return super().setField(field, value)
+
+    def addToList(self, listType, entries, positions=None):
+        """Add entries to the exclude, matte or phantom list of the layer, skipping any it already has.
+
+        Arguments:
+            listType (str): The list to add to. One of Layer.listTypes.
+            entries (iterable): The entries to add, in order.
+            positions (list): Where each entry should end up in the list, in ascending order. Defaults to the end.
+
+        Returns:
+            list: The entries that were added, in order.
+        """
+        listEntries = getattr(self, listType)
+        if positions is None:
+            start = len(listEntries)
+            added = listEntries.update(entries)
+            positions = list(range(start, start + len(added)))
+        else:
+            positions, added = listEntries.insertAll(list(positions), list(entries))
+        if added:
+            self._notify("layerListChanged", field=listType, oldValue=[], newValue=added, index=positions)
+        return added
+
+    def removeFromList(self, listType, entries):
+        """Remove entries from the exclude, matte or phantom list of the layer, ignoring any it doesn't have.
+
+        Returns:
+            list: The entries that were removed, in the order they were in the list.
+        """
+        positions, removed = getattr(self, listType).discardAll(entries)
+        if removed:
+            self._notify("layerListChanged", field=listType, oldValue=removed, newValue=[], index=positions)
+        return removed
+
+    def mergeList(self, listType, entries, operation="union"):
+        """Combine the exclude, matte or phantom list of the layer with other entries, such as another layer's list.
+
+        Arguments:
+            listType (str): The list to change. One of Layer.listTypes.
+            entries (iterable): The entries to combine the list with.
+            operation (str): One of Layer.mergeOperations. "union" adds the entries the list doesn't have,
+                "intersection" keeps only the entries that are among them, and "difference" removes them.
+
+        Returns:
+            bool: Whether the list changed.
+        """
+        if operation == "union":
+            return bool(self.addToList(listType, entries))
+        if operation == "intersection":
+            keep = entries if isinstance(entries, (OrderedSet, set, frozenset)) else set(entries)
+            dropped = [entry for entry in getattr(self, listType) if entry not in keep]
+            return bool(self.removeFromList(listType, dropped))
+        if operation == "difference":
+            return bool(self.removeFromList(listType, entries))
+        raise ValueError(f"Unknown merge operation {operation}. Use one of {', '.join(Layer.mergeOperations)}.")
 
 
 class Render(RenderBoyObject):
     """A render object. A shot may have 0 or more renders."""
 
+    __slots__ = (
+        "name", "author", "notes", "frameStart", "frameEnd", "resolution", "layers", "_frames", "_shot", "_renderJob"
+    )
+
+    _changedEventKind = "renderChanged"
+
     def __init__(self) -> None:
         """Initialize the render object.
 
@@ -178,6 +915,7 @@ class Render(RenderBoyObject):
             frameEnd (int): The end frame of the render.
             resolution (str): The resolution of the render.
             layers (list): The layers of the render.
+            frames (FrameSet): The frames found on disk, or None if the render hasn't been scanned.
         """
         super().__init__()
 
@@ -188,19 +926,45 @@ class Render(RenderBoyObject):
         self.frameEnd = 0
         self.resolution = ""
         self.layers = []
+        self._frames = None
+        self._shot = None
+        self._renderJob = None
 
+    @property
+    def frames(self):
+        """The frames found on disk, or None if the render hasn't been scanned."""
+        return self._frames
 
-def listAllRenderBoyObjects():
-    """Return a dict of the names of all renderboy objects and their classes."""
-    classes = {}
+    @frames.setter
+    def frames(self, value):
+        # Frame sets are saved as strings such as "1001-1050,1052-1100"
+        self._frames = FrameSet.fromString(value) if isinstance(value, str) else value
 
-    # Load the dictionary with all subclasses of RenderBoyObject
-    for cls in RenderBoyObject.__subclasses__():
-        classes[cls.__name__] = cls
-        for subcls in cls.__subclasses__():
-            classes[subcls.__name__] = subcls
+    def _getProject(self):
+        """Return the project the render belongs to, or None."""
+        return self._shot._project if self._shot is not None else None
 
-    return classes
+    def _getShot(self):
+        """Return the shot the render belongs to, or None."""
+        return self._shot
+
+    def getMissingFrames(self):
+        """Return a FrameSet of the frames from frameStart to frameEnd that aren't on disk.
+
+        Renders that haven't been scanned have no missing frames.
+        """
+        if self._frames is None:
+            return FrameSet()
+        return self._frames.missing(self.frameStart, self.frameEnd)
+
+    def getRenderJob(self):
+        """Return the last RenderJob made to render the render locally, or None. Render jobs aren't saved."""
+        return self._renderJob
+
+
+def listAllRenderBoyObjects():
+    """Return a dict of the names of all renderboy objects and their classes."""
+    return dict(renderBoyObjectTypes)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,317 @@
+"""A trigram index for fuzzy searching the shots of a project by name, layers, notes and layer membership lists."""
+
+
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+
+from renderboy.data import instrumentation
+
+
+_wordPattern = re.compile(r"[0-9a-z]+")
+
+# How much a match in each field counts towards a shot's score
+fieldWeights = {
+    "name": 1.0,
+    "layer": 0.8,
+    "exclude": 0.6,
+    "matte": 0.6,
+    "phantom": 0.6,
+    "notes": 0.4,
+    "layerNotes": 0.4,
+}
+
+# Fields of a layer that are indexed, with the field of the index they are stored under
+_layerFields = (("name", "layer"), ("notes", "layerNotes"), ("exclude", "exclude"), ("matte", "matte"),
+                ("phantom", "phantom"))
+
+
+@lru_cache(maxsize=1 << 16)
+def _getWordTrigrams(word):
+    """Return the trigrams of a word, plus its one and two letter prefixes."""
+    return ("  " + word[0], " " + word[:2]) + tuple(word[i:i + 3] for i in range(len(word) - 2))
+
+
+def getTrigrams(text):
+    """Return the trigrams of every word in the text, plus one and two letter prefixes of each word.
+
+    The prefixes let queries shorter than three letters find words that start with them.
+    """
+    trigrams = set()
+    # Names and membership lists repeat the same words many times over
+    for word in set(_wordPattern.findall(text.lower())):
+        trigrams.update(_getWordTrigrams(word))
+    return trigrams
+
+
+def getQueryTrigrams(query):
+    """Return the trigrams to look up for a query.
+
+    Words of three letters or more match anywhere in a word. Shorter words only match the start of a word.
+    """
+    trigrams = set()
+    for word in _wordPattern.findall(query.lower()):
+        if len(word) == 1:
+            trigrams.add("  " + word)
+        elif len(word) == 2:
+            trigrams.add(" " + word)
+        else:
+            for i in range(len(word) - 2):
+                trigrams.add(word[i:i + 3])
+    return trigrams
+
+
+def _getShotLayers(shot):
+    """Return the layers of a shot, reading them without keeping them if the shot hasn't been loaded yet."""
+    # The shot may be loaded on another thread in the meantime
+    content = shot._lazyContent
+    if content is None:
+        return shot.layers
+    return content.load().get("layers", [])
+
+
+class SearchIndex:
+    """Finds shots whose name, notes, layers or layer membership lists contain words similar to a query.
+
+    Each field of each shot is a document, keyed by (shot name, field), with the layer fields of all of a shot's layers
+    indexed together. Layers of a shot tend to share their membership entries, so this keeps the posting lists short,
+    and editing a layer only re-indexes the layer fields of its shot. A shot's score is the best of its documents: the
+    fraction of the query's trigrams found in the document, times the weight of the field. Shots whose name contains
+    the query score higher still.
+
+    Shots whose layers haven't been loaded are indexed by their name and notes, which are read with the shot. Their
+    layers are read without keeping them on a background thread once indexLayersInBackground is called, and any still
+    waiting to be read when a search is made are read then, so no shot is left out of a search.
+    """
+
+    def __init__(self, minSimilarity=0.5, relativeCutoff=0.5):
+        """Initialize an empty index.
+
+        Arguments:
+            minSimilarity (float): The fraction of a query's trigrams a document must contain to match it.
+            relativeCutoff (float): The fraction of the best score a shot must reach to be returned.
+        """
+        self.minSimilarity = minSimilarity
+        self.relativeCutoff = relativeCutoff
+        # Trigram to the ids of the documents that contain it
+        self._postings = {}
+        # Document key to its id, and id to its key and trigrams
+        self._documentIds = {}
+        self._documents = {}
+        self._nextDocumentId = 0
+        # Shot name to the keys of its documents
+        self._shotDocuments = {}
+        # Shot name to shots whose layers haven't been indexed yet
+        self._pendingShots = {}
+        # Held while the index is changed, since the layers of pending shots can be indexed on another thread
+        self._lock = threading.RLock()
+        self._readsLayersInBackground = False
+        self._layerReader = None
+
+    @classmethod
+    @instrumentation.traced("buildSearchIndex")
+    def fromProject(cls, project, readLayers=False, **kwargs):
+        """Return an index of every shot in the project.
+
+        Arguments:
+            project (Project): The project to index.
+            readLayers (bool): Also read the layers of shots that haven't been loaded now, without keeping them, rather
+                than at the first search.
+        """
+        index = cls(**kwargs)
+        for shot in project.shots:
+            index.addShot(shot)
+        if readLayers:
+            index._indexPendingLayers()
+        return index
+
+    def indexLayersInBackground(self):
+        """Read and index the layers of shots that haven't been loaded on a background thread, now and as they are
+        added, so searches don't have to read them.
+        """
+        with self._lock:
+            self._readsLayersInBackground = True
+            self._startLayerReader()
+
+    def _startLayerReader(self):
+        """Start the thread reading the layers of pending shots, if it isn't running. Must be called with the lock."""
+        if self._pendingShots and self._layerReader is None:
+            self._layerReader = threading.Thread(target=self._readPendingLayers, name="RenderBoySearch", daemon=True)
+            self._layerReader.start()
+
+    def _readPendingLayers(self):
+        """Index the layers of pending shots one at a time, reading each without holding the lock."""
+        while True:
+            with self._lock:
+                if not self._pendingShots:
+                    self._layerReader = None
+                    return
+                shotName, shot = next(iter(self._pendingShots.items()))
+            try:
+                layers = _getShotLayers(shot)
+            except Exception as error:
+                # Left for the next search to read, which reports the error
+                print(f"WARNING: Could not read the layers of {shotName} to search them: {error}")
+                with self._lock:
+                    self._layerReader = None
+                return
+            with self._lock:
+                # The shot may have been removed, renamed or indexed while it was read
+                if self._pendingShots.get(shotName) is shot:
+                    del self._pendingShots[shotName]
+                    self._addLayerDocuments(shot, layers)
+
+    def _addDocument(self, key, text):
+        """Index the text under the given document key, replacing anything indexed under it before."""
+        self._removeDocument(key)
+        trigrams = getTrigrams(text) if text else set()
+        if not trigrams:
+            return
+        documentId = self._nextDocumentId
+        self._nextDocumentId += 1
+        self._documentIds[key] = documentId
+        self._documents[documentId] = (key, trigrams)
+        self._shotDocuments.setdefault(key[0], set()).add(key)
+        postings = self._postings
+        for trigram in trigrams:
+            documentIds = postings.get(trigram)
+            if documentIds is None:
+                postings[trigram] = {documentId}
+            else:
+                documentIds.add(documentId)
+
+    def _removeDocument(self, key):
+        """Remove a document from the index, if it was indexed."""
+        documentId = self._documentIds.pop(key, None)
+        if documentId is None:
+            return
+        _, trigrams = self._documents.pop(documentId)
+        for trigram in trigrams:
+            documentIds = self._postings[trigram]
+            documentIds.discard(documentId)
+            if not documentIds:
+                del self._postings[trigram]
+        shotDocuments = self._shotDocuments[key[0]]
+        shotDocuments.discard(key)
+        if not shotDocuments:
+            del self._shotDocuments[key[0]]
+
+    def addShot(self, shot):
+        """Index a shot, and its layers if they have been loaded."""
+        with self._lock:
+            self.removeShot(shot.name)
+            self._addDocument((shot.name, "name"), shot.name)
+            self._addDocument((shot.name, "notes"), shot.notes)
+            if shot.isLoaded:
+                self._addLayerDocuments(shot, shot.layers)
+            else:
+                self._pendingShots[shot.name] = shot
+                if self._readsLayersInBackground:
+                    self._startLayerReader()
+
+    updateShot = addShot
+
+    def removeShot(self, shotName):
+        """Remove a shot and all of its layers from the index."""
+        with self._lock:
+            self._pendingShots.pop(shotName, None)
+            for key in list(self._shotDocuments.get(shotName, ())):
+                self._removeDocument(key)
+
+    def renameShot(self, shot, oldName):
+        """Index a shot again under its new name, dropping the documents indexed under its old name."""
+        with self._lock:
+            self.removeShot(oldName)
+            self.addShot(shot)
+
+    def updateLayers(self, shot, attributes=None):
+        """Re-index the layers of a shot after a layer was added, removed, renamed or edited.
+
+        Arguments:
+            shot (Shot): The shot whose layers changed.
+            attributes (iterable): The layer attributes that changed, e.g. ("name",) after a layer was renamed.
+                Defaults to all of them.
+        """
+        with self._lock:
+            if self._pendingShots.pop(shot.name, None) is not None:
+                # None of the shot's layers were indexed yet
+                attributes = None
+            self._addLayerDocuments(shot, shot.layers, attributes)
+
+    def _addLayerDocuments(self, shot, layers, attributes=None):
+        """Index the layer fields of the given layers of a shot, or only those of the given attributes."""
+        for attribute, field in _layerFields:
+            if attributes is not None and attribute not in attributes:
+                continue
+            words = []
+            for layer in layers:
+                value = getattr(layer, attribute)
+                if isinstance(value, str):
+                    words.append(value)
+                else:
+                    words.extend(value)
+            self._addDocument((shot.name, field), " ".join(words))
+
+    def _indexPendingLayers(self):
+        """Index the layers of every pending shot, reading those that haven't been loaded. Must be called with the
+        lock held.
+        """
+        for shotName, shot in list(self._pendingShots.items()):
+            self._addLayerDocuments(shot, _getShotLayers(shot))
+            del self._pendingShots[shotName]
+
+    @instrumentation.traced("searchIndex")
+    def search(self, query, limit=None):
+        """Return the shots matching the query, best first.
+
+        Arguments:
+            query (str): The text to search for.
+            limit (int): The most results to return. Defaults to all of them.
+
+        Returns:
+            list: (shot name, score) for each matching shot, sorted by score and then name.
+        """
+        queryTrigrams = getQueryTrigrams(query)
+        if not queryTrigrams:
+            return []
+
+        with self._lock:
+            # Shots only matching by their layers would be missed otherwise
+            self._indexPendingLayers()
+            scores = self._scoreDocuments(queryTrigrams)
+
+        # Shots named like the query rank above fuzzy matches
+        loweredQuery = query.strip().lower()
+        for shotName in scores:
+            loweredName = shotName.lower()
+            if loweredName.startswith(loweredQuery):
+                scores[shotName] += 1.5
+            elif loweredQuery in loweredName:
+                scores[shotName] += 1.0
+
+        # Drop weak fuzzy matches when there are much better ones
+        cutoff = max(scores.values(), default=0.0) * self.relativeCutoff
+        results = sorted(
+            ((shotName, score) for shotName, score in scores.items() if score >= cutoff),
+            key=lambda item: (-item[1], item[0]),
+        )
+        return results[:limit] if limit is not None else results
+
+    def _scoreDocuments(self, queryTrigrams):
+        """Return a dict of each shot with a document matching the query trigrams and its best document's score."""
+        matches = Counter()
+        for trigram in queryTrigrams:
+            matches.update(self._postings.get(trigram, ()))
+
+        scores = {}
+        minCount = self.minSimilarity * len(queryTrigrams)
+        for documentId, count in matches.items():
+            if count < minCount:
+                continue
+            key = self._documents[documentId][0]
+            shotName = key[0]
+            score = count / len(queryTrigrams) * fieldWeights[key[1]]
+            if score > scores.get(shotName, 0.0):
+                scores[shotName] = score
+        return scores
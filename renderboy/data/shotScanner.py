@@ -0,0 +1,199 @@
+"""Discover shots, layers and renders from a project directory on disk.
+
+A project directory holds one folder per shot. Each folder under a shot is a render. A render either holds its frame
+files directly, or holds one folder of frames per render layer:
+
+    project/
+        sh010/
+            lighting_v001/
+                beauty/beauty.1001.exr
+                shadow/shadow.1001.exr
+            comp_v002/
+                sh010_comp.1001.exr
+"""
+
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import renderboy.data.renderTypes as rbTypes
+from renderboy.data import instrumentation
+from renderboy.data.frameSet import FrameSet
+
+
+# Matches the frame number of a frame file, e.g. beauty.1001.exr or beauty_1001.exr
+_framePattern = re.compile(r"[._](\d+)\.[^.]+$")
+
+defaultMaxWorkers = 16
+
+
+def getFrameNumber(fileName):
+    """Return the frame number of the given frame file name, or None if it isn't a frame file."""
+    match = _framePattern.search(fileName)
+    return int(match.group(1)) if match else None
+
+
+def getRenderDirectory(projectDirectory, shotName, renderName, layerName=None):
+    """Return the directory holding the frames of a render, or of one of its layers."""
+    if layerName:
+        return os.path.join(projectDirectory, shotName, renderName, layerName)
+    return os.path.join(projectDirectory, shotName, renderName)
+
+
+def listFrameFiles(directory):
+    """Return a dict of frame number to the path of each frame file in the directory. Empty if it can't be read."""
+    frameFiles = {}
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                frame = getFrameNumber(entry.name)
+                if frame is not None and not entry.name.startswith("."):
+                    frameFiles[frame] = entry.path
+    except OSError as e:
+        print(f"WARNING: Could not read {directory}: {e}")
+    return frameFiles
+
+
+def _listDirectory(path, directoryStats=None, key=None):
+    """Return the sub directories and frame numbers directly inside the given directory.
+
+    Arguments:
+        path (str): The directory to list.
+        directoryStats (dict): If given, the directory's [mtime, inode, entry count] is stored in it under key.
+        key (str): The key to store the directory's stats under.
+
+    Returns:
+        tuple: A list of (name, path) for each sub directory and a list of frame numbers.
+    """
+    directories = []
+    frames = []
+    try:
+        # Stat before listing, so anything added while listing makes the stored mtime out of date
+        stat = os.stat(path) if directoryStats is not None else None
+        entryCount = 0
+        with os.scandir(path) as entries:
+            for entry in entries:
+                entryCount += 1
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir():
+                    directories.append((entry.name, entry.path))
+                else:
+                    frame = getFrameNumber(entry.name)
+                    if frame is not None:
+                        frames.append(frame)
+        if stat is not None:
+            directoryStats[key] = [stat.st_mtime_ns, stat.st_ino, entryCount]
+    except OSError as e:
+        print(f"WARNING: Could not read {path}: {e}")
+    return directories, frames
+
+
+def scanRender(name, path, directoryStats=None):
+    """Return a render built from the given render directory, or None if it holds no frames.
+
+    Arguments:
+        name (str): The name of the render.
+        path (str): The render directory.
+        directoryStats (dict): If given, the stats of each directory read are stored in it, keyed by their path
+            relative to the shot.
+    """
+    layerDirectories, renderFrames = _listDirectory(path, directoryStats, name)
+
+    # A frame is only complete if every layer has it
+    allFrames = FrameSet.fromFrames(renderFrames)
+    completeFrames = allFrames if renderFrames else None
+    layerNames = []
+    for layerName, layerPath in sorted(layerDirectories):
+        _, layerFrames = _listDirectory(layerPath, directoryStats, f"{name}/{layerName}")
+        if layerFrames:
+            layerNames.append(layerName)
+            layerFrameSet = FrameSet.fromFrames(layerFrames)
+            allFrames = allFrames | layerFrameSet
+            completeFrames = layerFrameSet if completeFrames is None else completeFrames & layerFrameSet
+
+    if not allFrames:
+        return None
+
+    render = rbTypes.Render()
+    render.name = name
+    render.frameStart = allFrames.first
+    render.frameEnd = allFrames.last
+    render.layers = layerNames
+    render.frames = completeFrames
+    return render
+
+
+@instrumentation.traced("scanShot")
+def scanShot(name, path, directoryStats=None):
+    """Return a shot built from the given shot directory.
+
+    Arguments:
+        name (str): The name of the shot.
+        path (str): The shot directory.
+        directoryStats (dict): If given, the stats of each directory read are stored in it, keyed by their path
+            relative to the shot, with the shot directory itself under "".
+    """
+    shot = rbTypes.Shot()
+    shot.name = name
+
+    renderDirectories, _ = _listDirectory(path, directoryStats, "")
+    renders = []
+    for renderName, renderPath in sorted(renderDirectories):
+        render = scanRender(renderName, renderPath, directoryStats)
+        if render is not None:
+            renders.append(render)
+    shot.renders = renders
+
+    layerNames = sorted({layerName for render in renders for layerName in render.layers})
+    layers = []
+    for layerName in layerNames:
+        layer = rbTypes.Layer()
+        layer.name = layerName
+        layers.append(layer)
+    shot.layers = layers
+
+    if renders:
+        shot.frameStart = min(render.frameStart for render in renders)
+        shot.frameEnd = max(render.frameEnd for render in renders)
+    return shot
+
+
+def listShotDirectories(directory, directoryStats=None):
+    """Return (name, path) for each shot folder in the project directory, skipping files and hidden folders.
+
+    Arguments:
+        directory (str): The project directory.
+        directoryStats (dict): If given, the stats of the project directory are stored in it under "".
+    """
+    shotDirectories, _ = _listDirectory(directory, directoryStats, "")
+    return sorted(shotDirectories)
+
+
+def scanProjectDirectory(directory, maxWorkers=defaultMaxWorkers, progress=None):
+    """Return a shot for each shot folder in the project directory, scanning the folders concurrently.
+
+    Arguments:
+        directory (str): The project directory.
+        maxWorkers (int): The most shot folders to scan at once.
+        progress (callable): Called with (shots scanned, total shots) as each shot finishes.
+
+    Returns:
+        list: The shots, sorted by name.
+    """
+    shotDirectories = listShotDirectories(directory)
+    total = len(shotDirectories)
+    if progress:
+        progress(0, total)
+
+    shots = []
+    with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+        futures = [executor.submit(scanShot, name, path) for name, path in shotDirectories]
+        for completed, future in enumerate(as_completed(futures), 1):
+            shots.append(future.result())
+            if progress:
+                progress(completed, total)
+
+    shots.sort(key=lambda shot: shot.name)
+    return shots
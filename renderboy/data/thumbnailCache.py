@@ -0,0 +1,154 @@
+"""A size-bounded disk cache of thumbnails, dropping the least recently used thumbnails first.
+
+Thumbnails are keyed by the path, modification time and size of the frame they were made from, so a frame that is
+rendered again gets a new thumbnail. Using a thumbnail touches its file, so which thumbnails were used recently is
+remembered between sessions.
+"""
+
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+defaultMaxBytes = 256 << 20
+
+
+class ThumbnailCache:
+    """Thumbnails stored as files in a directory, kept under a total size. Safe to use from several threads."""
+
+    def __init__(self, directory, maxBytes=defaultMaxBytes):
+        """Initialize the cache. The directory is read the first time the cache is used.
+
+        Arguments:
+            directory (str): The directory to keep thumbnails in. Created if it doesn't exist.
+            maxBytes (int): The most bytes of thumbnails to keep.
+        """
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.metrics = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+        self._lock = threading.Lock()
+        # Key to file size, least recently used first
+        self._entries = None
+        self._size = 0
+
+    @staticmethod
+    def makeKey(path, thumbnailSize):
+        """Return the cache key of the thumbnail of a frame.
+
+        Arguments:
+            path (str): The frame file.
+            thumbnailSize (tuple): The (width, height) the thumbnail fits in.
+
+        Raises:
+            OSError: If the frame file can't be read.
+        """
+        stat = os.stat(path)
+        text = f"{os.path.normcase(os.path.abspath(path))}\0{stat.st_mtime_ns}\0{stat.st_size}\0{thumbnailSize}"
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    @property
+    def size(self):
+        """The bytes of thumbnails in the cache."""
+        with self._lock:
+            self._readEntries()
+            return self._size
+
+    def _getPath(self, key):
+        """Return the file a thumbnail is kept in, spread over sub directories so none gets too large."""
+        return os.path.join(self.directory, key[:2], key)
+
+    def _readEntries(self):
+        """Read the thumbnails already in the directory, oldest first. Must be called with the lock held."""
+        if self._entries is not None:
+            return
+
+        found = []
+        if os.path.isdir(self.directory):
+            for folder in os.scandir(self.directory):
+                if not folder.is_dir():
+                    continue
+                for entry in os.scandir(folder.path):
+                    if entry.name.endswith(".tmp"):
+                        continue
+                    stat = entry.stat()
+                    found.append((stat.st_mtime_ns, entry.name, stat.st_size))
+        found.sort()
+
+        self._entries = OrderedDict((key, size) for _, key, size in found)
+        self._size = sum(size for _, _, size in found)
+        # The cache may have been left over a smaller size
+        self._removeFiles(self._evict())
+
+    def get(self, key):
+        """Return the thumbnail data kept under the key, or None if there isn't any."""
+        path = self._getPath(key)
+        with self._lock:
+            self._readEntries()
+            if key not in self._entries:
+                self.metrics["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.metrics["hits"] += 1
+
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            # Removed by something else
+            with self._lock:
+                self._size -= self._entries.pop(key, 0)
+            return None
+        return data
+
+    def put(self, key, data):
+        """Keep thumbnail data under the key, dropping the least recently used thumbnails to stay under the size."""
+        path = self._getPath(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written under a unique name and swapped in, so other threads never read half a thumbnail
+        temporaryPath = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporaryPath, "wb") as f:
+            f.write(data)
+        os.replace(temporaryPath, path)
+
+        with self._lock:
+            self._readEntries()
+            self._size += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self.metrics["writes"] += 1
+            evicted = self._evict()
+        self._removeFiles(evicted)
+
+    def _evict(self):
+        """Drop the least recently used thumbnails until the cache fits its size. Must be called with the lock held.
+
+        Returns:
+            list: The keys dropped, whose files are left to remove.
+        """
+        evicted = []
+        while self._size > self.maxBytes and self._entries:
+            evictedKey, evictedSize = self._entries.popitem(last=False)
+            self._size -= evictedSize
+            evicted.append(evictedKey)
+        self.metrics["evictions"] += len(evicted)
+        return evicted
+
+    def _removeFiles(self, keys):
+        """Remove the files of thumbnails dropped from the cache."""
+        for key in keys:
+            try:
+                os.remove(self._getPath(key))
+            except OSError:
+                pass
+
+    def clear(self):
+        """Remove every thumbnail."""
+        with self._lock:
+            self._readEntries()
+            keys = list(self._entries)
+            self._entries.clear()
+            self._size = 0
+        self._removeFiles(keys)
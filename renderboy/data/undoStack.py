@@ -0,0 +1,352 @@
+"""Undo and redo for edits to a project, built from the change events the project sends its observers.
+
+Each batch of events becomes one undo step, so a bulk edit made in a batch is undone in one go. A step only keeps what
+changed: the old and new value of a field, the entries added to or removed from a list, or the object that was added
+or removed and where.
+"""
+
+
+import sys
+import time
+from contextlib import contextmanager
+
+import renderboy.data.renderTypes as rbTypes
+from renderboy.data.orderedSet import OrderedSet
+
+
+# How many bytes of undo history to keep by default
+defaultMaxBytes = 32 << 20
+
+# Edits of the same field within this many seconds of each other are undone together, so typing is undone in one go
+defaultMergeInterval = 1.0
+
+
+def estimateSize(value):
+    """Return a rough estimate of the bytes used by a field value, including everything it holds.
+
+    Shot content that hasn't been loaded yet is still on disk, so it isn't counted.
+    """
+    if isinstance(value, rbTypes.RenderBoyObject):
+        objectType = type(value)
+        size = sys.getsizeof(value)
+        for field in objectType.getLoadableFields():
+            # Read the attribute behind a property, so an unloaded shot isn't loaded to measure it
+            if isinstance(getattr(objectType, field, None), property):
+                field = "_" + field
+            size += estimateSize(getattr(value, field, None))
+        return size
+    if isinstance(value, (list, tuple, set, OrderedSet)):
+        return sys.getsizeof(value) + sum(estimateSize(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimateSize(k) + estimateSize(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+class SetFieldCommand:
+    """Set a field of a project, shot, layer or render."""
+
+    __slots__ = ("target", "field", "oldValue", "newValue", "size")
+
+    def __init__(self, target, field, oldValue, newValue):
+        self.target = target
+        self.field = field
+        self.oldValue = oldValue
+        self.newValue = newValue
+        self.size = sys.getsizeof(self) + estimateSize(oldValue) + estimateSize(newValue)
+
+    def undo(self):
+        self.target.setField(self.field, self.oldValue)
+
+    def redo(self):
+        self.target.setField(self.field, self.newValue)
+
+    def merge(self, other):
+        """Fold a later command into this one if it sets the same field.
+
+        Returns:
+            bool: Whether the command was merged.
+        """
+        if not isinstance(other, SetFieldCommand) or other.target is not self.target or other.field != self.field:
+            return False
+        self.newValue = other.newValue
+        self.size = sys.getsizeof(self) + estimateSize(self.oldValue) + estimateSize(self.newValue)
+        return True
+
+
+class ChildCommand:
+    """Add or remove a shot, layer or render."""
+
+    __slots__ = ("owner", "child", "index", "isAdd", "size")
+
+    def __init__(self, owner, child, index, isAdd):
+        """Initialize the command.
+
+        Arguments:
+            owner (RenderBoyObject): The project or shot the child was added to or removed from.
+            child (RenderBoyObject): The shot, layer or render.
+            index (int): Where the child was added or removed.
+            isAdd (bool): Whether the child was added, rather than removed.
+        """
+        self.owner = owner
+        self.child = child
+        self.index = index
+        self.isAdd = isAdd
+        # A removed child is only kept alive by the undo history, so its whole size counts
+        self.size = sys.getsizeof(self) + (sys.getsizeof(child) if isAdd else estimateSize(child))
+
+    def _add(self):
+        if isinstance(self.child, rbTypes.Shot):
+            self.owner.addShot(self.child, self.index)
+        elif isinstance(self.child, rbTypes.Layer):
+            self.owner.addLayer(self.child, self.index)
+        else:
+            self.owner.addRender(self.child, self.index)
+
+    def _remove(self):
+        if isinstance(self.child, rbTypes.Shot):
+            self.owner.removeShot(self.child)
+        elif isinstance(self.child, rbTypes.Layer):
+            self.owner.removeLayer(self.child)
+        else:
+            self.owner.removeRender(self.child)
+
+    def undo(self):
+        if self.isAdd:
+            self._remove()
+        else:
+            self._add()
+
+    def redo(self):
+        if self.isAdd:
+            self._add()
+        else:
+            self._remove()
+
+    def merge(self, other):
+        return False
+
+
+class ListEntriesCommand:
+    """Add entries to, or remove entries from, the exclude, matte or phantom list of a layer."""
+
+    __slots__ = ("layer", "listType", "entries", "positions", "isAdd", "size")
+
+    def __init__(self, layer, listType, entries, positions, isAdd):
+        self.layer = layer
+        self.listType = listType
+        self.entries = list(entries)
+        self.positions = list(positions)
+        self.isAdd = isAdd
+        self.size = sys.getsizeof(self) + estimateSize(self.entries) + estimateSize(self.positions)
+
+    def _add(self):
+        self.layer.addToList(self.listType, self.entries, self.positions)
+
+    def _remove(self):
+        self.layer.removeFromList(self.listType, self.entries)
+
+    def undo(self):
+        if self.isAdd:
+            self._remove()
+        else:
+            self._add()
+
+    def redo(self):
+        if self.isAdd:
+            self._add()
+        else:
+            self._remove()
+
+    def merge(self, other):
+        return False
+
+
+def commandFromEvent(project, event):
+    """Return the command that redoes a change event, or None if the event can't be undone."""
+    kind = event.kind
+    if kind in ("projectChanged", "shotChanged", "layerChanged", "renderChanged", "layerRenamed"):
+        return SetFieldCommand(event.target, event.field, event.oldValue, event.newValue)
+    if kind in ("shotAdded", "shotRemoved"):
+        return ChildCommand(project, event.target, event.index, kind == "shotAdded")
+    if kind in ("layerAdded", "layerRemoved", "renderAdded", "renderRemoved"):
+        return ChildCommand(event.shot, event.target, event.index, kind.endswith("Added"))
+    if kind == "layerListChanged":
+        if event.newValue:
+            return ListEntriesCommand(event.target, event.field, event.newValue, event.index, True)
+        return ListEntriesCommand(event.target, event.field, event.oldValue, event.index, False)
+    return None
+
+
+class UndoStep:
+    """The commands made by one batch of changes, undone and redone together."""
+
+    __slots__ = ("commands", "size", "time")
+
+    def __init__(self, commands):
+        self.commands = commands
+        self.size = sys.getsizeof(self) + sum(command.size for command in commands)
+        self.time = time.monotonic()
+
+    def merge(self, other):
+        """Fold a later step into this one if both set the same single field.
+
+        Returns:
+            bool: Whether the step was merged.
+        """
+        if len(self.commands) != 1 or len(other.commands) != 1:
+            return False
+        oldSize = self.commands[0].size
+        if not self.commands[0].merge(other.commands[0]):
+            return False
+        self.size += self.commands[0].size - oldSize
+        self.time = other.time
+        return True
+
+
+class UndoStack:
+    """Undo and redo history for a project.
+
+    Pass the change events sent by the project to recordEvents. The history is kept under a byte budget, dropping the
+    oldest steps first.
+    """
+
+    def __init__(self, project=None, maxBytes=defaultMaxBytes, mergeInterval=defaultMergeInterval):
+        """Initialize the undo stack.
+
+        Arguments:
+            project (Project): The project being edited.
+            maxBytes (int): Roughly how many bytes of history to keep.
+            mergeInterval (float): Seconds within which edits of the same field are merged into one step. 0 to never
+                merge.
+        """
+        self.project = project
+        self.maxBytes = maxBytes
+        self.mergeInterval = mergeInterval
+        # Called with no arguments whenever what can be undone or redone changes
+        self.changed = None
+        self._undoSteps = []
+        self._redoSteps = []
+        self._size = 0
+        self._isApplying = False
+        self._ignoreDepth = 0
+        # Whether the next step may be merged into the last one
+        self._canMerge = False
+
+    @property
+    def size(self):
+        """The estimated bytes used by the undo and redo history."""
+        return self._size
+
+    def canUndo(self):
+        """Return whether there is a step to undo."""
+        return bool(self._undoSteps)
+
+    def canRedo(self):
+        """Return whether there is a step to redo."""
+        return bool(self._redoSteps)
+
+    def setProject(self, project):
+        """Start the history again for a different project."""
+        self.project = project
+        self.clear()
+
+    def clear(self):
+        """Forget all undo and redo steps."""
+        self._undoSteps = []
+        self._redoSteps = []
+        self._size = 0
+        self._canMerge = False
+        self._sendChanged()
+
+    @contextmanager
+    def ignoring(self):
+        """Don't record changes made in the block, e.g. shots merged in from disk.
+
+        Any batch of events sent within the block should also end within it.
+        """
+        self._ignoreDepth += 1
+        try:
+            yield
+        finally:
+            self._ignoreDepth -= 1
+
+    def recordEvents(self, events):
+        """Record a batch of change events sent to the project's observers as one undo step."""
+        if self._isApplying or self._ignoreDepth:
+            return
+
+        commands = [command for command in (commandFromEvent(self.project, event) for event in events) if command]
+        if not commands:
+            return
+
+        self._size -= sum(step.size for step in self._redoSteps)
+        self._redoSteps = []
+
+        step = UndoStep(commands)
+        lastStep = self._undoSteps[-1] if self._undoSteps else None
+        if self._canMerge and lastStep is not None and step.time - lastStep.time < self.mergeInterval:
+            oldSize = lastStep.size
+            if lastStep.merge(step):
+                self._size += lastStep.size - oldSize
+                self._sendChanged()
+                return
+
+        self._undoSteps.append(step)
+        self._size += step.size
+        self._canMerge = True
+        self._evict()
+        self._sendChanged()
+
+    def _evict(self):
+        """Drop the oldest undo steps until the history fits in the byte budget."""
+        dropCount = 0
+        while self._size > self.maxBytes and dropCount < len(self._undoSteps):
+            self._size -= self._undoSteps[dropCount].size
+            dropCount += 1
+        if dropCount:
+            # A single step over the budget leaves nothing to undo
+            del self._undoSteps[:dropCount]
+
+    def undo(self):
+        """Undo the last step.
+
+        Returns:
+            bool: Whether there was a step to undo.
+        """
+        if not self._undoSteps:
+            return False
+        step = self._undoSteps.pop()
+        self._apply(reversed(step.commands), "undo")
+        self._redoSteps.append(step)
+        self._canMerge = False
+        self._sendChanged()
+        return True
+
+    def redo(self):
+        """Redo the last undone step.
+
+        Returns:
+            bool: Whether there was a step to redo.
+        """
+        if not self._redoSteps:
+            return False
+        step = self._redoSteps.pop()
+        self._apply(step.commands, "redo")
+        self._undoSteps.append(step)
+        self._canMerge = False
+        self._sendChanged()
+        return True
+
+    def _apply(self, commands, methodName):
+        """Call undo or redo on each command in one batch, without recording the changes they make."""
+        self._isApplying = True
+        try:
+            with self.project.batchEvents():
+                for command in commands:
+                    getattr(command, methodName)()
+        finally:
+            self._isApplying = False
+
+    def _sendChanged(self):
+        if self.changed is not None:
+            self.changed()
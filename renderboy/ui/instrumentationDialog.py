@@ -0,0 +1,79 @@
+"""A dialog showing the timings recorded by renderboy.data.instrumentation."""
+
+
+from PySide2 import QtGui, QtWidgets
+
+from renderboy.data import instrumentation
+
+
+class InstrumentationDialog(QtWidgets.QDialog):
+    """Shows the recorded spans and counters, and exports them as json or as a Chrome trace."""
+
+    def __init__(self, parent=None):
+        """Initialize the dialog.
+
+        Arguments:
+            parent {QWidget} -- The parent widget.
+        """
+        super().__init__(parent)
+        self.setWindowTitle("RenderBoy Timings")
+        self.resize(640, 420)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        self.setLayout(layout)
+
+        self.summaryTextEdit = QtWidgets.QPlainTextEdit()
+        self.summaryTextEdit.setReadOnly(True)
+        self.summaryTextEdit.setLineWrapMode(QtWidgets.QPlainTextEdit.NoWrap)
+        self.summaryTextEdit.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        layout.addWidget(self.summaryTextEdit)
+
+        buttonLayout = QtWidgets.QHBoxLayout()
+        layout.addLayout(buttonLayout)
+        for text, slot in (
+            ("Refresh", self.refresh),
+            ("Clear", self.clear),
+            ("Export JSON", self.exportJson),
+            ("Export Chrome Trace", self.exportChromeTrace),
+            ("Close", self.close),
+        ):
+            button = QtWidgets.QPushButton(text)
+            button.clicked.connect(slot)
+            buttonLayout.addWidget(button)
+
+        self.refresh()
+
+    def refresh(self):
+        """Show the timings recorded so far."""
+        text = instrumentation.formatSummary()
+        if not instrumentation.isEnabled():
+            text = (
+                f"Recording is off. Check Record Timings in the settings, or set {instrumentation.environmentVariable}"
+                f"=1 before starting RenderBoy.\n\n{text}"
+            )
+        self.summaryTextEdit.setPlainText(text)
+
+    def clear(self):
+        """Drop the timings recorded so far."""
+        instrumentation.clear()
+        self.refresh()
+
+    def exportJson(self):
+        """Write the timings to a json file chosen by the user."""
+        filePath, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export Timings", "timings.json", "JSON (*.json)")
+        if filePath:
+            self._export(instrumentation.writeJson, filePath)
+
+    def exportChromeTrace(self):
+        """Write the timings to a Chrome trace file chosen by the user."""
+        filePath, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Export Chrome Trace", "trace.json", "Chrome Trace (*.json)"
+        )
+        if filePath:
+            self._export(instrumentation.writeChromeTrace, filePath)
+
+    def _export(self, write, filePath):
+        try:
+            write(filePath)
+        except OSError as e:
+            QtWidgets.QMessageBox.warning(self, "RenderBoy", f"Could not write {filePath}:\n{e}")
@@ -0,0 +1,195 @@
+"""Item models presenting the shots, layers and renders of a project to Qt views."""
+
+
+from PySide2 import QtCore
+
+
+# Role returning the RenderBoyObject shown by a row
+objectRole = QtCore.Qt.UserRole
+
+
+class RenderBoyListModel(QtCore.QAbstractListModel):
+    """A list model of RenderBoyObjects, showing their names.
+
+    The model presents a list owned by the project, e.g. project.shots or shot.layers. After that list is changed,
+    call sync to update only the rows that were inserted, removed or renamed, rather than resetting the whole model.
+    """
+
+    def __init__(self, parent=None):
+        """Initialize an empty model."""
+        super().__init__(parent)
+        self._source = []
+        # The objects and names as the views last saw them
+        self._objects = []
+        self._names = []
+
+    def setSource(self, objects):
+        """Present a new list of objects, resetting the model.
+
+        Arguments:
+            objects (list): The list to present. It is not copied, so later changes to it are picked up by sync.
+        """
+        self.beginResetModel()
+        self._source = objects if objects is not None else []
+        self._objects = list(self._source)
+        self._names = [obj.name for obj in self._objects]
+        self.endResetModel()
+
+    def source(self):
+        """Return the list being presented."""
+        return self._source
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        """Return the number of objects."""
+        if parent.isValid():
+            return 0
+        return len(self._objects)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        """Return the name of the object at the index, or the object itself for objectRole."""
+        if not index.isValid() or index.row() >= len(self._objects):
+            return None
+        if role == QtCore.Qt.DisplayRole:
+            return self._names[index.row()]
+        if role == objectRole:
+            return self._objects[index.row()]
+        return None
+
+    def objectAt(self, row):
+        """Return the object at the row, or None."""
+        if 0 <= row < len(self._objects):
+            return self._objects[row]
+        return None
+
+    def rowOf(self, obj):
+        """Return the row of the object, or -1 if it isn't in the model."""
+        for row, listedObject in enumerate(self._objects):
+            if listedObject is obj:
+                return row
+        return -1
+
+    def sync(self):
+        """Update the model to match its source list, signalling only the rows that changed.
+
+        Rows are matched by identity. Removed objects are removed, new objects are inserted where they are in the
+        source, and rows whose name changed are updated. If the source was reordered, the model is reset instead.
+        """
+        sourceIds = {id(obj) for obj in self._source}
+
+        # Remove rows from the bottom up, a contiguous run at a time
+        row = len(self._objects) - 1
+        while row >= 0:
+            if id(self._objects[row]) in sourceIds:
+                row -= 1
+                continue
+            last = row
+            while row >= 0 and id(self._objects[row]) not in sourceIds:
+                row -= 1
+            self.beginRemoveRows(QtCore.QModelIndex(), row + 1, last)
+            del self._objects[row + 1:last + 1]
+            del self._names[row + 1:last + 1]
+            self.endRemoveRows()
+
+        # The remaining rows must be in the same order as in the source for new rows to be inserted between them
+        listedIds = {id(obj) for obj in self._objects}
+        remaining = [obj for obj in self._source if id(obj) in listedIds]
+        if len(remaining) != len(self._objects) or any(a is not b for a, b in zip(remaining, self._objects)):
+            self.setSource(self._source)
+            return
+
+        row = 0
+        for sourceRow, obj in enumerate(self._source):
+            if row < len(self._objects) and self._objects[row] is obj:
+                row += 1
+                continue
+            # Insert the run of new objects starting here
+            end = sourceRow
+            while end < len(self._source) and id(self._source[end]) not in listedIds:
+                end += 1
+            if end == sourceRow:
+                continue
+            newObjects = self._source[sourceRow:end]
+            listedIds.update(id(newObject) for newObject in newObjects)
+            self.beginInsertRows(QtCore.QModelIndex(), row, row + len(newObjects) - 1)
+            self._objects[row:row] = newObjects
+            self._names[row:row] = [newObject.name for newObject in newObjects]
+            self.endInsertRows()
+            row += len(newObjects)
+
+        for row, obj in enumerate(self._objects):
+            if self._names[row] != obj.name:
+                self._names[row] = obj.name
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [QtCore.Qt.DisplayRole])
+
+    def objectChanged(self, obj):
+        """Update the row of a single object whose name may have changed."""
+        row = self.rowOf(obj)
+        if row < 0 or self._names[row] == obj.name:
+            return
+        self._names[row] = obj.name
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [QtCore.Qt.DisplayRole])
+
+
+class ShotListModel(RenderBoyListModel):
+    """The shots of a project."""
+
+    def setProject(self, project):
+        """Present the shots of the given project."""
+        self.setSource(project.shots if project else [])
+
+
+class LayerListModel(RenderBoyListModel):
+    """The layers of a shot."""
+
+    def setShot(self, shot):
+        """Present the layers of the given shot, or nothing if it is None."""
+        self.setSource(shot.layers if shot else [])
+
+
+class RenderListModel(RenderBoyListModel):
+    """The renders of a shot."""
+
+    def setShot(self, shot):
+        """Present the renders of the given shot, or nothing if it is None."""
+        self.setSource(shot.renders if shot else [])
+
+
+class SearchProxyModel(QtCore.QSortFilterProxyModel):
+    """Shows the rows of a RenderBoyListModel that matched a search, best match first."""
+
+    def __init__(self, parent=None):
+        """Initialize the proxy, showing every row in source order."""
+        super().__init__(parent)
+        self._scores = None
+
+    def setScores(self, scores):
+        """Show only the named objects, ordered by score.
+
+        Arguments:
+            scores (dict): Object name to its search score, or None to show every row in source order.
+        """
+        self._scores = scores
+        self.invalidate()
+        if scores is None:
+            self.sort(-1)
+        else:
+            self.sort(0, QtCore.Qt.AscendingOrder)
+
+    def filterAcceptsRow(self, sourceRow, sourceParent):
+        """Return whether the row matched the search."""
+        if self._scores is None:
+            return True
+        obj = self.sourceModel().objectAt(sourceRow)
+        return obj is not None and obj.name in self._scores
+
+    def lessThan(self, left, right):
+        """Return whether the left row should be shown above the right row."""
+        leftName = left.data(QtCore.Qt.DisplayRole)
+        rightName = right.data(QtCore.Qt.DisplayRole)
+        leftScore = self._scores.get(leftName, 0.0) if self._scores else 0.0
+        rightScore = self._scores.get(rightName, 0.0) if self._scores else 0.0
+        if leftScore != rightScore:
+            return leftScore > rightScore
+        return leftName < rightName
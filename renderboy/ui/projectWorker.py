@@ -0,0 +1,89 @@
+"""Run slow project tasks, such as loading, saving and scanning, off the UI thread."""
+
+
+import threading
+import time
+
+from PySide2 import QtCore
+
+
+class ProjectWorker(QtCore.QObject):
+    """Runs a task on a background thread, reporting its progress and results to the UI thread through signals.
+
+    The task is called with the worker, and can call reportProgress and addShot as it goes. Shots are passed on in
+    batches, so a task that finds thousands of shots doesn't flood the UI thread with one signal per shot. Signals are
+    emitted from the worker thread and delivered on the UI thread, which owns the worker.
+    """
+
+    progress = QtCore.Signal(object, object)
+    shotsReady = QtCore.Signal(object)
+    finished = QtCore.Signal(object)
+    failed = QtCore.Signal(str)
+
+    def __init__(self, task, description, parent=None, batchInterval=0.1):
+        """Initialize the worker. Call start to run the task.
+
+        Arguments:
+            task (callable): Called with the worker on the background thread. Its return value is passed to finished.
+            description (str): What the task is doing, e.g. "Loading project...", for showing alongside its progress.
+            batchInterval (float): The most seconds shots and progress are held back before being passed on.
+        """
+        super().__init__(parent)
+        self.task = task
+        self.description = description
+        self.batchInterval = batchInterval
+
+        self._shots = []
+        self._lastBatchTime = 0.0
+        self._lastProgress = None
+        self._thread = None
+
+    def start(self):
+        """Run the task on a background thread."""
+        self._lastBatchTime = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="RenderBoyProjectWorker", daemon=True)
+        self._thread.start()
+
+    def isRunning(self):
+        """Return whether the task is still running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def wait(self):
+        """Block until the task has finished."""
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        """Run the task and report how it went."""
+        try:
+            result = self.task(self)
+        except Exception as e:
+            self._flush()
+            self.failed.emit(str(e))
+            return
+
+        self._flush()
+        self.finished.emit(result)
+
+    def reportProgress(self, completed, total):
+        """Report how far along the task is. Progress is passed on at most once per batch interval."""
+        self._lastProgress = (completed, total)
+        if completed >= total or time.monotonic() - self._lastBatchTime >= self.batchInterval:
+            self._flush()
+
+    def addShot(self, shot):
+        """Pass a shot on to the UI thread, with the next batch."""
+        self._shots.append(shot)
+        if time.monotonic() - self._lastBatchTime >= self.batchInterval:
+            self._flush()
+
+    def _flush(self):
+        """Pass on the shots and progress held back so far."""
+        self._lastBatchTime = time.monotonic()
+        if self._shots:
+            shots = self._shots
+            self._shots = []
+            self.shotsReady.emit(shots)
+        if self._lastProgress is not None:
+            self.progress.emit(*self._lastProgress)
+            self._lastProgress = None
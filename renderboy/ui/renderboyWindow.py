@@ -1,42 +1,120 @@
-"""RenderBoy Window."""
+"""RenderBoy Window.
+
+Only what the window needs to first appear is imported and built up front. Modules used once a project has loaded,
+the settings sidebar, tabs other than the first and the gutter icons are left until they are first needed.
+"""
 
 
 from PySide2 import QtWidgets, QtCore, QtGui
 
 from functools import partial
 import os
-import sys
-
-renderboyPath = os.path.normpath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
-sys.path.append(renderboyPath)
 
 import renderboy.data.renderTypes as rbTypes
+from renderboy.data import instrumentation
+from renderboy.data.projectShards import (
+    ShardedProjectStore, defaultShardedProjectFolderName, isShardedProject, openProjectStore
+)
+from renderboy.data.undoStack import UndoStack
+from renderboy.ui.projectWorker import ProjectWorker
+from renderboy.ui.itemModels import LayerListModel, RenderListModel, SearchProxyModel, ShotListModel, objectRole
 
 
 iconBasePath = os.path.join(os.path.dirname(__file__), "icons")
+defaultUserFolderPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_user")
+
+# Icons by file name, loaded the first time they are used
+_icons = {}
+
+# Edits are autosaved once they pause for this many seconds, but no more often than the minimum interval
+autosaveDelay = 0.5
+autosaveMinInterval = 2.0
+
+# How many frames after the one shown have their thumbnails loaded ahead, so scrubbing forward finds them ready
+renderPrefetchFrames = 8
+
+
+def getIcon(fileName):
+    """Return the icon with the given file name from the icons folder, loading it the first time it is asked for."""
+    icon = _icons.get(fileName)
+    if icon is None:
+        icon = QtGui.QIcon(os.path.join(iconBasePath, fileName))
+        _icons[fileName] = icon
+    return icon
+
+
+class ProjectWatcherBridge(QtCore.QObject):
+    """Carries shots rescanned by a ProjectWatcher from its thread to the UI thread."""
+
+    shotsScanned = QtCore.Signal(object)
 
 
 class RenderBoyWindow(QtWidgets.QMainWindow):
     """RenderBoy Window."""
 
-    def __init__(self) -> None:
-        """Initialize the RenderBoy window."""
+    def __init__(self, userFolderPath=None) -> None:
+        """Initialize the RenderBoy window.
+
+        Arguments:
+            userFolderPath {str} -- The folder the project and settings are kept in. Defaults to the _user folder next
+                to this file.
+        """
         super().__init__()
 
         self.isSidebarCollapsed = False
         self.sidebarMode = "shots"
+        # Work that can wait until the window has first appeared
+        self.hasPainted = False
+        self.afterFirstPaint = []
 
-        self.userFolderPath = os.path.abspath(os.path.join(__file__, os.pardir, "_user"))
+        self.userFolderPath = userFolderPath or defaultUserFolderPath
         if not os.path.exists(self.userFolderPath):
             os.makedirs(self.userFolderPath)
 
         self.projectDataPath = os.path.join(self.userFolderPath, "projectData.json")
-        if os.path.isfile(self.projectDataPath):
-            self.project = rbTypes.loadProjectFromFile(self.projectDataPath)
+        # The project is kept in projectData.json, as a file per shot or in a SQLite database, whichever was last chosen
+        self.shardedProjectPath = os.path.join(self.userFolderPath, defaultShardedProjectFolderName)
+        self.projectDatabasePath = os.path.join(self.userFolderPath, "projectData.db")
+        if isShardedProject(self.shardedProjectPath):
+            self.projectStorePath = self.shardedProjectPath
+        elif os.path.isfile(self.projectDatabasePath):
+            self.projectStorePath = self.projectDatabasePath
         else:
-            self.project = rbTypes.Project()
+            self.projectStorePath = self.projectDataPath
+        self.projectJournal = self.openProjectStore(self.projectStorePath, autosaveDelay, autosaveMinInterval)
+        # The window opens on an empty project, which is replaced once the saved project has loaded in the background
+        self.project = rbTypes.Project()
+        self.project.subscribe(self.projectChanged)
+        # Edits made in the window, but not shots read from disk, can be undone
+        self.undoStack = UndoStack(self.project)
+        self.projectWorker = None
+        # Paused while a whole project is read in, since it is saved as a new snapshot once it has been
+        self.isJournalPaused = False
+        self.directorySnapshotPath = os.path.join(self.userFolderPath, "directorySnapshot.json")
+        # The directory the project was scanned from, once known
+        self.projectDirectory = None
+        # Built the first time the recorded timings are shown
+        self.instrumentationDialog = None
+
+        self.projectWatcher = None
+        self.projectWatcherBridge = ProjectWatcherBridge(self)
+        self.projectWatcherBridge.shotsScanned.connect(self.applyWatchedShots)
+
+        self.shotListModel = ShotListModel(self)
+        self.shotListModel.setProject(self.project)
+        self.shotFilterModel = SearchProxyModel(self)
+        self.shotFilterModel.setSourceModel(self.shotListModel)
+        self.layerListModel = LayerListModel(self)
+        self.renderListModel = RenderListModel(self)
+        # Built on the first search, then kept up to date as the project is edited
+        self.searchIndex = None
 
         self.setupUI()
+        self.runProjectWorker(
+            lambda worker: self.projectJournal.load(progress=worker.reportProgress),
+            "Loading project...",
+            finished=self.savedProjectLoaded,
+        )
 
     def setupUI(self) -> None:
         """Set up the UI."""
@@ -55,6 +133,15 @@ class RenderBoyWindow(QtWidgets.QMainWindow):
         self.setupGutter()
         self.setupSidebar()
         self.setupShotWidget()
+        self.setupStatusBar()
+
+    def setupStatusBar(self):
+        """Set up the status bar, which shows the progress of background tasks."""
+        self.progressBar = QtWidgets.QProgressBar(self)
+        self.progressBar.setFixedWidth(200)
+        self.progressBar.setTextVisible(False)
+        self.progressBar.hide()
+        self.statusBar().addPermanentWidget(self.progressBar)
 
     def setupMenuBar(self):
         """Set up the menu bar."""
@@ -62,6 +149,19 @@ class RenderBoyWindow(QtWidgets.QMainWindow):
         self.menuBar = QtWidgets.QMenuBar(self)
         self.setMenuBar(self.menuBar)
 
+        # Edit submenu
+        self.editMenu = QtWidgets.QMenu("Edit", self)
+        self.undoAction = self.editMenu.addAction("Undo")
+        self.undoAction.setShortcut(QtGui.QKeySequence.Undo)
+        self.undoAction.triggered.connect(self.undo)
+        self.redoAction = self.editMenu.addAction("Redo")
+        self.redoAction.setShortcut(QtGui.QKeySequence.Redo)
+        self.redoAction.triggered.connect(self.redo)
+        self.undoStack.changed = self.updateUndoActions
+        self.updateUndoActions()
+
+        self.menuBar.addMenu(self.editMenu)
+
         # Layers submenu
         self.layersMenu = QtWidgets.QMenu("Layers", self)
         self.layersMenu.addAction("Add Layer")
@@ -76,6 +176,19 @@ class RenderBoyWindow(QtWidgets.QMainWindow):
 
         self.menuBar.addMenu(self.rendersMenu)
 
+    def updateUndoActions(self):
+        """Enable the undo and redo actions when there is something to undo or redo."""
+        self.undoAction.setEnabled(self.undoStack.canUndo())
+        self.redoAction.setEnabled(self.undoStack.canRedo())
+
+    def undo(self):
+        """Undo the last edit to the project."""
+        self.undoStack.undo()
+
+    def redo(self):
+        """Redo the last undone edit to the project."""
+        self.undoStack.redo()
+
     def setupGutter(self):
         """Set up the gutter."""
         self.gutter = QtWidgets.QFrame(self)
@@ -101,8 +214,8 @@ class RenderBoyWindow(QtWidgets.QMainWindow):
         self.line.setFrameShadow(QtWidgets.QFrame.Sunken)
         self.layout.addWidget(self.line)
 
+        # The icons are loaded once the window has first painted, see loadIcons
         self.sidebarButton = QtWidgets.QPushButton()
-        self.sidebarButton.setIcon(QtGui.QIcon(os.path.join(iconBasePath, "sidebar.svg")))
         self.sidebarButton.setIconSize(QtCore.QSize(24, 24))
         self.sidebarButton.setFlat(True)
         self.sidebarButton.setFixedWidth(48)
@@ -111,7 +224,6 @@ class RenderBoyWindow(QtWidgets.QMainWindow):
         self.gutterLayout.addWidget(self.sidebarButton)
 
         self.settingsButton = QtWidgets.QPushButton()
-        self.settingsButton.setIcon(QtGui.QIcon(os.path.join(iconBasePath, "settings.svg")))
         self.settingsButton.setIconSize(QtCore.QSize(24, 24))
         self.settingsButton.setFlat(True)
         self.settingsButton.setFixedWidth(48)
@@ -119,6 +231,34 @@ class RenderBoyWindow(QtWidgets.QMainWindow):
         self.settingsButton.clicked.connect(partial(self.updateSidebar, "settings"))
         self.gutterLayout.addWidget(self.settingsButton)
 
+        self.runAfterFirstPaint(self.loadIcons)
+
+    def loadIcons(self):
+        """Load the icons of the gutter buttons."""
+        self.sidebarButton.setIcon(getIcon("sidebar.svg"))
+        self.settingsButton.setIcon(getIcon("settings.svg"))
+
+    def runAfterFirstPaint(self, callback):
+        """Call back once the window has first painted, so work that can wait doesn't hold up the window appearing.
+
+        Arguments:
+            callback {callable} -- Called with no arguments on the UI thread.
+        """
+        if self.hasPainted:
+            QtCore.QTimer.singleShot(0, callback)
+        else:
+            self.afterFirstPaint.append(callback)
+
+    def paintEvent(self, event):
+        """Paint the window, then run the work that was waiting for it to first appear."""
+        super().paintEvent(event)
+        if self.hasPainted:
+            return
+        self.hasPainted = True
+        for callback in self.afterFirstPaint:
+            QtCore.QTimer.singleShot(0, callback)
+        self.afterFirstPaint = []
+
     def setupSidebar(self):
         """Set up the sidebar."""
         self.sidebar = QtWidgets.QFrame(self)
@@ -126,30 +266,44 @@ class RenderBoyWindow(QtWidgets.QMainWindow):
         self.sidebar.setMaximumWidth(200)
         self.sidebar.setFixedWidth(200)
 
-        self.sidebarLayout = QtWidgets.QVBoxLayout(self.sidebar)
-        self.sidebarLayout.setContentsMargins(0, 0, 0, 0)
-        self.sidebarLayout.setSpacing(4)
-        self.sidebarLayout.setAlignment(QtCore.Qt.AlignTop)
+        sidebarLayout = QtWidgets.QVBoxLayout(self.sidebar)
+        sidebarLayout.setContentsMargins(0, 0, 0, 0)
+        self.sidebar.setLayout(sidebarLayout)
 
-        self.sidebar.setLayout(self.sidebarLayout)
+        # Each mode of the sidebar is a page, built the first time it is shown and kept after that
+        self.sidebarStack = QtWidgets.QStackedWidget(self.sidebar)
+        sidebarLayout.addWidget(self.sidebarStack)
+        self.sidebarPages = {}
+        self.sidebarPageSetups = {"shots": self.setupShotsSidebar, "settings": self.setupSettingsSidebar}
 
         self.layout.addWidget(self.sidebar)
 
-        if self.sidebarMode == "shots":
-            self.setupShotsSidebar()
-        elif self.sidebarMode == "settings":
-            self.setupSettingsSidebar()
+        self.showSidebarPage(self.sidebarMode)
 
-    def clearSidebar(self):
-        """Clear the sidebar."""
-        # Remove all children from self.sidebarLayout
-        for i in reversed(range(self.sidebarLayout.count())):
-            self.sidebarLayout.itemAt(i).widget().setParent(None)
+    def showSidebarPage(self, mode):
+        """Show the page of the sidebar for the given mode, building it if it hasn't been shown before.
+
+        Arguments:
+            mode {str} -- The sidebar mode. Can be "shots" or "settings".
+        """
+        with instrumentation.span("showSidebarPage", "ui"):
+            page = self.sidebarPages.get(mode)
+            if page is None:
+                page = QtWidgets.QWidget()
+                self.sidebarLayout = QtWidgets.QVBoxLayout(page)
+                self.sidebarLayout.setContentsMargins(0, 0, 0, 0)
+                self.sidebarLayout.setSpacing(4)
+                self.sidebarLayout.setAlignment(QtCore.Qt.AlignTop)
+                page.setLayout(self.sidebarLayout)
+
+                self.sidebarPageSetups[mode]()
+                self.sidebarStack.addWidget(page)
+                self.sidebarPages[mode] = page
+
+            self.sidebarStack.setCurrentWidget(page)
 
     def setupShotsSidebar(self):
         """Set up the shots sidebar."""
-        self.clearSidebar()
-
         self.sidebarLayout.addWidget(QtWidgets.QLabel("Shots"))
 
         self.sidebarSearchBar = QtWidgets.QLineEdit(self)
@@ -157,14 +311,16 @@ class RenderBoyWindow(QtWidgets.QMainWindow):
         self.sidebarSearchBar.setFixedWidth(198)
         self.sidebarSearchBar.textEdited.connect(self.searchShots)
         self.sidebarLayout.addWidget(self.sidebarSearchBar)
+        self.shotFilterModel.setScores(None)
 
-        self.shotListWidget = QtWidgets.QListWidget(self)
-        self.shotListWidget.setAlternatingRowColors(True)
-        self.shotListWidget.setFixedWidth(198)
-        shotsToAdd = [shot.name for shot in self.project.shots]
-        self.shotListWidget.itemClicked.connect(self.updateShotWidget)
-        self.shotListWidget.addItems(shotsToAdd)
-        self.sidebarLayout.addWidget(self.shotListWidget)
+        self.shotListView = QtWidgets.QListView(self)
+        self.shotListView.setAlternatingRowColors(True)
+        self.shotListView.setFixedWidth(198)
+        self.shotListView.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.shotListView.setUniformItemSizes(True)
+        self.shotListView.setModel(self.shotFilterModel)
+        self.shotListView.clicked.connect(self.updateShotWidget)
+        self.sidebarLayout.addWidget(self.shotListView)
 
         self.bottomSpacer = QtWidgets.QWidget()
         self.bottomSpacer.setMaximumHeight(2)
@@ -173,8 +329,6 @@ class RenderBoyWindow(QtWidgets.QMainWindow):
 
     def setupSettingsSidebar(self):
         """Set up the settings sidebar."""
-        self.clearSidebar()
-
         self.sidebarLayout.addWidget(QtWidgets.QLabel("Settings"))
 
         self.createShotsFromDirectoryButton = QtWidgets.QPushButton("Create Shots From Directory")
@@ -185,37 +339,433 @@ class RenderBoyWindow(QtWidgets.QMainWindow):
         self.loadProjectFromFileButton.clicked.connect(self.loadProjectFromFile)
         self.sidebarLayout.addWidget(self.loadProjectFromFileButton)
 
+        self.sidebarLayout.addWidget(QtWidgets.QLabel("Autosave Interval"))
+
+        self.autosaveIntervalSpinBox = QtWidgets.QDoubleSpinBox()
+        self.autosaveIntervalSpinBox.setRange(0.0, 600.0)
+        self.autosaveIntervalSpinBox.setSuffix(" s")
+        self.autosaveIntervalSpinBox.setToolTip("The fewest seconds between autosaves")
+        self.autosaveIntervalSpinBox.setValue(self.projectJournal.minWriteInterval)
+        self.autosaveIntervalSpinBox.valueChanged.connect(self.setAutosaveInterval)
+        self.sidebarLayout.addWidget(self.autosaveIntervalSpinBox)
+
+        self.sidebarLayout.addWidget(QtWidgets.QLabel("Save Project To"))
+
+        self.projectStoreComboBox = QtWidgets.QComboBox()
+        self.projectStoreComboBox.setToolTip(
+            "One json file, a small list of shots plus a file per shot, or a SQLite database. The last two only "
+            "rewrite the shots an edit touched."
+        )
+        for text, path in (
+            ("One File", self.projectDataPath),
+            ("A File Per Shot", self.shardedProjectPath),
+            ("A SQLite Database", self.projectDatabasePath),
+        ):
+            self.projectStoreComboBox.addItem(text, path)
+        self.projectStoreComboBox.setCurrentIndex(self.projectStoreComboBox.findData(self.projectStorePath))
+        self.projectStoreComboBox.currentIndexChanged.connect(
+            lambda index: self.setProjectStorePath(self.projectStoreComboBox.itemData(index))
+        )
+        self.sidebarLayout.addWidget(self.projectStoreComboBox)
+
+        self.recordTimingsCheckBox = QtWidgets.QCheckBox("Record Timings")
+        self.recordTimingsCheckBox.setToolTip(
+            f"Time loading, saving, scans, lookups and widget refreshes. Also on when "
+            f"{instrumentation.environmentVariable} is set."
+        )
+        self.recordTimingsCheckBox.setChecked(instrumentation.isEnabled())
+        self.recordTimingsCheckBox.toggled.connect(instrumentation.setEnabled)
+        self.sidebarLayout.addWidget(self.recordTimingsCheckBox)
+
+        self.showTimingsButton = QtWidgets.QPushButton("Show Timings")
+        self.showTimingsButton.clicked.connect(self.showTimings)
+        self.sidebarLayout.addWidget(self.showTimingsButton)
+
+    def openProjectStore(self, projectPath, writeDelay, minWriteInterval):
+        """Return the store that keeps the project at the given path, picked by its extension.
+
+        Arguments:
+            projectPath {str} -- projectData.json, the folder of the sharded project, or a database such as
+                projectData.db.
+            writeDelay {float} -- The seconds to wait for more edits before autosaving.
+            minWriteInterval {float} -- The fewest seconds between autosaves.
+        """
+        if projectPath == self.shardedProjectPath:
+            # The folder has no manifest until the project is first saved to it
+            return ShardedProjectStore(projectPath, writeDelay=writeDelay, minWriteInterval=minWriteInterval)
+        return openProjectStore(projectPath, writeDelay=writeDelay, minWriteInterval=minWriteInterval)
+
+    def setProjectStorePath(self, projectPath):
+        """Switch between keeping the project in one file, keeping each shot in its own file, and a SQLite database.
+
+        The project is saved in the new layout in the background, and the old files are removed once it has been.
+
+        Arguments:
+            projectPath {str} -- projectData.json, the folder of the sharded project, or a database such as
+                projectData.db.
+        """
+        if projectPath == self.projectStorePath:
+            return
+        if self.isProjectWorkerRunning():
+            self.projectStoreComboBox.blockSignals(True)
+            self.projectStoreComboBox.setCurrentIndex(self.projectStoreComboBox.findData(self.projectStorePath))
+            self.projectStoreComboBox.blockSignals(False)
+            return
+
+        # Edits go to the new store from here on, and the old one is only read until the project is saved
+        oldStore = self.projectJournal
+        self.projectJournal = self.openProjectStore(projectPath, oldStore.writeDelay, oldStore.minWriteInterval)
+        self.projectStorePath = projectPath
+        future = self.projectJournal.saveSnapshot(self.project, wait=False)
+        # Shots that haven't been loaded yet still read from the old files, so they are read before those are removed
+        unloadedShots = [(shot, shot._lazyContent) for shot in self.project.shots if not shot.isLoaded]
+
+        def saveProject(worker):
+            future.result()
+            contents = []
+            for shot, lazyContent in unloadedShots:
+                contents.append(lazyContent.load())
+                worker.reportProgress(len(contents), len(unloadedShots))
+            return contents
+
+        def removeOldFiles(worker):
+            oldStore.close()
+            oldStore.removeFiles()
+
+        def projectSaved(contents):
+            for (shot, lazyContent), content in zip(unloadedShots, contents):
+                # Shots loaded in the meantime already have their layers and renders
+                if shot._lazyContent is lazyContent:
+                    shot._setContent(content)
+            self.runProjectWorker(removeOldFiles, "Removing the old project files...")
+
+        self.runProjectWorker(saveProject, "Saving project...", finished=projectSaved)
+
+    def showTimings(self):
+        """Show the recorded timings in a dialog, which can export them."""
+        from renderboy.ui.instrumentationDialog import InstrumentationDialog
+
+        if self.instrumentationDialog is None:
+            self.instrumentationDialog = InstrumentationDialog(self)
+        self.instrumentationDialog.refresh()
+        self.instrumentationDialog.show()
+        self.instrumentationDialog.raise_()
+
+    def setAutosaveInterval(self, interval):
+        """Set the fewest seconds between autosaves of the journal."""
+        self.projectJournal.minWriteInterval = interval
+
     def createShotsFromDirectory(self):
-        """Create shots from a directory."""
+        """Create shots from a directory.
+
+        Rescanning the directory the project was last scanned from only reads the shot folders that changed, and merges
+        them into the project without losing any layers or notes. Scanning a different directory starts a new project.
+        Shot folders are scanned in the background, and shots are added to the list as they are found.
+        """
+        if self.isProjectWorkerRunning():
+            return
         directory = QtWidgets.QFileDialog.getExistingDirectory(self, "Select Project Directory")
         if not directory:
             return
 
-        self.project = rbTypes.Project(directory)
-        self.shotListWidget.clear()
-        shotNames = [shot.name for shot in self.project.shots]
-        self.shotListWidget.addItems(shotNames)
-        self.writeProjectToFile()
+        from renderboy.data.directorySnapshot import DirectorySnapshot, mergeScannedShot, scanChangedShots
+
+        self.stopProjectWatcher()
+        directorySnapshot = DirectorySnapshot.load(self.directorySnapshotPath)
+        isNewProject = directorySnapshot.directory != os.path.normpath(directory)
+        if isNewProject:
+            directorySnapshot = DirectorySnapshot()
+            self.setProject(rbTypes.Project())
+            self.isJournalPaused = True
+
+        knownShotNames = {shot.name for shot in self.project.shots}
+        summary = {"added": [], "changed": []}
+
+        def scanShots(worker):
+            return scanChangedShots(
+                directory, directorySnapshot, knownShotNames, worker.addShot, progress=worker.reportProgress
+            )
+
+        def shotsScanned(scannedShots):
+            # Each batch of shots refreshes the widgets once, rather than once per change
+            with self.undoStack.ignoring(), self.project.batchEvents():
+                for scannedShot in scannedShots:
+                    mergeScannedShot(self.project, scannedShot, summary)
+
+        def scanFinished(missing):
+            directorySnapshot.save(self.directorySnapshotPath)
+            self.startProjectWatcher(directorySnapshot)
+            if isNewProject:
+                # Changes to an existing project were journaled as they were merged
+                self.isJournalPaused = False
+                self.writeProjectToFile()
+
+        self.runProjectWorker(scanShots, "Scanning shots...", shotsReady=shotsScanned, finished=scanFinished)
+
+    def isProjectWorkerRunning(self):
+        """Return whether a background task is running, telling the user to wait if so."""
+        if self.projectWorker is None:
+            return False
+        self.statusBar().showMessage(f"Please wait. {self.projectWorker.description}", 3000)
+        return True
+
+    def runProjectWorker(self, task, description, shotsReady=None, finished=None):
+        """Run a task in the background, showing its progress in the status bar.
+
+        Arguments:
+            task {callable} -- Called with the ProjectWorker on a background thread.
+            description {str} -- What the task is doing, shown in the status bar.
+            shotsReady {callable} -- Called on the UI thread with each batch of shots the task passes on.
+            finished {callable} -- Called on the UI thread with the result of the task.
+        """
+        worker = ProjectWorker(task, description, self)
+        worker.progress.connect(self.updateProjectWorkerProgress)
+        if shotsReady is not None:
+            worker.shotsReady.connect(shotsReady)
+        worker.finished.connect(partial(self.projectWorkerFinished, worker, finished))
+        worker.failed.connect(partial(self.projectWorkerFailed, worker))
+        self.projectWorker = worker
+
+        self.statusBar().showMessage(description)
+        self.progressBar.setRange(0, 0)
+        self.progressBar.show()
+        worker.start()
+
+    def updateProjectWorkerProgress(self, completed, total):
+        """Show the progress of the running background task."""
+        # Progress bars only take ints, so large totals such as file sizes are scaled down
+        scale = max(1, total // 1000000)
+        self.progressBar.setRange(0, total // scale)
+        self.progressBar.setValue(completed // scale)
+
+    def projectWorkerFinished(self, worker, finished, result):
+        """Hide the progress of a background task that finished, and pass its result on."""
+        self.progressBar.hide()
+        self.statusBar().clearMessage()
+        self.projectWorker = None
+        worker.deleteLater()
+        if finished is not None:
+            finished(result)
+
+    def projectWorkerFailed(self, worker, error):
+        """Report a background task that failed."""
+        self.progressBar.hide()
+        self.statusBar().clearMessage()
+        self.projectWorker = None
+        self.isJournalPaused = False
+        worker.deleteLater()
+        print(f"WARNING: {worker.description} failed: {error}")
+        QtWidgets.QMessageBox.warning(self, "RenderBoy", f"{worker.description} failed:\n{error}")
+
+    def setProject(self, project):
+        """Show the given project, replacing the current one."""
+        with instrumentation.span("setProject", "ui"):
+            self.project.unsubscribe(self.projectChanged)
+            self.project = project
+            self.project.subscribe(self.projectChanged)
+            self.undoStack.setProject(project)
+            self.shotListModel.setProject(project)
+            self.resetSearchIndex()
+            self.updateShotWidget()
+
+    def savedProjectLoaded(self, project):
+        """Show the project loaded when the window opened, and start watching its directory."""
+        self.setProject(project)
+        # The load usually finishes before the window first paints, and watching the directory can wait until it has
+        self.runAfterFirstPaint(lambda: self.startProjectWatcher(self.loadDirectorySnapshot()))
+
+    def loadDirectorySnapshot(self):
+        """Return the snapshot saved by the last scan of the project directory."""
+        from renderboy.data.directorySnapshot import DirectorySnapshot
+
+        return DirectorySnapshot.load(self.directorySnapshotPath)
+
+    def startProjectWatcher(self, directorySnapshot):
+        """Watch the directory the project was scanned from, merging shots into the project as frames are written.
+
+        Arguments:
+            directorySnapshot (DirectorySnapshot): The snapshot from the last scan of the directory.
+        """
+        self.stopProjectWatcher()
+        self.projectDirectory = directorySnapshot.directory or None
+        if self.renderTab not in self.tabSetups:
+            self.updateRenderFrameFiles()
+        if not directorySnapshot.directory or not os.path.isdir(directorySnapshot.directory):
+            return
+
+        from renderboy.data.projectWatcher import ProjectWatcher
+
+        self.projectWatcher = ProjectWatcher(
+            directorySnapshot.directory, self.projectWatcherBridge.shotsScanned.emit, directorySnapshot
+        )
+        self.projectWatcher.start()
+
+    def stopProjectWatcher(self):
+        """Stop watching the project directory, saving the snapshot it kept up to date."""
+        if self.projectWatcher is None:
+            return
+        self.projectWatcher.stop()
+        self.projectWatcher.getSnapshot().save(self.directorySnapshotPath)
+        self.projectWatcher = None
+
+    def applyWatchedShots(self, scannedShots):
+        """Merge shots rescanned by the project watcher into the project, and refresh the widgets they affect.
+
+        Arguments:
+            scannedShots {dict} -- Shot name to the rescanned shot, or None for shots no longer on disk.
+        """
+        from renderboy.data.directorySnapshot import mergeScannedShot
+
+        summary = {"added": [], "changed": []}
+        # What is on disk isn't an edit to undo
+        with self.undoStack.ignoring(), self.project.batchEvents():
+            for scannedShot in scannedShots.values():
+                if scannedShot is not None:
+                    mergeScannedShot(self.project, scannedShot, summary)
+
+    def projectChanged(self, events):
+        """Journal a batch of changes to the project, and refresh only the widgets they affect.
+
+        Arguments:
+            events {list} -- The ChangeEvents sent by the project.
+        """
+        with instrumentation.span("projectChanged", "ui"):
+            if not self.isJournalPaused:
+                self.projectJournal.recordEvents(events)
+            self.undoStack.recordEvents(events)
+
+            shot = self.currentShot()
+            layer = self.currentLayer()
+            shotsAdded = False
+            shotsRemoved = False
+            layersChanged = False
+            rendersChanged = False
+            # The render tab is only built once it is first shown
+            render = self.currentRender() if self.renderTab not in self.tabSetups else None
+            renderDetailsChanged = False
+            # Shots whose search documents need updating, and the layer attributes that changed, None for the whole shot
+            # or True for every layer attribute
+            reindexShots = {}
+            for event in events:
+                kind = event.kind
+                if kind == "shotAdded":
+                    shotsAdded = True
+                    reindexShots[id(event.target)] = (event.target, None)
+                elif kind == "shotRemoved":
+                    shotsRemoved = True
+                    reindexShots.pop(id(event.target), None)
+                    if self.searchIndex is not None:
+                        self.searchIndex.removeShot(event.targetName)
+                elif kind == "shotChanged":
+                    if event.field == "name" and self.searchIndex is not None:
+                        # Drop the documents under the old name, the shot is indexed under its new name below
+                        self.searchIndex.removeShot(event.oldValue)
+                    if event.field in ("name", "notes"):
+                        reindexShots[id(event.shot)] = (event.shot, None)
+                elif kind.startswith("layer"):
+                    changedShot, attributes = reindexShots.get(id(event.shot), (event.shot, ()))
+                    if attributes is not None and attributes is not True:
+                        # A renamed or edited layer only changes the document of that field
+                        attributes = attributes + (event.field,) if event.field else True
+                    reindexShots[id(event.shot)] = (changedShot, attributes)
+
+                if event.shot is not shot:
+                    continue
+                if kind in ("layerAdded", "layerRemoved"):
+                    layersChanged = True
+                elif kind == "layerRenamed":
+                    # Only the renamed row of the layer list is updated
+                    self.layerListModel.objectChanged(event.target)
+                    if event.target is layer and self.layerNameLineEdit.text() != layer.name:
+                        self.layerNameLineEdit.setText(layer.name)
+                elif event.target is layer and kind == "layerListChanged":
+                    # Only the added or removed entries are changed in the list widget
+                    self.updateLayerListWidget(event.field, event)
+                elif event.target is layer and event.field in rbTypes.Layer.listTypes:
+                    self.updateLayerListWidget(event.field)
+                elif event.target is layer and kind == "layerChanged" and event.field == "notes":
+                    # Notes typed into the widget are already showing
+                    if self.layerNotesTextEdit.toPlainText() != layer.notes:
+                        self.layerNotesTextEdit.setPlainText(layer.notes)
+                elif kind in ("renderAdded", "renderRemoved"):
+                    rendersChanged = True
+                elif kind == "renderChanged":
+                    if event.field == "name":
+                        self.renderListModel.objectChanged(event.target)
+                    # New frames may have been written
+                    renderDetailsChanged = renderDetailsChanged or event.target is render
+
+            # Shots are added where they belong in name order, so only their rows are added and the selection is kept
+            if shotsAdded or shotsRemoved:
+                with instrumentation.span("syncShotList", "ui"):
+                    self.shotListModel.sync()
+            if shotsRemoved and shot is not None and shot._project is not self.project:
+                # The selected shot was removed, so show whichever shot is selected now
+                self.updateShotWidget()
+            else:
+                if layersChanged:
+                    self.layerListModel.sync()
+                    if self.currentLayer() is not layer:
+                        self.updateLayerSettingsWidget()
+                if rendersChanged:
+                    self.renderListModel.sync()
+                if renderDetailsChanged or (rendersChanged and self.renderTab not in self.tabSetups):
+                    self.updateRenderSettingsWidget()
+
+            if self.searchIndex is not None and reindexShots:
+                for changedShot, attributes in reindexShots.values():
+                    if attributes is None:
+                        self.searchIndex.updateShot(changedShot)
+                    else:
+                        self.searchIndex.updateLayers(changedShot, None if attributes is True else attributes)
+                if shotsAdded and self.sidebarSearchBar.text().strip():
+                    self.searchShots()
 
     def searchShots(self):
-        """Search for shots."""
-        if self.sidebarSearchBar.text():
+        """Search for shots by name, notes, layers and layer membership lists, showing the best matches first."""
+        with instrumentation.span("searchShots", "ui"):
+            query = self.sidebarSearchBar.text()
+            if not query.strip():
+                self.shotFilterModel.setScores(None)
+                return
+
             self.sidebarSearchBar.setClearButtonEnabled(True)
-            self.shotListWidget.clear()
-            shotsToSearch = [shot.name for shot in self.project.shots]
-            self.shotListWidget.addItems([shot for shot in shotsToSearch if self.sidebarSearchBar.text() in shot])
-        else:
-            self.shotListWidget.clear()
-            self.shotListWidget.addItems([shot.name for shot in self.project.shots])
+            if self.searchIndex is None:
+                from renderboy.data.searchIndex import SearchIndex
+
+                self.searchIndex = SearchIndex.fromProject(self.project)
+            self.shotFilterModel.setScores(dict(self.searchIndex.search(query)))
+
+    def resetSearchIndex(self):
+        """Index the shots again after the project is replaced, reading the layers of shots that haven't been loaded in
+        the background.
+        """
+        from renderboy.data.searchIndex import SearchIndex
+
+        self.searchIndex = SearchIndex.fromProject(self.project)
+        self.searchIndex.indexLayersInBackground()
+        if self.sidebarSearchBar.text().strip():
+            self.searchShots()
+
+    def currentShot(self):
+        """Return the shot selected in the shot list, or None."""
+        index = self.shotListView.currentIndex()
+        if not index.isValid():
+            return None
+        return index.data(objectRole)
+
+    def currentLayer(self):
+        """Return the layer selected in the layer list, or None."""
+        index = self.layerListView.currentIndex()
+        if not index.isValid():
+            return None
+        return index.data(objectRole)
 
     def updateSidebar(self, mode):
         """Update the sidebar collapsed state and mode."""
         if self.isSidebarCollapsed:
             self.sidebarMode = mode
-            if self.sidebarMode == "shots":
-                self.setupShotsSidebar()
-            elif self.sidebarMode == "settings":
-                self.setupSettingsSidebar()
+            self.showSidebarPage(self.sidebarMode)
 
             self.sidebar.setFixedWidth(200)
             self.isSidebarCollapsed = False
@@ -232,11 +782,7 @@ class RenderBoyWindow(QtWidgets.QMainWindow):
         else:
             # Update the sidebar mode
             self.sidebarMode = mode
-
-            if self.sidebarMode == "shots":
-                self.setupShotsSidebar()
-            elif self.sidebarMode == "settings":
-                self.setupSettingsSidebar()
+            self.showSidebarPage(self.sidebarMode)
 
     def setupShotWidget(self):
         """Set up the shot widget."""
@@ -245,22 +791,33 @@ class RenderBoyWindow(QtWidgets.QMainWindow):
 
         self.layerTab = QtWidgets.QWidget()
         self.renderTab = QtWidgets.QWidget()
+        self.layerTab.setDisabled(True)
+        self.renderTab.setDisabled(True)
 
         self.shotWidget.addTab(self.layerTab, "Layers")
         self.shotWidget.addTab(self.renderTab, "Renders")
 
-        self.setupLayerTab()
-        self.setupRenderTab()
+        # Tabs are built the first time they are shown. Their models are kept up to date until then.
+        self.tabSetups = {self.layerTab: self.setupLayerTab, self.renderTab: self.setupRenderTab}
+        self.shotWidget.currentChanged.connect(self.setupCurrentTab)
+        self.setupCurrentTab()
+
+    def setupCurrentTab(self):
+        """Build the current tab of the shot widget, if it hasn't been built yet."""
+        setup = self.tabSetups.pop(self.shotWidget.currentWidget(), None)
+        if setup is not None:
+            setup()
 
     def updateShotWidget(self):
         """Update the shot widget."""
-        self.updateLayerTab()
+        with instrumentation.span("updateShotWidget", "ui"):
+            self.updateLayerTab()
+            self.updateRenderTab(self.currentShot())
 
     def setupLayerTab(self):
         """Set up the layer tab."""
         self.layerLayout = QtWidgets.QHBoxLayout(self.layerTab)
         self.layerTab.setLayout(self.layerLayout)
-        self.layerTab.setDisabled(True)
 
         layerListWidgetHolder = QtWidgets.QWidget()
         layerListWidgetHolder.setFixedWidth(250)
@@ -292,12 +849,14 @@ class RenderBoyWindow(QtWidgets.QMainWindow):
         self.removeLayerButton.clicked.connect(self.removeLayer)
         buttonFrameLayout.addWidget(self.removeLayerButton)
 
-        # LIST WIDGET
-        self.layerListWidget = QtWidgets.QListWidget(self)
-        self.layerListWidget.setAlternatingRowColors(True)
-        self.layerListWidget.setFixedWidth(198)
-        self.layerListWidget.itemClicked.connect(self.updateLayerSettingsWidget)
-        layerListWidgetHolderLayout.addWidget(self.layerListWidget)
+        # LIST VIEW
+        self.layerListView = QtWidgets.QListView(self)
+        self.layerListView.setAlternatingRowColors(True)
+        self.layerListView.setFixedWidth(198)
+        self.layerListView.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.layerListView.setModel(self.layerListModel)
+        self.layerListView.clicked.connect(self.updateLayerSettingsWidget)
+        layerListWidgetHolderLayout.addWidget(self.layerListView)
 
         # SETTINGS WIDGET
         self.setupLayerSettingsWidget()
@@ -330,44 +889,62 @@ class RenderBoyWindow(QtWidgets.QMainWindow):
 
         self.layerSettingsLayout.addWidget(QtWidgets.QLabel("Exclude"))
 
-        excludeButtonFrame, addExcludeButton, removeExcludeButton, copyExcludeButton = self.createAddRemoveCopyButtons()
+        (
+            excludeButtonFrame, addExcludeButton, removeExcludeButton, copyExcludeButton, pasteExcludeButton
+        ) = self.createAddRemoveCopyButtons()
         self.layerSettingsLayout.addWidget(excludeButtonFrame)
 
         addExcludeButton.clicked.connect(partial(self.addToLayerList, "exclude"))
         removeExcludeButton.clicked.connect(partial(self.removeFromLayerList, "exclude"))
         copyExcludeButton.clicked.connect(partial(self.copyToClipboardFromList, "exclude"))
+        pasteExcludeButton.clicked.connect(partial(self.pasteToLayerList, "exclude"))
 
         self.excludeListWidget = QtWidgets.QListWidget()
         self.excludeListWidget.setAlternatingRowColors(True)
         self.excludeListWidget.setFixedHeight(98)
+        self.excludeListWidget.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.excludeListWidget.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.excludeListWidget.customContextMenuRequested.connect(partial(self.showLayerListMenu, "exclude"))
         self.layerSettingsLayout.addWidget(self.excludeListWidget)
 
         self.layerSettingsLayout.addWidget(QtWidgets.QLabel("Matte"))
 
-        matteButtonFrame, addMatteButton, removeMatteButton, copyMatteButton = self.createAddRemoveCopyButtons()
+        (
+            matteButtonFrame, addMatteButton, removeMatteButton, copyMatteButton, pasteMatteButton
+        ) = self.createAddRemoveCopyButtons()
         self.layerSettingsLayout.addWidget(matteButtonFrame)
 
         addMatteButton.clicked.connect(partial(self.addToLayerList, "matte"))
         removeMatteButton.clicked.connect(partial(self.removeFromLayerList, "matte"))
         copyMatteButton.clicked.connect(partial(self.copyToClipboardFromList, "matte"))
+        pasteMatteButton.clicked.connect(partial(self.pasteToLayerList, "matte"))
 
         self.matteListWidget = QtWidgets.QListWidget()
         self.matteListWidget.setAlternatingRowColors(True)
         self.matteListWidget.setFixedHeight(98)
+        self.matteListWidget.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.matteListWidget.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.matteListWidget.customContextMenuRequested.connect(partial(self.showLayerListMenu, "matte"))
         self.layerSettingsLayout.addWidget(self.matteListWidget)
 
         self.layerSettingsLayout.addWidget(QtWidgets.QLabel("Phantom"))
 
-        phantomButtonFrame, addPhantomButton, removePhantomButton, copyPhantomButton = self.createAddRemoveCopyButtons()
+        (
+            phantomButtonFrame, addPhantomButton, removePhantomButton, copyPhantomButton, pastePhantomButton
+        ) = self.createAddRemoveCopyButtons()
         self.layerSettingsLayout.addWidget(phantomButtonFrame)
 
         addPhantomButton.clicked.connect(partial(self.addToLayerList, "phantom"))
         removePhantomButton.clicked.connect(partial(self.removeFromLayerList, "phantom"))
         copyPhantomButton.clicked.connect(partial(self.copyToClipboardFromList, "phantom"))
+        pastePhantomButton.clicked.connect(partial(self.pasteToLayerList, "phantom"))
 
         self.phantomListWidget = QtWidgets.QListWidget()
         self.phantomListWidget.setAlternatingRowColors(True)
         self.phantomListWidget.setFixedHeight(98)
+        self.phantomListWidget.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.phantomListWidget.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.phantomListWidget.customContextMenuRequested.connect(partial(self.showLayerListMenu, "phantom"))
         self.layerSettingsLayout.addWidget(self.phantomListWidget)
 
         scrollArea = QtWidgets.QScrollArea()
@@ -376,7 +953,7 @@ class RenderBoyWindow(QtWidgets.QMainWindow):
         self.layerLayout.addWidget(scrollArea)
 
     def createAddRemoveCopyButtons(self):
-        """Create the add, remove and copy buttons for the layer settings widget."""
+        """Create the add, remove, copy and paste buttons for the layer settings widget."""
         arcButtonFrame = QtWidgets.QWidget()
         arcButtonFrame.setFixedHeight(20)
         arcFrameLayout = QtWidgets.QHBoxLayout(arcButtonFrame)
@@ -404,60 +981,106 @@ class RenderBoyWindow(QtWidgets.QMainWindow):
         copyExcludeToClipboardButton.setFixedHeight(20)
         arcFrameLayout.addWidget(copyExcludeToClipboardButton)
 
-        return arcButtonFrame, addExcludebutton, removeExcludeButton, copyExcludeToClipboardButton
+        pasteExcludeFromClipboardButton = QtWidgets.QPushButton("Paste")
+        pasteExcludeFromClipboardButton.setFixedWidth(50)
+        pasteExcludeFromClipboardButton.setFixedHeight(20)
+        arcFrameLayout.addWidget(pasteExcludeFromClipboardButton)
+
+        return (
+            arcButtonFrame, addExcludebutton, removeExcludeButton, copyExcludeToClipboardButton,
+            pasteExcludeFromClipboardButton
+        )
 
     def updateLayerTab(self):
         """Update the layer tab."""
-        # Get the currently selected shot
-        if not self.shotListWidget.currentItem():
-            self.layerListWidget.clear()
-            self.layerTab.setDisabled(True)
-            return
-
-        self.layerTab.setDisabled(False)
-        shotName = self.shotListWidget.currentItem().text()
-        shot = self.project.getShot(shotName)
-
-        # Update the layer list widget
-        self.layerListWidget.clear()
-        layerNames = [layer.name for layer in shot.layers]
-        self.layerListWidget.addItems(layerNames)
+        with instrumentation.span("updateLayerTab", "ui"):
+            # Get the currently selected shot
+            shot = self.currentShot()
+            if shot is None:
+                self.layerListModel.setShot(None)
+                self.layerTab.setDisabled(True)
+                return
+
+            self.layerTab.setDisabled(False)
+
+            # Update the layer list, only resetting it if a different shot was selected
+            if self.layerListModel.source() is shot.layers:
+                self.layerListModel.sync()
+            else:
+                self.layerListModel.setShot(shot)
 
-        self.updateLayerSettingsWidget()
+            self.updateLayerSettingsWidget()
 
     def updateLayerSettingsWidget(self):
         """Update the layer settings widget."""
-        if not self.shotListWidget.currentItem():
-            self.layerListWidget.clear()
-            self.layerTab.setDisabled(True)
-            self.layerNameLineEdit.setText("")
-            self.layerNotesTextEdit.setPlainText("")
-            return
+        with instrumentation.span("updateLayerSettingsWidget", "ui"):
+            if self.currentShot() is None:
+                self.layerListModel.setShot(None)
+                self.layerTab.setDisabled(True)
+                self.layerNameLineEdit.setText("")
+                self.layerNotesTextEdit.setPlainText("")
+                for listType in rbTypes.Layer.listTypes:
+                    self.updateLayerListWidget(listType)
+                return
+
+            layer = self.currentLayer()
+            if layer is None:
+                self.layerSettingsWidget.setDisabled(True)
+                self.layerNameLineEdit.setText("")
+                self.layerNotesTextEdit.setPlainText("")
+                for listType in rbTypes.Layer.listTypes:
+                    self.updateLayerListWidget(listType)
+                return
+
+            self.layerSettingsWidget.setDisabled(False)
+
+            self.layerNameLineEdit.setText(layer.name)
+
+            self.layerNotesTextEdit.setPlainText(layer.notes)
+
+            for listType in rbTypes.Layer.listTypes:
+                self.updateLayerListWidget(listType)
+
+    def getLayerListWidget(self, listType):
+        """Return the list widget showing the exclude, matte, or phantom list of the current layer, or None."""
+        return {
+            "exclude": self.excludeListWidget,
+            "matte": self.matteListWidget,
+            "phantom": self.phantomListWidget,
+        }.get(listType)
+
+    def updateLayerListWidget(self, listType, event=None):
+        """Show the exclude, matte, or phantom list of the current layer.
 
-        if not self.layerListWidget.currentItem():
-            self.layerSettingsWidget.setDisabled(True)
-            self.layerNameLineEdit.setText("")
-            self.layerNotesTextEdit.setPlainText("")
+        Arguments:
+            listType {str} -- The list to show. Can be "exclude", "matte", or "phantom".
+            event {ChangeEvent} -- A layerListChanged event of the current layer. Only its entries are added or removed
+                from the list widget, instead of filling it again.
+        """
+        listWidget = self.getLayerListWidget(listType)
+        if listWidget is None:
             return
 
-        self.layerSettingsWidget.setDisabled(False)
-
-        shotName = self.shotListWidget.currentItem().text()
-        shot = self.project.getShot(shotName)
-
-        layerName = self.layerListWidget.currentItem().text()
-        layer = shot.getLayer(layerName)
-
-        self.layerNameLineEdit.setText(layer.name)
-
-        self.layerNotesTextEdit.setPlainText(layer.notes)
+        layer = self.currentLayer()
+        if event is not None and layer is not None:
+            # Removed positions are where the entries were, so take them from the end to keep the earlier ones valid
+            for position in reversed(event.index if event.oldValue else []):
+                listWidget.takeItem(position)
+            # Added positions are where the entries end up, so insert them from the start
+            for position, entry in zip(event.index if event.newValue else [], event.newValue):
+                listWidget.insertItem(position, entry)
+            if listWidget.count() == len(getattr(layer, listType)):
+                return
+
+        listWidget.clear()
+        if layer is not None:
+            listWidget.addItems(list(getattr(layer, listType)))
 
     def setupRenderTab(self):
         """Set up the render tab."""
         self.renderTabLayout = QtWidgets.QVBoxLayout(self.renderTab)
         self.renderTab.setLayout(self.renderTabLayout)
         self.renderTabLayout.setAlignment(QtCore.Qt.AlignTop)
-        self.renderTab.setDisabled(True)
 
         self.renderTabLayout.addWidget(QtWidgets.QLabel("Renders"))
 
@@ -467,10 +1090,12 @@ class RenderBoyWindow(QtWidgets.QMainWindow):
         self.renderHWidget.setLayout(self.renderHLayout)
         self.renderTabLayout.addWidget(self.renderHWidget)
 
-        self.renderListWidget = QtWidgets.QListWidget(self)
-        self.renderListWidget.setAlternatingRowColors(True)
-        self.renderListWidget.setFixedWidth(198)
-        self.renderHLayout.addWidget(self.renderListWidget)
+        self.renderListView = QtWidgets.QListView(self)
+        self.renderListView.setAlternatingRowColors(True)
+        self.renderListView.setFixedWidth(198)
+        self.renderListView.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.renderListView.setModel(self.renderListModel)
+        self.renderHLayout.addWidget(self.renderListView)
 
         self.renderSettingsWidget = QtWidgets.QWidget()
         self.renderSettingsLayout = QtWidgets.QVBoxLayout(self.renderSettingsWidget)
@@ -480,65 +1105,173 @@ class RenderBoyWindow(QtWidgets.QMainWindow):
 
         self.renderSettingsLayout.addWidget(QtWidgets.QLabel("Render Details"))
 
+        self.renderLayerComboBox = QtWidgets.QComboBox(self)
+        self.renderLayerComboBox.setToolTip("The render layer to preview")
+        self.renderLayerComboBox.currentIndexChanged.connect(self.updateRenderFrameFiles)
+        self.renderSettingsLayout.addWidget(self.renderLayerComboBox)
+
+        # Thumbnails are made in the background and cached in the user folder
+        from renderboy.ui.thumbnails import ThumbnailLoader, defaultThumbnailSize
+
+        self.thumbnailLoader = ThumbnailLoader(os.path.join(self.userFolderPath, "thumbnails"), parent=self)
+        self.thumbnailLoader.thumbnailReady.connect(self.thumbnailLoaded)
+        self.renderPreviewPath = None
+        self.renderFrameFiles = {}
+
+        self.renderPreviewLabel = QtWidgets.QLabel(self)
+        self.renderPreviewLabel.setFixedSize(*defaultThumbnailSize)
+        self.renderPreviewLabel.setAlignment(QtCore.Qt.AlignCenter)
+        self.renderPreviewLabel.setStyleSheet("QLabel { background-color: #202020; }")
+        self.renderSettingsLayout.addWidget(self.renderPreviewLabel)
+
+        self.renderFrameWidget = QtWidgets.QWidget()
+        self.renderFrameLayout = QtWidgets.QHBoxLayout(self.renderFrameWidget)
+        self.renderFrameLayout.setContentsMargins(0, 0, 0, 0)
+        self.renderFrameSlider = QtWidgets.QSlider(QtCore.Qt.Horizontal, self)
+        self.renderFrameSlider.valueChanged.connect(self.showRenderFrame)
+        self.renderFrameLayout.addWidget(self.renderFrameSlider)
+        self.renderFrameLabel = QtWidgets.QLabel(self)
+        self.renderFrameLabel.setMinimumWidth(50)
+        self.renderFrameLayout.addWidget(self.renderFrameLabel)
+        self.renderSettingsLayout.addWidget(self.renderFrameWidget)
+
+        self.renderListView.clicked.connect(self.updateRenderSettingsWidget)
+        self.updateRenderSettingsWidget()
+
+    def currentRender(self):
+        """Return the render selected in the render list, or None."""
+        index = self.renderListView.currentIndex()
+        if not index.isValid():
+            return None
+        return index.data(objectRole)
+
+    def updateRenderSettingsWidget(self):
+        """Show the selected render's layers and frames."""
+        with instrumentation.span("updateRenderSettingsWidget", "ui"):
+            if self.renderTab in self.tabSetups:
+                # The tab hasn't been built yet
+                return
+
+            render = self.currentRender()
+            self.renderSettingsWidget.setDisabled(render is None)
+
+            layerName = self.renderLayerComboBox.currentText()
+            layerNames = render.layers if render is not None else []
+            self.renderLayerComboBox.blockSignals(True)
+            self.renderLayerComboBox.clear()
+            self.renderLayerComboBox.addItems(layerNames)
+            if layerName in layerNames:
+                self.renderLayerComboBox.setCurrentText(layerName)
+            self.renderLayerComboBox.blockSignals(False)
+            self.renderLayerComboBox.setVisible(bool(layerNames))
+
+            self.renderFrameSlider.blockSignals(True)
+            if render is not None:
+                self.renderFrameSlider.setRange(render.frameStart, render.frameEnd)
+            else:
+                self.renderFrameSlider.setRange(0, 0)
+            self.renderFrameSlider.blockSignals(False)
+            self.updateRenderFrameFiles()
+
+    def updateRenderFrameFiles(self):
+        """Find the frame files of the selected render and layer, and show the current frame."""
+        with instrumentation.span("updateRenderFrameFiles", "ui"):
+            if self.renderTab in self.tabSetups:
+                return
+
+            from renderboy.data.shotScanner import getRenderDirectory, listFrameFiles
+
+            shot = self.currentShot()
+            render = self.currentRender()
+            self.renderFrameFiles = {}
+            if shot is not None and render is not None and self.projectDirectory:
+                renderDirectory = getRenderDirectory(
+                    self.projectDirectory, shot.name, render.name, self.renderLayerComboBox.currentText()
+                )
+                self.renderFrameFiles = listFrameFiles(renderDirectory)
+            self.showRenderFrame(self.renderFrameSlider.value())
+
+    def showRenderFrame(self, frame):
+        """Show the thumbnail of a frame of the selected render, loading it in the background if it isn't cached."""
+        render = self.currentRender()
+        self.renderFrameLabel.setText(str(frame) if render is not None else "")
+        path = self.renderFrameFiles.get(frame)
+        self.renderPreviewPath = path
+        if path is None:
+            self.thumbnailLoader.cancelPending()
+            self.renderPreviewLabel.setText("No frame" if render is not None else "")
+            return
+
+        # Frames scrubbed past are dropped, while the next few frames are loaded ahead
+        prefetchPaths = [
+            self.renderFrameFiles[prefetchFrame]
+            for prefetchFrame in range(frame + 1, frame + 1 + renderPrefetchFrames)
+            if prefetchFrame in self.renderFrameFiles
+        ]
+        self.thumbnailLoader.cancelPending(keep=[path] + prefetchPaths)
+        image = self.thumbnailLoader.request(path)
+        if image is not None:
+            self.renderPreviewLabel.setPixmap(QtGui.QPixmap.fromImage(image))
+        for prefetchPath in prefetchPaths:
+            self.thumbnailLoader.request(prefetchPath)
+
+    def thumbnailLoaded(self, path, image):
+        """Show a thumbnail that finished loading, if its frame is still the one shown."""
+        if path != self.renderPreviewPath:
+            return
+        if image is None:
+            self.renderPreviewLabel.setText("No preview")
+        else:
+            self.renderPreviewLabel.setPixmap(QtGui.QPixmap.fromImage(image))
+
     def updateRenderTab(self, shot=None):
         """Update the render tab.
 
         Arguments:
-            shot {str} -- The shot to update the render tab for. Defaults to None, which will clear the render tab.
+            shot {Shot} -- The shot to update the render tab for. Defaults to None, which will clear the render tab.
         """
-        pass
+        with instrumentation.span("updateRenderTab", "ui"):
+            self.renderTab.setDisabled(shot is None)
+            if shot is not None and self.renderListModel.source() is shot.renders:
+                self.renderListModel.sync()
+            else:
+                self.renderListModel.setShot(shot)
+            self.updateRenderSettingsWidget()
 
     def addLayer(self):
         """Add a layer to the current shot."""
-        if not self.shotListWidget.currentItem():
+        shot = self.currentShot()
+        if shot is None:
             return
 
-        shotName = self.shotListWidget.currentItem().text()
-        shot = self.project.getShot(shotName)
         shot.addLayer()
-        self.updateLayerTab()
 
     def removeLayer(self):
         """Remove a layer from the current shot."""
-        if not self.shotListWidget.currentItem():
-            return
-        if not self.layerListWidget.currentItem():
+        shot = self.currentShot()
+        layer = self.currentLayer()
+        if shot is None or layer is None:
             return
 
-        shotName = self.shotListWidget.currentItem().text()
-        shot = self.project.getShot(shotName)
-        currentLayer = self.layerListWidget.currentItem().text()
-        shot.removeLayer(currentLayer)
-        self.updateLayerTab()
+        shot.removeLayer(layer.name)
 
     def renameLayer(self):
         """Rename the currently selected layer in the current shot."""
-        if not self.shotListWidget.currentItem():
-            return
-        if not self.layerListWidget.currentItem():
+        shot = self.currentShot()
+        layer = self.currentLayer()
+        if shot is None or layer is None:
             return
 
-        shotName = self.shotListWidget.currentItem().text()
-        shot = self.project.getShot(shotName)
-        layerName = self.layerListWidget.currentItem().text()
-        layer = shot.getLayer(layerName)
         layer.rename(self.layerNameLineEdit.text())
 
-        # Change the name in the layer list widget
-        self.layerListWidget.currentItem().setText(self.layerNameLineEdit.text())
-
     def updateLayerNotes(self):
         """Update the notes for the currently selected layer in the current shot."""
-        if not self.shotListWidget.currentItem():
-            return
-        if not self.layerListWidget.currentItem():
+        shot = self.currentShot()
+        layer = self.currentLayer()
+        if shot is None or layer is None:
             return
 
-        shotName = self.shotListWidget.currentItem().text()
-        shot = self.project.getShot(shotName)
-        layerName = self.layerListWidget.currentItem().text()
-        layer = shot.getLayer(layerName)
-        layer.notes = self.layerNotesTextEdit.toPlainText()
+        layer.setField("notes", self.layerNotesTextEdit.toPlainText())
 
     def addToLayerList(self, listType):
         """Add to layer exclude, matte, or phantom list.
@@ -546,74 +1279,180 @@ class RenderBoyWindow(QtWidgets.QMainWindow):
         Arguments:
             listType {str} -- The type of list to add to. Can be "exclude", "matte", or "phantom".
         """
-        if listType == "exclude":
-            listWidget = self.layerExcludeListWidget
-            listToAddTo = self.layer.exclude
-        elif listType == "matte":
-            listWidget = self.layerMatteListWidget
-            listToAddTo = self.layer.matte
-        elif listType == "phantom":
-            listWidget = self.layerPhantomListWidget
-            listToAddTo = self.layer.phantom
-        else:
+        layer = self.currentLayer()
+        if layer is None or listType not in rbTypes.Layer.listTypes:
             return
 
-        listToAddTo.append(f"New {listType.title()} Item")
-        listWidget.addItem(f"New {listType.title()} Item")
+        layer.addToList(listType, [f"New {listType.title()} Item"])
 
     def removeFromLayerList(self, listType):
-        """Remove from layer exclude, matte, or phantom list.
+        """Remove the selected entries from layer exclude, matte, or phantom list.
 
         Arguments:
             listType {str} -- The type of list to remove from. Can be "exclude", "matte", or "phantom".
         """
-        if listType == "exclude":
-            listWidget = self.layerExcludeListWidget
-            listToRemoveFrom = self.layer.exclude
-        elif listType == "matte":
-            listWidget = self.layerMatteListWidget
-            listToRemoveFrom = self.layer.matte
-        elif listType == "phantom":
-            listWidget = self.layerPhantomListWidget
-            listToRemoveFrom = self.layer.phantom
-        else:
+        layer = self.currentLayer()
+        if layer is None:
             return
 
-        for item in listWidget.selectedItems():
-            listToRemoveFrom.remove(item.text())
-            listWidget.takeItem(listWidget.row(item))
+        layer.removeFromList(listType, self.getSelectedListEntries(listType))
+
+    def getSelectedListEntries(self, listType):
+        """Return the entries selected in the exclude, matte, or phantom list widget, in list order.
+
+        Reads the selected rows rather than the selected items, so large selections don't wrap an item per entry.
+
+        Arguments:
+            listType {str} -- The list to read. Can be "exclude", "matte", or "phantom".
+        """
+        layer = self.currentLayer()
+        listWidget = self.getLayerListWidget(listType)
+        if layer is None or listWidget is None:
+            return []
+
+        rows = sorted(index.row() for index in listWidget.selectionModel().selectedRows())
+        if not rows:
+            return []
+        # The widget shows the layer's list as it is, so rows are positions in it
+        entries = list(getattr(layer, listType))
+        return [entries[row] for row in rows if row < len(entries)]
 
     def copyToClipboardFromList(self, listType):
-        """Copy to clipboard from layer exclude, matte, or phantom list."""
-        if listType == "exclude":
-            listToCopyFrom = self.layerExcludeListWidget
-        elif listType == "matte":
-            listToCopyFrom = self.layerMatteListWidget
-        elif listType == "phantom":
-            listToCopyFrom = self.layerPhantomListWidget
-        else:
+        """Copy the selected entries of layer exclude, matte, or phantom list to the clipboard, separated by spaces.
+
+        Copies every entry if none are selected.
+
+        Arguments:
+            listType {str} -- The type of list to copy from. Can be "exclude", "matte", or "phantom".
+        """
+        layer = self.currentLayer()
+        if layer is None or listType not in rbTypes.Layer.listTypes:
+            return
+
+        entries = self.getSelectedListEntries(listType) or list(getattr(layer, listType))
+        QtWidgets.QApplication.clipboard().setText(" ".join(entries))
+
+    def pasteToLayerList(self, listType):
+        """Add the entries on the clipboard to layer exclude, matte, or phantom list, skipping any it already has.
+
+        Arguments:
+            listType {str} -- The type of list to paste to. Can be "exclude", "matte", or "phantom".
+        """
+        layer = self.currentLayer()
+        if layer is None or listType not in rbTypes.Layer.listTypes:
             return
 
-        textToCopy = ""
-        for item in listToCopyFrom.selectedItems():
-            textToCopy += item.text() + " "
+        layer.addToList(listType, rbTypes.Layer.splitListText(QtWidgets.QApplication.clipboard().text()))
 
-        # TODO: Do the copy
+    def mergeLayerList(self, listType, otherLayer, operation):
+        """Combine layer exclude, matte, or phantom list with the same list of another layer.
+
+        Arguments:
+            listType {str} -- The type of list to change. Can be "exclude", "matte", or "phantom".
+            otherLayer {Layer} -- The layer whose list to combine with.
+            operation {str} -- One of Layer.mergeOperations.
+        """
+        layer = self.currentLayer()
+        if layer is None or otherLayer is layer:
+            return
+
+        layer.mergeList(listType, getattr(otherLayer, listType), operation)
+
+    def showLayerListMenu(self, listType, position):
+        """Show the context menu of layer exclude, matte, or phantom list widget.
+
+        Arguments:
+            listType {str} -- The list the menu is for. Can be "exclude", "matte", or "phantom".
+            position {QPoint} -- Where the menu was asked for, in list widget coordinates.
+        """
+        shot = self.currentShot()
+        layer = self.currentLayer()
+        listWidget = self.getLayerListWidget(listType)
+        if shot is None or layer is None or listWidget is None:
+            return
+
+        menu = QtWidgets.QMenu(self)
+        menu.addAction("Copy", partial(self.copyToClipboardFromList, listType))
+        menu.addAction("Paste", partial(self.pasteToLayerList, listType))
+        menu.addAction("Remove", partial(self.removeFromLayerList, listType))
+        menu.addSeparator()
+
+        otherLayers = [otherLayer for otherLayer in shot.layers if otherLayer is not layer]
+        for title, operation in (
+            ("Add Entries From", "union"),
+            ("Keep Only Entries In", "intersection"),
+            ("Remove Entries In", "difference"),
+        ):
+            mergeMenu = menu.addMenu(title)
+            mergeMenu.setEnabled(bool(otherLayers))
+            for otherLayer in otherLayers:
+                mergeMenu.addAction(otherLayer.name, partial(self.mergeLayerList, listType, otherLayer, operation))
+
+        menu.exec_(listWidget.mapToGlobal(position))
 
     def writeProjectToFile(self):
-        """Write the project to a file."""
-        if self.project:
-            self.project.writeToFile(self.projectDataPath)
-
-    def loadProjectFromFile(self, filePath):
-        """Load the project from a file."""
-        self.project = rbTypes.loadProjectFromFile(filePath)
-        if self.project:
-            self.shotListWidget.clear()
-            shotNames = [shot.name for shot in self.project.shots]
-            self.shotListWidget.addItems(shotNames)
+        """Write the whole project to a new snapshot, replacing the journal.
+
+        A copy of the project is written in the background, so it can keep being edited while it is saved.
+        """
+        if not self.project:
+            return
+
+        future = self.projectJournal.saveSnapshot(self.project, wait=False)
+        saveWorker = ProjectWorker(lambda worker: future.result(), "Saving project...", self)
+        saveWorker.finished.connect(saveWorker.deleteLater)
+        saveWorker.failed.connect(lambda error: print(f"WARNING: Could not save the project: {error}"))
+        saveWorker.start()
+
+    def loadProjectFromFile(self, filePath=None):
+        """Load the project from a file.
+
+        The shot list is emptied and then filled in as shots are read from the file in the background.
+
+        Arguments:
+            filePath {str} -- The project file to load. Defaults to asking the user for one.
+        """
+        if self.isProjectWorkerRunning():
+            return
+        if not filePath:
+            filePath, _ = QtWidgets.QFileDialog.getOpenFileName(
+                self, "Load Project", "", "Project Files (*.json *.rbp *.db *.sqlite)"
+            )
+            if not filePath:
+                return
+
+        # Shots found on disk while loading would be merged into the project before its own shots arrive
+        self.stopProjectWatcher()
+        self.setProject(rbTypes.Project())
+        self.isJournalPaused = True
+
+        def loadProject(worker):
+            return rbTypes.loadProjectFromFile(
+                filePath, lazy=True, progress=worker.reportProgress, shotLoaded=worker.addShot
+            )
+
+        def shotsLoaded(shots):
+            with self.undoStack.ignoring(), self.project.batchEvents():
+                for shot in shots:
+                    self.project.addShot(shot, self.project.getSortedIndex(shot.name))
+
+        def projectLoaded(project):
+            with self.undoStack.ignoring():
+                self.project.setField("name", project.name)
+                self.project.setField("notes", project.notes)
+            self.isJournalPaused = False
+            # A project loaded from its own store is already saved, and any other one is saved once into the store
+            if os.path.abspath(filePath) != os.path.abspath(self.projectJournal.projectDataPath):
+                self.writeProjectToFile()
+            self.startProjectWatcher(self.loadDirectorySnapshot())
+
+        self.runProjectWorker(loadProject, "Loading project...", shotsReady=shotsLoaded, finished=projectLoaded)
 
     def closeEvent(self, event):
         """Close the window and save project details."""
-        self.writeProjectToFile()
+        self.stopProjectWatcher()
+        if self.renderTab not in self.tabSetups:
+            self.thumbnailLoader.close()
+        # Every edit is already in the journal, so only wait for any compaction to finish
+        self.projectJournal.close()
         event.accept()
@@ -0,0 +1,151 @@
+"""Thumbnails of render frames, made on background threads and cached on disk and in memory."""
+
+
+from collections import OrderedDict
+
+from PySide2 import QtCore, QtGui
+
+from renderboy.data.thumbnailCache import ThumbnailCache, defaultMaxBytes
+
+
+defaultThumbnailSize = (320, 180)
+
+# Thumbnails are stored as jpegs, which are small and quick to read back
+_thumbnailFormat = "JPG"
+_thumbnailQuality = 85
+
+
+def makeThumbnail(path, thumbnailSize):
+    """Return a QImage of the frame scaled down to fit in the thumbnail size, or None if it can't be read.
+
+    The frame is scaled as it is read, which for some formats, such as jpeg, is much quicker than reading it whole.
+    """
+    reader = QtGui.QImageReader(path)
+    size = reader.size()
+    if size.isValid():
+        size.scale(QtCore.QSize(*thumbnailSize), QtCore.Qt.KeepAspectRatio)
+        reader.setScaledSize(size)
+    image = reader.read()
+    if image.isNull():
+        return None
+    if not size.isValid():
+        image = image.scaled(QtCore.QSize(*thumbnailSize), QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+    return image
+
+
+def encodeThumbnail(image):
+    """Return a thumbnail QImage as bytes to store in the disk cache."""
+    data = QtCore.QByteArray()
+    buffer = QtCore.QBuffer(data)
+    buffer.open(QtCore.QIODevice.WriteOnly)
+    image.save(buffer, _thumbnailFormat, _thumbnailQuality)
+    buffer.close()
+    return data.data()
+
+
+class ThumbnailLoader(QtCore.QObject):
+    """Loads thumbnails of frames on a pool of background threads.
+
+    Thumbnails come from a small in-memory cache of the most recently shown frames, then from the disk cache, and are
+    only made from the frame itself if neither has them. Frames are read with QImage, which is safe to use off the UI
+    thread, and thumbnailReady is emitted on the UI thread once a thumbnail is ready.
+    """
+
+    # The frame path, and its thumbnail QImage or None if the frame couldn't be read
+    thumbnailReady = QtCore.Signal(str, object)
+    _loaded = QtCore.Signal(str, object)
+
+    def __init__(self, cacheDirectory, thumbnailSize=defaultThumbnailSize, maxWorkers=4, memoryCacheSize=256,
+                 maxDiskBytes=defaultMaxBytes, parent=None):
+        """Initialize the loader.
+
+        Arguments:
+            cacheDirectory {str} -- The directory to keep thumbnails in.
+            thumbnailSize {tuple} -- The (width, height) thumbnails fit in.
+            maxWorkers {int} -- The most thumbnails to make at once.
+            memoryCacheSize {int} -- The most thumbnails to keep in memory.
+            maxDiskBytes {int} -- The most bytes of thumbnails to keep on disk.
+        """
+        super().__init__(parent)
+        self.thumbnailSize = tuple(thumbnailSize)
+        self.maxWorkers = maxWorkers
+        self.memoryCacheSize = memoryCacheSize
+        self.diskCache = ThumbnailCache(cacheDirectory, maxDiskBytes)
+
+        self._memoryCache = OrderedDict()
+        # Futures of the thumbnails being loaded, by frame path
+        self._loading = {}
+        self._executor = None
+        self._loaded.connect(self._storeThumbnail)
+
+    def request(self, path):
+        """Ask for the thumbnail of a frame.
+
+        Returns:
+            QImage: The thumbnail if it is in memory, otherwise None, and thumbnailReady is emitted once it is loaded.
+        """
+        image = self._memoryCache.get(path)
+        if image is not None:
+            self._memoryCache.move_to_end(path)
+            return image
+
+        if path not in self._loading:
+            if self._executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.maxWorkers, thread_name_prefix="RenderBoyThumbnail"
+                )
+            self._loading[path] = self._executor.submit(self._loadThumbnail, path)
+        return None
+
+    def cancelPending(self, keep=()):
+        """Stop loading thumbnails that haven't started yet, e.g. frames scrubbed past.
+
+        Arguments:
+            keep {iterable} -- Frame paths to keep loading.
+        """
+        keep = set(keep)
+        for path, future in list(self._loading.items()):
+            if path not in keep and future.cancel():
+                del self._loading[path]
+
+    def _loadThumbnail(self, path):
+        """Load a thumbnail from the disk cache, or make it from the frame. Run on a background thread."""
+        image = None
+        try:
+            key = ThumbnailCache.makeKey(path, self.thumbnailSize)
+        except OSError:
+            key = None
+
+        if key is not None:
+            data = self.diskCache.get(key)
+            if data is not None:
+                image = QtGui.QImage.fromData(data)
+                if image.isNull():
+                    image = None
+            if image is None:
+                image = makeThumbnail(path, self.thumbnailSize)
+                if image is not None:
+                    try:
+                        self.diskCache.put(key, encodeThumbnail(image))
+                    except OSError as e:
+                        print(f"WARNING: Could not cache the thumbnail of {path}: {e}")
+        self._loaded.emit(path, image)
+
+    def _storeThumbnail(self, path, image):
+        """Keep a loaded thumbnail in memory and pass it on."""
+        self._loading.pop(path, None)
+        if image is not None:
+            self._memoryCache[path] = image
+            self._memoryCache.move_to_end(path)
+            while len(self._memoryCache) > self.memoryCacheSize:
+                self._memoryCache.popitem(last=False)
+        self.thumbnailReady.emit(path, image)
+
+    def close(self):
+        """Stop loading thumbnails, waiting for those already being made."""
+        self.cancelPending()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
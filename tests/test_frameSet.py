@@ -0,0 +1,67 @@
+"""Tests for parsing and formatting frame sets, and for their set operations."""
+
+
+import random
+import unittest
+
+from renderboy.data.frameSet import FrameSet
+
+
+class ParseTest(unittest.TestCase):
+    def testRoundTrip(self):
+        for text in ("", "1001", "1001-1050", "1001-1050,1052,1054-1100", "-10--5,-3,0-2"):
+            self.assertEqual(str(FrameSet.fromString(text)), text)
+
+    def testRunsAreSortedAndMerged(self):
+        self.assertEqual(str(FrameSet.fromString("20-30, 1-5,4-10 ,11")), "1-11,20-30")
+
+    def testNegativeFrames(self):
+        frameSet = FrameSet.fromString("-5--2,-1-1")
+        self.assertEqual(list(frameSet), [-5, -4, -3, -2, -1, 0, 1])
+        self.assertEqual(frameSet.ranges(), [(-5, 1)])
+        self.assertEqual((frameSet.first, frameSet.last), (-5, 1))
+        self.assertIn(-3, frameSet)
+        self.assertNotIn(-6, frameSet)
+
+    def testBackwardsRangesAreEmpty(self):
+        self.assertEqual(str(FrameSet.fromString("10-5,1")), "1")
+
+    def testInvalidText(self):
+        for text in ("a", "1-", "1-2-3", "1..5"):
+            with self.assertRaises(ValueError):
+                FrameSet.fromString(text)
+
+
+class SetOperationTest(unittest.TestCase):
+    def assertMatchesSet(self, frameSet, frames):
+        self.assertEqual(list(frameSet), sorted(frames))
+        self.assertEqual(len(frameSet), len(frames))
+        self.assertEqual(frameSet, FrameSet.fromFrames(frames))
+
+    def testAgainstPythonSets(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            a = {rng.randint(-20, 20) for _ in range(rng.randint(0, 30))}
+            b = {rng.randint(-20, 20) for _ in range(rng.randint(0, 30))}
+            frameSetA = FrameSet.fromFrames(a)
+            frameSetB = FrameSet.fromFrames(b)
+            self.assertMatchesSet(frameSetA | frameSetB, a | b)
+            self.assertMatchesSet(frameSetA & frameSetB, a & b)
+            self.assertMatchesSet(frameSetA - frameSetB, a - b)
+            self.assertEqual(FrameSet.fromString(str(frameSetA)), frameSetA)
+
+    def testMissing(self):
+        frameSet = FrameSet.fromString("1001-1003,1006")
+        self.assertEqual(str(frameSet.missing()), "1004-1005")
+        self.assertEqual(str(frameSet.missing(1000, 1008)), "1000,1004-1005,1007-1008")
+        self.assertFalse(FrameSet().missing())
+
+    def testIsComplete(self):
+        frameSet = FrameSet.fromString("-2-3,5")
+        self.assertTrue(frameSet.isComplete(-2, 3))
+        self.assertFalse(frameSet.isComplete(-2, 5))
+        self.assertFalse(frameSet.isComplete(-3, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
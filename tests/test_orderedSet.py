@@ -0,0 +1,85 @@
+"""Tests for keeping the entries of layer membership lists in order through edits and set operations."""
+
+
+import unittest
+
+from renderboy.data.orderedSet import OrderedSet
+
+
+class OrderTest(unittest.TestCase):
+    def testRepeatedEntriesKeepTheirFirstPosition(self):
+        entries = OrderedSet(["b", "a", "b", "c", "a"])
+        self.assertEqual(entries, ["b", "a", "c"])
+        self.assertEqual(entries.index("c"), 2)
+        self.assertEqual(entries[1], "a")
+        self.assertEqual(entries[1:], ["a", "c"])
+
+    def testAddAndDiscard(self):
+        entries = OrderedSet(["a", "b"])
+        self.assertFalse(entries.add("a"))
+        self.assertTrue(entries.add("c"))
+        self.assertTrue(entries.discard("a"))
+        self.assertFalse(entries.discard("a"))
+        self.assertTrue(entries.add("a"))
+        self.assertEqual(entries, ["b", "c", "a"])
+        with self.assertRaises(ValueError):
+            entries.index("d")
+
+    def testUpdateReturnsTheAddedEntries(self):
+        entries = OrderedSet(["a", "b"])
+        self.assertEqual(entries.update(["c", "a", "d", "c"]), ["c", "d"])
+        self.assertEqual(entries, ["a", "b", "c", "d"])
+
+    def testInsertAll(self):
+        entries = OrderedSet(["a", "b", "c"])
+        self.assertEqual(entries.insertAll([0, 2, 10], ["x", "y", "b"]), ([0, 2], ["x", "y"]))
+        self.assertEqual(entries, ["x", "a", "y", "b", "c"])
+
+    def testInsertAllPastTheEndAppends(self):
+        entries = OrderedSet(["a"])
+        self.assertEqual(entries.insertAll([5, 6], ["b", "c"]), ([1, 2], ["b", "c"]))
+        self.assertEqual(entries, ["a", "b", "c"])
+
+    def testDiscardAllReturnsPositionsInOrder(self):
+        entries = OrderedSet(["a", "b", "c", "d"])
+        self.assertEqual(entries.discardAll(["d", "b", "z"]), ([1, 3], ["b", "d"]))
+        self.assertEqual(entries, ["a", "c"])
+
+    def testDiscardAllUndoneByInsertAll(self):
+        entries = OrderedSet(["a", "b", "c", "d", "e"])
+        positions, removed = entries.discardAll(["e", "b", "c"])
+        entries.insertAll(positions, removed)
+        self.assertEqual(entries, ["a", "b", "c", "d", "e"])
+
+    def testCopyIsIndependent(self):
+        entries = OrderedSet(["a", "b"])
+        copy = entries.copy()
+        copy.add("c")
+        self.assertEqual(entries, ["a", "b"])
+        self.assertEqual(copy, OrderedSet(["a", "b", "c"]))
+
+
+class SetOperationTest(unittest.TestCase):
+    def setUp(self):
+        self.entries = OrderedSet(["c", "a", "b"])
+
+    def testUnionKeepsThisSetsOrderFirst(self):
+        self.assertEqual(self.entries | ["d", "a", "e"], ["c", "a", "b", "d", "e"])
+        self.assertEqual(self.entries, ["c", "a", "b"])
+
+    def testIntersectionKeepsThisSetsOrder(self):
+        self.assertEqual(self.entries & ["b", "c", "z"], ["c", "b"])
+        self.assertEqual(self.entries & OrderedSet(["a"]), ["a"])
+
+    def testDifferenceKeepsThisSetsOrder(self):
+        self.assertEqual(self.entries - {"a"}, ["c", "b"])
+        self.assertEqual(self.entries - iter(["c", "b"]), ["a"])
+
+    def testEquality(self):
+        self.assertEqual(self.entries, ("c", "a", "b"))
+        self.assertNotEqual(self.entries, ["a", "b", "c"])
+        self.assertNotEqual(self.entries, {"a", "b", "c"})
+
+
+if __name__ == "__main__":
+    unittest.main()
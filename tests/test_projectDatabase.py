@@ -0,0 +1,98 @@
+"""Tests for keeping a project in a SQLite database through the same change events as the other stores."""
+
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import renderboy.data.renderTypes as rbTypes
+from renderboy.data.projectDatabase import ProjectDatabase
+from renderboy.data.projectShards import openProjectStore
+
+
+def buildProject():
+    """Return a small project of three shots, each with a layer and a render."""
+    project = rbTypes.Project()
+    project.name = "show"
+    for shotName in ("sh010", "sh020", "sh030"):
+        shot = rbTypes.Shot()
+        shot.name = shotName
+        project.addShot(shot)
+        shot.addLayer().rename("beauty")
+        render = rbTypes.Render()
+        render.name = "lighting"
+        shot.addRender(render)
+    return project
+
+
+def toJson(project):
+    return json.dumps(project, default=rbTypes.serializeRenderBoyObject, sort_keys=True)
+
+
+def loadSaved(databasePath):
+    """Return the project as it is saved in the database, read through a new connection, as json."""
+    database = ProjectDatabase(databasePath)
+    try:
+        return toJson(database.loadProject(lazy=False))
+    finally:
+        database.close()
+
+
+class ProjectDatabaseStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.databasePath = os.path.join(self.tempDir, "projectData.db")
+        database = ProjectDatabase(self.databasePath)
+        database.importProject(buildProject())
+        database.close()
+
+        self.store = openProjectStore(self.databasePath)
+        self.project = self.store.load()
+        self.project.subscribe(self.store.recordEvents)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tempDir)
+
+    def testOpenedByExtension(self):
+        self.assertIsInstance(self.store, ProjectDatabase)
+        self.assertFalse(any(shot.isLoaded for shot in self.project.shots))
+
+    def testEditsAreWritten(self):
+        with self.project.batchEvents():
+            self.project.setField("notes", "Final")
+            shot = self.project.getShot("sh010")
+            shot.setField("notes", "Hero shot")
+            shot.rename("sh015")
+            shot.getLayer("beauty").addToList("matte", ["chr_hero", "env_set"])
+        self.project.getShot("sh020").addLayer().rename("shadow")
+        self.project.removeShot("sh030")
+        newShot = rbTypes.Shot()
+        newShot.name = "sh040"
+        self.project.addShot(newShot)
+        newShot.addLayer().rename("beauty")
+
+        self.store.flush()
+        self.assertEqual(loadSaved(self.databasePath), toJson(self.project))
+
+    def testSnapshotKeepsShotsThatHaveNotLoaded(self):
+        self.project.getShot("sh020").loadContent()
+        self.project.getShot("sh020").setField("notes", "Loaded")
+        self.store.saveSnapshot(self.project)
+
+        # Shots still on disk load their layers from the rows they were read from
+        self.assertEqual([layer.name for layer in self.project.getShot("sh030").layers], ["beauty"])
+        self.assertEqual(loadSaved(self.databasePath), toJson(self.project))
+
+    def testLoadProjectFromFile(self):
+        target = rbTypes.Project()
+        loaded = rbTypes.loadProjectFromFile(self.databasePath, lazy=True, shotLoaded=target.addShot)
+        self.assertEqual([shot.name for shot in loaded.shots], ["sh010", "sh020", "sh030"])
+        self.assertIs(target.getShot("sh020")._project, target)
+        self.assertEqual(target.getShot("sh020").renders[0].name, "lighting")
+
+
+if __name__ == "__main__":
+    unittest.main()
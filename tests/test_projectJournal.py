@@ -0,0 +1,50 @@
+"""Tests for keeping a project as a snapshot plus a journal of the edits made since."""
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import renderboy.data.renderTypes as rbTypes
+from renderboy.data.projectJournal import ProjectJournal
+
+
+def buildProject():
+    """Return a project of two shots, each with one layer."""
+    project = rbTypes.Project()
+    for shotName in ("a", "b"):
+        shot = rbTypes.Shot()
+        shot.name = shotName
+        project.addShot(shot)
+        shot.addLayer().rename("beauty")
+    return project
+
+
+class RenameBeforeSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.projectDataPath = os.path.join(self.tempDir, "projectData.json")
+        buildProject().writeToFile(self.projectDataPath)
+        self.journal = ProjectJournal(self.projectDataPath)
+        self.project = self.journal.load()
+        self.project.subscribe(self.journal.recordEvents)
+
+    def tearDown(self):
+        self.journal.close()
+        shutil.rmtree(self.tempDir)
+
+    def testRenamedShotKeepsItsContent(self):
+        shot = self.project.getShot("b")
+        self.assertFalse(shot.isLoaded)
+        shot.rename("bb")
+        self.journal.saveSnapshot(self.project, wait=False).result()
+        self.assertEqual([layer.name for layer in shot.layers], ["beauty"])
+
+    def testUnloadedShotsStillLoadAfterASnapshot(self):
+        self.journal.saveSnapshot(self.project, wait=False).result()
+        self.assertEqual([layer.name for layer in self.project.getShot("a").layers], ["beauty"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""Tests for loading projects in the background while the shots are shown as they arrive."""
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import renderboy.data.renderTypes as rbTypes
+from renderboy.data import projectBinary, projectShards
+
+
+def buildProject():
+    """Return a small project of three shots, each with one layer."""
+    project = rbTypes.Project()
+    for shotName in ("sh010", "sh020", "sh030"):
+        shot = rbTypes.Shot()
+        shot.name = shotName
+        project.addShot(shot)
+        shot.addLayer().rename("beauty")
+    return project
+
+
+class ShotLoadedTest(unittest.TestCase):
+    """Shots handed to shotLoaded must stay in the project they were added to once the load finishes."""
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.project = buildProject()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def assertEditsAreSent(self, filePath):
+        # The window adds each shot to its own project as it arrives
+        target = rbTypes.Project()
+        events = []
+        target.subscribe(events.extend)
+        loaded = rbTypes.loadProjectFromFile(filePath, lazy=True, shotLoaded=target.addShot)
+        self.assertEqual([shot.name for shot in loaded.shots], ["sh010", "sh020", "sh030"])
+        del events[:]
+
+        shot = target.getShot("sh020")
+        self.assertIs(shot._project, target)
+        shot.setField("notes", "Edited after loading")
+        shot.getLayer("beauty").addToList("matte", ["chr_hero"])
+
+        self.assertEqual([event.kind for event in events], ["shotChanged", "layerListChanged"])
+        self.assertIs(events[0].target, shot)
+
+    def testStreamedJson(self):
+        filePath = os.path.join(self.tempDir, "projectData.json")
+        self.project.writeToFile(filePath)
+        self.assertEditsAreSent(filePath)
+
+    def testBinary(self):
+        filePath = os.path.join(self.tempDir, "projectData" + projectBinary.fileExtension)
+        projectBinary.writeProjectBinary(self.project, filePath)
+        self.assertEditsAreSent(filePath)
+
+    def testSharded(self):
+        folderPath = os.path.join(self.tempDir, projectShards.defaultShardedProjectFolderName)
+        projectShards.writeShardedProject(self.project, folderPath)
+        self.assertEditsAreSent(folderPath)
+
+    def testLoadWithoutShotLoadedOwnsItsShots(self):
+        filePath = os.path.join(self.tempDir, "projectData.json")
+        self.project.writeToFile(filePath)
+        loaded = rbTypes.loadProjectFromFile(filePath, lazy=True)
+        self.assertTrue(all(shot._project is loaded for shot in loaded.shots))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Tests for several people saving the same sharded project."""
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import renderboy.data.renderTypes as rbTypes
+from renderboy.data import projectShards
+
+
+def addShot(project, shotName):
+    shot = rbTypes.Shot()
+    shot.name = shotName
+    project.addShot(shot)
+    shot.addLayer().rename("beauty")
+    return shot
+
+
+class SharedFolderTest(unittest.TestCase):
+    """A snapshot must keep the shots someone else saved to the folder since it was read."""
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.folderPath = os.path.join(self.tempDir, projectShards.defaultShardedProjectFolderName)
+        project = rbTypes.Project()
+        for shotName in ("a", "b"):
+            addShot(project, shotName)
+        projectShards.writeShardedProject(project, self.folderPath)
+
+        self.stores = [projectShards.ShardedProjectStore(self.folderPath) for _ in range(2)]
+        self.projects = [store.load() for store in self.stores]
+        for store, project in zip(self.stores, self.projects):
+            project.subscribe(store.recordEvents)
+
+    def tearDown(self):
+        for store in self.stores:
+            store.close()
+        shutil.rmtree(self.tempDir)
+
+    def getShardFileNames(self):
+        return sorted(os.listdir(os.path.join(self.folderPath, projectShards.shardFolderName)))
+
+    def loadShotNames(self):
+        return [shot.name for shot in projectShards.loadShardedProject(self.folderPath).shots]
+
+    def testSnapshotKeepsShotsSavedByOthers(self):
+        addShot(self.projects[0], "c")
+        self.stores[0].saveSnapshot(self.projects[0])
+        self.stores[1].saveSnapshot(self.projects[1])
+
+        self.assertEqual(self.loadShotNames(), ["a", "b", "c"])
+        self.assertIn(projectShards.getShardFileName("c"), self.getShardFileNames())
+
+    def testSnapshotRemovesShotsRemovedHere(self):
+        addShot(self.projects[0], "c")
+        self.stores[0].saveSnapshot(self.projects[0])
+        self.projects[1].removeShot(self.projects[1].getShot("a"))
+        self.stores[1].saveSnapshot(self.projects[1])
+
+        self.assertEqual(self.loadShotNames(), ["b", "c"])
+        self.assertNotIn(projectShards.getShardFileName("a"), self.getShardFileNames())
+
+    def testEditsAreWrittenAsTheyAreWhenWritten(self):
+        store = projectShards.ShardedProjectStore(self.folderPath, writeDelay=60.0)
+        project = store.load()
+        project.subscribe(store.recordEvents)
+        layer = project.getShot("b").getLayer("beauty")
+        layer.addToList("matte", ["chr_hero"])
+        layer.addToList("matte", ["chr_villain"])
+        store.close()
+
+        loaded = projectShards.loadShardedProject(self.folderPath)
+        self.assertEqual(list(loaded.getShot("b").getLayer("beauty").matte), ["chr_hero", "chr_villain"])
+        self.assertEqual(store.getMetrics()["shardWrites"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
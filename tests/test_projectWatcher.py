@@ -0,0 +1,113 @@
+"""Tests for reading the directory snapshot of a project watcher while it rescans on its own threads."""
+
+
+import errno
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from renderboy.data import projectWatcher
+from renderboy.data.directorySnapshot import DirectorySnapshot, scanChangedShots
+from renderboy.data.projectWatcher import ProjectWatcher
+
+
+def writeFrames(directory, shotName, renderName, frames):
+    renderPath = os.path.join(directory, shotName, renderName)
+    os.makedirs(renderPath, exist_ok=True)
+    for frame in frames:
+        open(os.path.join(renderPath, f"{renderName}.{frame}.exr"), "w").close()
+
+
+def settle(directory):
+    """Move the mtimes of a directory and everything below it out of the racy window of a scan made now."""
+    settledTime = time.time() - 60
+    for path, _, _ in os.walk(directory):
+        os.utime(path, (settledTime, settledTime))
+
+
+class ProjectWatcherSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        writeFrames(self.directory, "sh010", "lighting", range(1001, 1004))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testCopyIsNotChangedByLaterScans(self):
+        snapshot = DirectorySnapshot(self.directory)
+        snapshot.setShot("sh010", {"": [1, 2, 3]}, 10)
+        copy = snapshot.copy()
+        snapshot.setShot("sh020", {"": [1, 2, 3]}, 10)
+        snapshot.shots.pop("sh010")
+        self.assertEqual(sorted(copy.shots), ["sh010"])
+
+    def testGetSnapshotWhilePolling(self):
+        scanned = []
+        rescanned = threading.Event()
+
+        def shotsScanned(scannedShots):
+            scanned.append(scannedShots)
+            # The first poll may come before the new shot is written
+            if "sh020" in scannedShots:
+                rescanned.set()
+
+        watcher = ProjectWatcher(self.directory, shotsScanned, debounce=0.0, pollInterval=0.05, usePolling=True)
+        watcher.start()
+        try:
+            writeFrames(self.directory, "sh020", "lighting", range(1001, 1003))
+            self.assertTrue(rescanned.wait(10))
+            snapshot = watcher.getSnapshot()
+        finally:
+            watcher.stop()
+
+        self.assertIsNotNone(next(scannedShots for scannedShots in scanned if "sh020" in scannedShots)["sh020"])
+        self.assertIn("sh020", snapshot.shots)
+        self.assertIsNot(snapshot.shots, watcher.snapshot.shots)
+
+
+class RescanTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        writeFrames(self.directory, "sh010", "lighting", range(1001, 1004))
+        settle(self.directory)
+        self.snapshot = DirectorySnapshot()
+        scanChangedShots(self.directory, self.snapshot, set(), lambda shot: None)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testRescanKeepsItsOwnScanTime(self):
+        scanTime = self.snapshot.scanTime
+        writeFrames(self.directory, "sh020", "lighting", range(1001, 1003))
+        settle(os.path.join(self.directory, "sh020"))
+        watcher = ProjectWatcher(self.directory, lambda scannedShots: None, snapshot=self.snapshot, usePolling=True)
+        watcher._rescan({"sh020"})
+
+        self.assertEqual(self.snapshot.scanTime, scanTime)
+        self.assertTrue(self.snapshot.isShotCurrent("sh010"))
+        self.assertTrue(self.snapshot.isShotCurrent("sh020"))
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is only on Linux")
+    def testPollsOnceTheWatchLimitIsReached(self):
+        def addWatch(backend, path, shotName, depth):
+            raise OSError(errno.ENOSPC, f"Could not watch {path}")
+
+        watcher = ProjectWatcher(self.directory, lambda scannedShots: None, snapshot=self.snapshot, usePolling=False)
+        with mock.patch.object(projectWatcher._InotifyBackend, "_addWatch", addWatch), \
+                mock.patch("builtins.print") as printed:
+            watcher.start()
+            backend = watcher._backend
+            watcher.stop()
+
+        self.assertIsInstance(backend, projectWatcher._PollingBackend)
+        self.assertEqual(printed.call_count, 1)
+        self.assertIn("polling", printed.call_args[0][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
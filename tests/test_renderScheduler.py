@@ -0,0 +1,139 @@
+"""Tests for splitting renders into chunks, retrying failed frames and reporting frames as they finish."""
+
+
+import threading
+import unittest
+
+import renderboy.data.renderTypes as rbTypes
+from renderboy.data import renderScheduler
+from renderboy.data.frameSet import FrameSet
+from renderboy.data.renderScheduler import LocalScheduler, RenderJob
+
+
+def buildJob(frameStart, frameEnd, commandTemplate="render {start} {end}"):
+    render = rbTypes.Render()
+    render.name = "lighting"
+    render.frameStart = frameStart
+    render.frameEnd = frameEnd
+    return RenderJob(render, commandTemplate)
+
+
+class FakeRenderer:
+    """Runs chunks without starting processes, recording each chunk and failing the given frames."""
+
+    def __init__(self, failFrames=(), reportFrames=False):
+        self.failFrames = set(failFrames)
+        self.reportFrames = reportFrames
+        self.chunks = []
+        self._lock = threading.Lock()
+
+    def __call__(self, command, lineRead):
+        start, end = int(command[1]), int(command[2])
+        with self._lock:
+            self.chunks.append((start, end))
+        for frame in range(start, end + 1):
+            if frame in self.failFrames:
+                return 1, f"Failed to render frame {frame}"
+            if self.reportFrames:
+                lineRead(f"Rendered frame {frame}\n")
+        return 0, ""
+
+
+class ChunkSizeTest(unittest.TestCase):
+    def testChunksShrinkTowardsTheEnd(self):
+        renderer = FakeRenderer()
+        job, = LocalScheduler(maxWorkers=1, runCommand=renderer).run([buildJob(1, 100)])
+        self.assertEqual([end - start + 1 for start, end in renderer.chunks], [50, 25, 13, 6, 3, 2, 1])
+        self.assertEqual(job.getFrames("done"), FrameSet.fromRange(1, 100))
+        self.assertEqual(job.chunkCount, 7)
+
+    def testChunkSizeLimits(self):
+        renderer = FakeRenderer()
+        LocalScheduler(maxWorkers=1, minChunkSize=4, maxChunkSize=10, runCommand=renderer).run([buildJob(1, 30)])
+        self.assertEqual([end - start + 1 for start, end in renderer.chunks], [10, 10, 5, 4, 1])
+
+    def testChunksOnlyHoldConsecutiveFrames(self):
+        renderer = FakeRenderer()
+        render = rbTypes.Render()
+        job = RenderJob(render, "render {start} {end}", FrameSet.fromString("1-4,10-12"))
+        LocalScheduler(maxWorkers=1, runCommand=renderer).run([job])
+        self.assertTrue(all(end - start < 4 and not start <= 5 <= end for start, end in renderer.chunks))
+        self.assertEqual(job.getFrames("done"), FrameSet.fromString("1-4,10-12"))
+
+
+class RetryTest(unittest.TestCase):
+    def testFailedFramesAreRetriedOnTheirOwn(self):
+        renderer = FakeRenderer(failFrames=[5])
+        job, = LocalScheduler(maxWorkers=1, maxRetries=2, runCommand=renderer).run([buildJob(1, 8)])
+
+        self.assertEqual(job.getFrames("failed"), FrameSet.fromFrames([5]))
+        self.assertEqual(job.getFrames("done"), FrameSet.fromString("1-4,6-8"))
+        self.assertEqual(job.frames[5].attempts, 3)
+        self.assertIn("Failed to render frame 5", job.frames[5].error)
+        # Only the failed frame is run again, on its own, not the frames around it
+        self.assertEqual(renderer.chunks.count((5, 5)), 2)
+        self.assertTrue(all(job.frames[frame].attempts <= 2 for frame in (1, 2, 3, 4, 6, 7, 8)))
+
+    def testReportedFramesAreNotRetried(self):
+        renderer = FakeRenderer(failFrames=[3], reportFrames=True)
+        job, = LocalScheduler(
+            maxWorkers=1, maxRetries=0, framePattern=renderScheduler.dummyFramePattern, runCommand=renderer
+        ).run([buildJob(1, 8)])
+
+        self.assertEqual(job.getFrames("failed"), FrameSet.fromFrames([3]))
+        self.assertEqual(job.frames[1].attempts, 1)
+        self.assertEqual(job.frames[2].attempts, 1)
+        # Frames after the failed one were never started, so trying them again isn't a retry
+        self.assertEqual(job.frames[4].attempts, 1)
+        self.assertEqual(job.toDict()["retries"], 0)
+
+    def testCommandsThatCantStartFail(self):
+        def runCommand(command, lineRead):
+            raise FileNotFoundError(f"No such file: {command[0]}")
+
+        job, = LocalScheduler(maxWorkers=2, maxRetries=1, runCommand=runCommand).run([buildJob(1, 4)])
+        self.assertEqual(job.getFrames("failed"), FrameSet.fromRange(1, 4))
+        self.assertIn("No such file", job.frames[1].error)
+
+
+class FramePatternTest(unittest.TestCase):
+    def testFramesAreReportedAsTheyFinish(self):
+        renderer = FakeRenderer(reportFrames=True)
+        doneCounts = []
+        LocalScheduler(
+            maxWorkers=1, framePattern=renderScheduler.dummyFramePattern, runCommand=renderer
+        ).run([buildJob(1, 4)], progress=lambda job: doneCounts.append(job.getStatusCounts()["done"]))
+
+        # Each frame is reported as soon as it is done, not only once its chunk exits
+        self.assertEqual(sorted(set(doneCounts)), [1, 2, 3, 4])
+        self.assertEqual(doneCounts, sorted(doneCounts))
+
+
+class DummyRenderTest(unittest.TestCase):
+    """Runs the dummy renderer in processes, the way real renders are run."""
+
+    def buildDummyJob(self, frameStart, frameEnd, failFrames=""):
+        template = renderScheduler.dummyCommandTemplate + ["--seconds", "0", "--fail", failFrames]
+        return buildJob(frameStart, frameEnd, template)
+
+    def testRendersEveryFrame(self):
+        job, = renderScheduler.renderLocally(
+            [self.buildDummyJob(-2, 5)], maxWorkers=2, framePattern=renderScheduler.dummyFramePattern
+        )
+        self.assertTrue(job.isFinished)
+        self.assertEqual(job.getFrames("done"), FrameSet.fromRange(-2, 5))
+        self.assertTrue(all(state.seconds is not None for state in job.frames.values()))
+
+    def testFailFrames(self):
+        job, = renderScheduler.renderLocally(
+            [self.buildDummyJob(1001, 1006, "1003")], maxWorkers=1, maxRetries=1,
+            framePattern=renderScheduler.dummyFramePattern,
+        )
+        self.assertEqual(job.getFrames("failed"), FrameSet.fromFrames([1003]))
+        self.assertEqual(job.getFrames("done"), FrameSet.fromString("1001-1002,1004-1006"))
+        self.assertEqual(job.frames[1003].attempts, 2)
+        self.assertIn("Failed to render frame 1003", job.frames[1003].error)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+"""Tests for keeping the search index in step with edits, and for searching without loading every shot."""
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import renderboy.data.renderTypes as rbTypes
+from renderboy.data.searchIndex import SearchIndex
+
+
+def buildProject():
+    """Return a project of three shots, each with a layer named after the shot's creature. The griffin's layer holds
+    out the hero.
+    """
+    project = rbTypes.Project()
+    for shotName, layerName in (("sh010", "dragon"), ("sh020", "griffin"), ("sh030", "kraken")):
+        shot = rbTypes.Shot()
+        shot.name = shotName
+        project.addShot(shot)
+        shot.addLayer().rename(layerName)
+    project.getShot("sh020").getLayer("griffin").addToList("matte", ["char_hero_GEO"])
+    return project
+
+
+def searchNames(index, query):
+    return [shotName for shotName, _ in index.search(query)]
+
+
+class RenameTest(unittest.TestCase):
+    def setUp(self):
+        self.project = buildProject()
+        self.index = SearchIndex.fromProject(self.project)
+
+    def testRenamedShotIsOnlyFoundByItsNewName(self):
+        shot = self.project.getShot("sh020")
+        shot.rename("wolverine")
+        self.index.renameShot(shot, "sh020")
+        self.assertEqual(searchNames(self.index, "wolverine"), ["wolverine"])
+        self.assertEqual(searchNames(self.index, "griffin"), ["wolverine"])
+        self.assertNotIn("sh020", self.index._shotDocuments)
+
+    def testRenamedLayerIsOnlyFoundByItsNewName(self):
+        shot = self.project.getShot("sh030")
+        shot.getLayer("kraken").rename("leviathan")
+        self.index.updateLayers(shot, ("name",))
+        self.assertEqual(searchNames(self.index, "leviathan"), ["sh030"])
+        self.assertEqual(searchNames(self.index, "kraken"), [])
+
+
+class LazySearchTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        filePath = os.path.join(self.tempDir, "projectData.json")
+        buildProject().writeToFile(filePath)
+        self.project = rbTypes.loadProjectFromFile(filePath, lazy=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def testSearchLoadsNoShots(self):
+        index = SearchIndex.fromProject(self.project)
+        self.assertEqual(searchNames(index, "sh020"), ["sh020"])
+        self.assertFalse(any(shot.isLoaded for shot in self.project.shots))
+
+    def testUnloadedShotsAreFoundByTheirMembership(self):
+        index = SearchIndex.fromProject(self.project)
+        self.assertEqual(searchNames(index, "char_hero_GEO"), ["sh020"])
+        self.assertFalse(any(shot.isLoaded for shot in self.project.shots))
+
+    def testLayersAreReadInTheBackground(self):
+        index = SearchIndex.fromProject(self.project)
+        index.indexLayersInBackground()
+        layerReader = index._layerReader
+        if layerReader is not None:
+            layerReader.join(5.0)
+        self.assertEqual(index._pendingShots, {})
+        self.assertEqual(searchNames(index, "char_hero_GEO"), ["sh020"])
+        self.assertFalse(any(shot.isLoaded for shot in self.project.shots))
+
+    def testLoadedShotsAreFoundByTheirLayers(self):
+        index = SearchIndex.fromProject(self.project)
+        self.project.getShot("sh030").loadContent()
+        self.assertEqual(searchNames(index, "kraken"), ["sh030"])
+
+    def testReadLayers(self):
+        index = SearchIndex.fromProject(self.project, readLayers=True)
+        self.assertEqual(searchNames(index, "griffin"), ["sh020"])
+        self.assertFalse(any(shot.isLoaded for shot in self.project.shots))
+
+
+if __name__ == "__main__":
+    unittest.main()
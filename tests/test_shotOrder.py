@@ -0,0 +1,52 @@
+"""Tests for keeping shots in name order without moving them after their events are sent."""
+
+
+import unittest
+
+import renderboy.data.renderTypes as rbTypes
+from renderboy.data.undoStack import UndoStack
+
+
+def makeShot(shotName):
+    shot = rbTypes.Shot()
+    shot.name = shotName
+    return shot
+
+
+class ShotOrderTest(unittest.TestCase):
+    def setUp(self):
+        self.project = rbTypes.Project()
+        for shotName in ("sh010", "sh030", "sh050"):
+            self.project.addShot(makeShot(shotName))
+
+    def shotNames(self):
+        return [shot.name for shot in self.project.shots]
+
+    def testSortedIndex(self):
+        self.assertEqual(self.project.getSortedIndex("sh000"), 0)
+        self.assertEqual(self.project.getSortedIndex("sh020"), 1)
+        self.assertEqual(self.project.getSortedIndex("sh030"), 2)
+        self.assertEqual(self.project.getSortedIndex("sh060"), 3)
+
+    def testUndoRestoresShotsWhereTheyWere(self):
+        undoStack = UndoStack(self.project, mergeInterval=0)
+        self.project.subscribe(undoStack.recordEvents)
+
+        self.project.addShot(makeShot("sh040"), self.project.getSortedIndex("sh040"))
+        self.project.addShot(makeShot("sh020"), self.project.getSortedIndex("sh020"))
+        self.assertEqual(self.shotNames(), ["sh010", "sh020", "sh030", "sh040", "sh050"])
+
+        undoStack.undo()
+        undoStack.undo()
+        self.assertEqual(self.shotNames(), ["sh010", "sh030", "sh050"])
+        undoStack.redo()
+        undoStack.redo()
+        self.assertEqual(self.shotNames(), ["sh010", "sh020", "sh030", "sh040", "sh050"])
+
+        self.project.removeShot(self.project.getShot("sh030"))
+        undoStack.undo()
+        self.assertEqual(self.shotNames(), ["sh010", "sh020", "sh030", "sh040", "sh050"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""Tests for undoing and redoing renames and edits of layer membership lists."""
+
+
+import unittest
+
+import renderboy.data.renderTypes as rbTypes
+from renderboy.data.undoStack import UndoStack
+
+
+def buildProject():
+    """Return a project of two shots, each with a beauty layer holding out a few assets."""
+    project = rbTypes.Project()
+    for shotName in ("sh010", "sh020"):
+        shot = rbTypes.Shot()
+        shot.name = shotName
+        project.addShot(shot)
+        layer = shot.addLayer()
+        layer.rename("beauty")
+        layer.addToList("matte", ["chr_hero", "chr_villain", "env_city", "prp_car"])
+    return project
+
+
+class UndoTestCase(unittest.TestCase):
+    def setUp(self):
+        self.project = buildProject()
+        self.undoStack = UndoStack(self.project, mergeInterval=0)
+        self.project.subscribe(self.undoStack.recordEvents)
+        self.layer = self.project.getShot("sh010").getLayer("beauty")
+
+
+class RenameTest(UndoTestCase):
+    def testUndoShotRename(self):
+        shot = self.project.getShot("sh010")
+        shot.rename("sh015")
+        self.assertTrue(self.undoStack.undo())
+        self.assertIs(self.project.getShot("sh010"), shot)
+        self.assertIsNone(self.project.getShot("sh015"))
+
+        self.assertTrue(self.undoStack.redo())
+        self.assertEqual(shot.name, "sh015")
+        self.assertIs(self.project.getShot("sh015"), shot)
+        self.assertIsNone(self.project.getShot("sh010"))
+
+    def testUndoLayerRename(self):
+        shot = self.project.getShot("sh010")
+        self.layer.rename("beauty_v2")
+        self.undoStack.undo()
+        self.assertIs(shot.getLayer("beauty"), self.layer)
+        self.assertIsNone(shot.getLayer("beauty_v2"))
+        self.undoStack.redo()
+        self.assertIs(shot.getLayer("beauty_v2"), self.layer)
+
+    def testRenamesMadeTogetherAreUndoneTogether(self):
+        self.undoStack.mergeInterval = 60.0
+        shot = self.project.getShot("sh020")
+        shot.rename("sh02")
+        shot.rename("sh025")
+        self.undoStack.undo()
+        self.assertEqual(shot.name, "sh020")
+        self.assertFalse(self.undoStack.canUndo())
+        self.undoStack.redo()
+        self.assertIs(self.project.getShot("sh025"), shot)
+
+
+class ListMergeTest(UndoTestCase):
+    def testUndoUnionRemovesOnlyTheAddedEntries(self):
+        self.layer.mergeList("matte", ["prp_tree", "chr_hero", "fx_smoke"], "union")
+        self.assertEqual(self.layer.matte, ["chr_hero", "chr_villain", "env_city", "prp_car", "prp_tree", "fx_smoke"])
+        self.undoStack.undo()
+        self.assertEqual(self.layer.matte, ["chr_hero", "chr_villain", "env_city", "prp_car"])
+        self.undoStack.redo()
+        self.assertEqual(self.layer.matte, ["chr_hero", "chr_villain", "env_city", "prp_car", "prp_tree", "fx_smoke"])
+
+    def testUndoIntersectionRestoresTheOrder(self):
+        self.layer.mergeList("matte", ["prp_car", "chr_hero"], "intersection")
+        self.assertEqual(self.layer.matte, ["chr_hero", "prp_car"])
+        self.undoStack.undo()
+        self.assertEqual(self.layer.matte, ["chr_hero", "chr_villain", "env_city", "prp_car"])
+        self.undoStack.redo()
+        self.assertEqual(self.layer.matte, ["chr_hero", "prp_car"])
+
+    def testUndoDifferenceRestoresTheOrder(self):
+        self.layer.mergeList("matte", ["env_city", "chr_hero", "fx_smoke"], "difference")
+        self.undoStack.undo()
+        self.assertEqual(self.layer.matte, ["chr_hero", "chr_villain", "env_city", "prp_car"])
+
+    def testMergeIntoSeveralLayersIsOneStep(self):
+        layers = [shot.getLayer("beauty") for shot in self.project.shots]
+        with self.project.batchEvents():
+            for layer in layers:
+                layer.mergeList("matte", ["chr_villain"], "difference")
+        self.undoStack.undo()
+        self.assertFalse(self.undoStack.canUndo())
+        for layer in layers:
+            self.assertEqual(layer.matte, ["chr_hero", "chr_villain", "env_city", "prp_car"])
+
+    def testUndoSettingTheWholeList(self):
+        self.layer.setField("matte", ["prp_tree"])
+        self.undoStack.undo()
+        self.assertEqual(self.layer.matte, ["chr_hero", "chr_villain", "env_city", "prp_car"])
+        self.undoStack.redo()
+        self.assertEqual(self.layer.matte, ["prp_tree"])
+
+
+if __name__ == "__main__":
+    unittest.main()